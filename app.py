@@ -1,20 +1,148 @@
+import csv
+import hashlib
+import heapq
+import io
+import json
+import logging
 import os
-from datetime import datetime, timedelta
-
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
+from collections import defaultdict
+from datetime import datetime, time, timedelta, timezone
+from itertools import islice
+from time import sleep
+
+import click
+from flask import Blueprint, Flask, current_app, render_template, request, redirect, url_for, flash, jsonify, abort, \
+    Response, stream_with_context
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
+from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
-
-app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///BBS.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-# Line 13 - ChatGPT
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'default_secret_key')  # Fallback to default if not set
-
-db = SQLAlchemy(app)
-login_manager = LoginManager(app)
-login_manager.login_view = 'signin'
+from itsdangerous import BadSignature, URLSafeSerializer
+from sqlalchemy import Integer, cast, event, exists, func, insert, literal, or_, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, joinedload, object_session, with_polymorphic
+from werkzeug.utils import import_string
+
+from autocomplete import PrefixIndex
+from availability_import import AvailabilityImportError, find_overlaps, parse_availability
+from cache import LRUCache
+from database import database_url, engine_options, install_sqlite_pragmas
+from geo import cell_ranges, distance_km, grid_cell, valid_coordinates
+from ics import CalendarEvent, render_calendar
+from passwords import HashingBusy, PasswordHasher
+from query_stats import init_query_stats
+from reminders import Reminder, TimerQueue
+from recurrence import WEEKDAY_NAMES, AvailabilityWindow, expand_weekly_rules
+from shop_search import SEARCH_SQL, drop_barbershop_fts, install_barbershop_fts, match_expression
+from slots import DayBitmap, DaySchedule, to_minutes, to_time
+from user_import import UserImportError, hash_passwords, parse_users
+
+db = SQLAlchemy()
+migrate = Migrate()
+login_manager = LoginManager()
+login_manager.login_view = 'main.signin'
+# Routes and CLI commands, registered on each app by create_app
+bp = Blueprint('main', __name__, cli_group=None)
+
+
+# Build the app. Defaults come from the environment, `config` overrides them (e.g. a test database). Nothing here
+# touches the database: connections are opened on first use, and tables are created by `flask init-db` or
+# `flask db upgrade`
+def create_app(config=None):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url(os.environ, 'sqlite:///BBS.db')
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # SQLite tuning applied to every connection: journal mode, milliseconds a writer waits for the lock, synchronous
+    # level and page cache size per connection in KiB
+    app.config['SQLITE_JOURNAL_MODE'] = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    app.config['SQLITE_BUSY_TIMEOUT_MS'] = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    app.config['SQLITE_SYNCHRONOUS'] = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    app.config['SQLITE_CACHE_SIZE_KB'] = int(os.environ.get('SQLITE_CACHE_SIZE_KB', 16384))
+    # Connection pool of server databases (PostgreSQL, MySQL): pooled and extra connections, seconds to wait for one
+    # and seconds before a connection is replaced
+    app.config['DB_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', 10))
+    app.config['DB_MAX_OVERFLOW'] = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+    app.config['DB_POOL_TIMEOUT'] = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+    app.config['DB_POOL_RECYCLE'] = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    # Line 13 - ChatGPT
+    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'default_secret_key')  # Fallback to default if not set
+    # Spacing in minutes between the start times offered for a service
+    app.config['SLOT_INTERVAL_MINUTES'] = 15
+    # Default and largest number of days searched, and largest number of slots returned, by the shop-wide slot search
+    app.config['SLOT_SEARCH_DAYS'] = 14
+    app.config['SLOT_SEARCH_MAX_DAYS'] = 62
+    app.config['SLOT_SEARCH_LIMIT'] = 50
+    # How many days ahead customers can see a barber's available days
+    app.config['BOOKING_HORIZON_DAYS'] = int(os.environ.get('BOOKING_HORIZON_DAYS', 60))
+    # Rows fetched per batch when streaming an export
+    app.config['EXPORT_BATCH_SIZE'] = 1000
+    # Password hashing: werkzeug method with its cost parameters (stored hashes made otherwise are upgraded at
+    # sign-in), worker count, most hashes waiting or running before sign-ups and sign-ins are turned away, and
+    # 'thread' or 'process' workers
+    app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+    app.config['PASSWORD_HASH_WORKERS'] = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+    app.config['PASSWORD_HASH_MAX_PENDING'] = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 64))
+    app.config['PASSWORD_HASH_EXECUTOR'] = os.environ.get('PASSWORD_HASH_EXECUTOR', 'thread')
+    # Signed-in users kept in memory, and seconds before one is reloaded to pick up other workers' changes
+    app.config['USER_CACHE_SIZE'] = 10000
+    app.config['USER_CACHE_TTL'] = 30
+    # Past appointments shown per page on the customer home page
+    app.config['HISTORY_PAGE_SIZE'] = 10
+    # Largest number of barbershops returned by a search
+    app.config['SHOP_SEARCH_LIMIT'] = 20
+    # Default and largest number of names returned by barbershop autocomplete, and seconds between full rebuilds
+    app.config['AUTOCOMPLETE_LIMIT'] = 10
+    app.config['AUTOCOMPLETE_MAX_LIMIT'] = 50
+    app.config['AUTOCOMPLETE_REFRESH_SECONDS'] = 300
+    # Default and largest search radius in km, and default number of shops returned, for the nearby shop search
+    app.config['NEARBY_RADIUS_KM'] = 10
+    app.config['NEARBY_MAX_RADIUS_KM'] = 50
+    app.config['NEARBY_LIMIT'] = 10
+    # Days of history and of upcoming schedule included in a barber's calendar feed
+    app.config['CALENDAR_FEED_PAST_DAYS'] = 30
+    app.config['CALENDAR_FEED_FUTURE_DAYS'] = 90
+    # Barber-day bitmaps kept in memory, and seconds before one is rebuilt to pick up other workers' writes
+    app.config['SCHEDULE_CACHE_SIZE'] = 4096
+    app.config['SCHEDULE_CACHE_TTL'] = 60
+    # Barber-day calendar event lists kept in memory for the choose_time calendar (same TTL as the bitmaps)
+    app.config['EVENTS_CACHE_SIZE'] = 4096
+    # Warn when a request runs more SQL statements than this, or the same statement shape this many times
+    app.config['QUERY_BUDGET'] = int(os.environ.get('QUERY_BUDGET', 30))
+    app.config['QUERY_REPEAT_THRESHOLD'] = 5
+    # Appointment reminders: whether bookings record their changes for the scheduler (nothing prunes the rows
+    # unless it runs), hours before an appointment a reminder is sent, 'module:function' called with each
+    # reminders.Reminder, seconds between checks for booking changes, seconds between full reloads of upcoming
+    # reminders, and seconds before a failed reminder is tried again
+    app.config['REMINDERS_ENABLED'] = os.environ.get('REMINDERS_ENABLED', '').lower() in ('1', 'true', 'yes')
+    app.config['REMINDER_LEAD_HOURS'] = int(os.environ.get('REMINDER_LEAD_HOURS', 24))
+    app.config['REMINDER_SENDER'] = os.environ.get('REMINDER_SENDER', 'reminders:log_reminder')
+    app.config['REMINDER_POLL_SECONDS'] = 30
+    app.config['REMINDER_RELOAD_SECONDS'] = 3600
+    app.config['REMINDER_RETRY_SECONDS'] = 300
+    app.config.update(config or {})
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config))
+
+    db.init_app(app)
+    with app.app_context():
+        install_sqlite_pragmas(db.engine, app.config)
+    migrate.init_app(app, db)
+    init_query_stats(app, db)
+    login_manager.init_app(app)
+    app.extensions['password_hasher'] = PasswordHasher(method=app.config['PASSWORD_HASH_METHOD'],
+                                                       workers=app.config['PASSWORD_HASH_WORKERS'],
+                                                       max_pending=app.config['PASSWORD_HASH_MAX_PENDING'],
+                                                       executor=app.config['PASSWORD_HASH_EXECUTOR'])
+    # The in-memory caches are shared by every app in the process
+    user_cache.maxsize, user_cache.ttl = app.config['USER_CACHE_SIZE'], app.config['USER_CACHE_TTL']
+    day_bitmaps.maxsize, day_bitmaps.ttl = app.config['SCHEDULE_CACHE_SIZE'], app.config['SCHEDULE_CACHE_TTL']
+    day_events.maxsize, day_events.ttl = app.config['EVENTS_CACHE_SIZE'], app.config['SCHEDULE_CACHE_TTL']
+    app.register_blueprint(bp)
+    return app
+
+
+# The password hasher of the current app, see create_app
+def get_password_hasher():
+    return current_app.extensions['password_hasher']
 
 
 # User model for barber and customer types
@@ -24,7 +152,7 @@ class User(db.Model, UserMixin):
     first_name = db.Column(db.String(100), nullable=False)
     last_name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(100), unique=True, nullable=False)
-    password = db.Column(db.String(100), nullable=False)
+    password = db.Column(db.String(255), nullable=False)
     type = db.Column(db.String(50))
 
     # Mapper args - ChatGPT
@@ -45,6 +173,13 @@ class User(db.Model, UserMixin):
 # Updated Appointment model
 class Appointment(db.Model):
     __tablename__ = 'appointment'
+    # Schedules are looked up per barber-day and appointment lists per customer, ordered by date
+    __table_args__ = (
+        db.Index('ix_appointment_barber_id_date', 'barber_id', 'date'),
+        db.Index('ix_appointment_customer_id_date', 'customer_id', 'date'),
+        # Upcoming appointments are loaded by date for reminders
+        db.Index('ix_appointment_date', 'date'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     barber_id = db.Column(db.Integer, db.ForeignKey('barber.id', ondelete='CASCADE'), nullable=False)
     customer_id = db.Column(db.Integer, db.ForeignKey('customer.id', ondelete='CASCADE'), nullable=False)
@@ -63,7 +198,8 @@ class Appointment(db.Model):
 class Barber(User):
     __tablename__ = 'barber'
     id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
-    shop_id = db.Column(db.Integer, db.ForeignKey('barbershop.shop_id', ondelete='SET NULL'), nullable=True)
+    shop_id = db.Column(db.Integer, db.ForeignKey('barbershop.shop_id', ondelete='SET NULL'), nullable=True,
+                        index=True)
 
     # Mapper args - ChatGPT
     __mapper_args__ = {
@@ -91,6 +227,7 @@ class Customer(User):
 
 # Store barber availability
 class Availability(db.Model):
+    __table_args__ = (db.Index('ix_availability_barber_id_date', 'barber_id', 'date'),)
     id = db.Column(db.Integer, primary_key=True)
     barber_id = db.Column(db.Integer, db.ForeignKey('barber.id', ondelete='CASCADE'), nullable=False)
     date = db.Column(db.Date, nullable=False)
@@ -104,6 +241,83 @@ class Availability(db.Model):
         self.end_time = end_time
 
 
+# Weekly availability: the same hours every week on one weekday, from valid_from until valid_until (open-ended
+# if None). Rules are expanded only for the dates being looked at, see expand_availability
+class AvailabilityRule(db.Model):
+    __tablename__ = 'availability_rule'
+    __table_args__ = (db.Index('ix_availability_rule_barber_id_weekday', 'barber_id', 'weekday'),)
+    id = db.Column(db.Integer, primary_key=True)
+    barber_id = db.Column(db.Integer, db.ForeignKey('barber.id', ondelete='CASCADE'), nullable=False)
+    weekday = db.Column(db.Integer, nullable=False)  # 0 is Monday
+    start_time = db.Column(db.Time, nullable=False)
+    end_time = db.Column(db.Time, nullable=False)
+    valid_from = db.Column(db.Date, nullable=False)
+    valid_until = db.Column(db.Date, nullable=True)
+
+    exceptions = db.relationship('AvailabilityException', backref='rule', cascade='all, delete-orphan', lazy=True)
+
+    def __init__(self, barber_id, weekday, start_time, end_time, valid_from, valid_until=None):
+        self.barber_id = barber_id
+        self.weekday = weekday
+        self.start_time = start_time
+        self.end_time = end_time
+        self.valid_from = valid_from
+        self.valid_until = valid_until
+
+    @property
+    def weekday_name(self):
+        return WEEKDAY_NAMES[self.weekday]
+
+
+# A date on which a weekly availability rule does not apply
+class AvailabilityException(db.Model):
+    __tablename__ = 'availability_exception'
+    __table_args__ = (db.Index('ix_availability_exception_rule_id_date', 'rule_id', 'date'),)
+    id = db.Column(db.Integer, primary_key=True)
+    rule_id = db.Column(db.Integer, db.ForeignKey('availability_rule.id', ondelete='CASCADE'), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+
+    def __init__(self, rule_id, date):
+        self.rule_id = rule_id
+        self.date = date
+
+
+# When a barber's availability or appointments last changed. Calendar feeds derive their ETag from it,
+# so polling clients can be answered with a 304 after a single primary-key lookup
+class ScheduleStamp(db.Model):
+    __tablename__ = 'schedule_stamp'
+    barber_id = db.Column(db.Integer, db.ForeignKey('barber.id', ondelete='CASCADE'), primary_key=True)
+    updated_at = db.Column(db.DateTime, nullable=False)
+
+    def __init__(self, barber_id, updated_at):
+        self.barber_id = barber_id
+        self.updated_at = updated_at
+
+
+# Barber-days whose appointments changed, one row per change, written in the same transaction as the change.
+# The reminder scheduler reads the rows after the last one it has seen instead of rereading every appointment
+class AppointmentChange(db.Model):
+    __tablename__ = 'appointment_change'
+    id = db.Column(db.Integer, primary_key=True)
+    barber_id = db.Column(db.Integer, nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    changed_at = db.Column(db.DateTime, nullable=False)
+
+
+# Reminders already sent, so a restarted scheduler does not send them again. A moved appointment has a new start
+# and gets a new reminder
+class SentReminder(db.Model):
+    __tablename__ = 'sent_reminder'
+    appointment_id = db.Column(db.Integer, primary_key=True)
+    starts_at = db.Column(db.DateTime, primary_key=True)
+    sent_at = db.Column(db.DateTime, nullable=False)
+
+    def __init__(self, appointment_id, starts_at, sent_at):
+        self.appointment_id = appointment_id
+        self.starts_at = starts_at
+        self.sent_at = sent_at
+
+
 # Store barbershop details
 class Barbershop(db.Model):
     __tablename__ = 'barbershop'
@@ -112,18 +326,28 @@ class Barbershop(db.Model):
     address = db.Column(db.String(200), nullable=False)
     phone_number = db.Column(db.String(15), nullable=False)
     creator_id = db.Column(db.Integer, db.ForeignKey('barber.id', ondelete='SET NULL'), unique=True)
+    # Optional location. geo_cell is the indexed grid cell of the location, see geo.py
+    latitude = db.Column(db.Float, nullable=True)
+    longitude = db.Column(db.Float, nullable=True)
+    geo_cell = db.Column(db.Integer, nullable=True, index=True)
 
-    def __init__(self, name, address, phone_number, creator_id):
+    def __init__(self, name, address, phone_number, creator_id, latitude=None, longitude=None):
         self.name = name
         self.address = address
         self.phone_number = phone_number
         self.creator_id = creator_id
+        self.set_location(latitude, longitude)
+
+    def set_location(self, latitude, longitude):
+        self.latitude = latitude
+        self.longitude = longitude
+        self.geo_cell = grid_cell(latitude, longitude) if latitude is not None and longitude is not None else None
 
 
 # Services provided by barbers
 class Service(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    barber_id = db.Column(db.Integer, db.ForeignKey('barber.id', ondelete='CASCADE'), nullable=False)
+    barber_id = db.Column(db.Integer, db.ForeignKey('barber.id', ondelete='CASCADE'), nullable=False, index=True)
     name = db.Column(db.String(100), nullable=False)
     duration = db.Column(db.Integer, nullable=False)  # Duration in minutes
     price = db.Column(db.Float, nullable=False)
@@ -135,24 +359,396 @@ class Service(db.Model):
         self.price = price
 
 
+# Signed-in users, kept detached between requests so most requests load their user without a query. An entry is
+# dropped as soon as a commit changes the user's row, and expires after USER_CACHE_TTL seconds so changes made
+# by other workers are picked up
+user_cache = LRUCache(maxsize=10000, ttl=30)
+
+
+# A user with the columns of its subclass, loaded in one query outside the request's session so the cached copy
+# is not tied to it
+def fetch_detached_user(user_id):
+    polymorphic_user = with_polymorphic(User, '*')
+    with Session(db.engine, expire_on_commit=False) as session:
+        return session.scalars(select(polymorphic_user).where(polymorphic_user.id == user_id)).first()
+
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    user = user_cache.get_or_load(int(user_id), lambda: fetch_detached_user(int(user_id)))
+    # A per-request copy in the session, so lazy loads and changes work as usual
+    return db.session.merge(user, load=False) if user is not None else None
+
+
+# Record users whose row changes in the current transaction, dropped from user_cache on commit
+@event.listens_for(User, 'after_update', propagate=True)
+@event.listens_for(User, 'after_delete', propagate=True)
+def user_changed(mapper, connection, target):
+    object_session(target).info.setdefault('changed_users', set()).add(target.id)
+
+
+@event.listens_for(db.session, 'after_commit')
+def drop_changed_users(session):
+    for user_id in session.info.pop('changed_users', ()):
+        user_cache.invalidate(user_id)
+    # Deleting a barbershop sets its barbers' shop_id to NULL in the database, without ORM events for them
+    if session.info.pop('barbershop_deleted', False):
+        user_cache.clear()
+
+
+@event.listens_for(db.session, 'after_rollback')
+def forget_changed_users(session):
+    session.info.pop('changed_users', None)
+    session.info.pop('barbershop_deleted', None)
+
+
+@event.listens_for(db.metadata, 'after_create')
+@event.listens_for(db.metadata, 'after_drop')
+def clear_user_cache(*args, **kwargs):
+    user_cache.clear()
+
+
+# Full-text index for barbershop search, SQLite only (search falls back to LIKE elsewhere or without FTS5)
+@event.listens_for(Barbershop.__table__, 'after_create')
+def create_barbershop_fts(target, connection, **kwargs):
+    if connection.dialect.name == 'sqlite':
+        try:
+            install_barbershop_fts(connection)
+        except OperationalError as e:
+            current_app.logger.warning('Barbershop search index not available: %s', e)
+
+
+@event.listens_for(Barbershop.__table__, 'after_drop')
+def remove_barbershop_fts(target, connection, **kwargs):
+    if connection.dialect.name == 'sqlite':
+        drop_barbershop_fts(connection)
+
+
+# Barbershop names held in memory for type-ahead search. Built on first use, kept up to date with this process's
+# commits and rebuilt every AUTOCOMPLETE_REFRESH_SECONDS to pick up other workers' changes
+shop_names = PrefixIndex()
+
+
+def rebuild_shop_names():
+    shop_names.rebuild(db.session.query(Barbershop.shop_id, Barbershop.name).all())
+
+
+# Record barbershops created, renamed or deleted in the current transaction, applied to shop_names on commit
+@event.listens_for(Barbershop, 'after_insert')
+@event.listens_for(Barbershop, 'after_update')
+def barbershop_saved(mapper, connection, target):
+    object_session(target).info.setdefault('changed_shops', {})[target.shop_id] = target.name
+
+
+@event.listens_for(Barbershop, 'after_delete')
+def barbershop_deleted(mapper, connection, target):
+    session = object_session(target)
+    session.info.setdefault('changed_shops', {})[target.shop_id] = None
+    session.info['barbershop_deleted'] = True
+
+
+@event.listens_for(db.session, 'after_commit')
+def apply_changed_shops(session):
+    for shop_id, name in session.info.pop('changed_shops', {}).items():
+        if name is None:
+            shop_names.remove(shop_id)
+        else:
+            shop_names.set(shop_id, name)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def forget_changed_shops(session):
+    session.info.pop('changed_shops', None)
 
 
-# Create all database tables
-with app.app_context():
+# A new or dropped barbershop table has no shops
+@event.listens_for(Barbershop.__table__, 'after_create')
+@event.listens_for(Barbershop.__table__, 'after_drop')
+def clear_shop_names(*args, **kwargs):
+    shop_names.rebuild([])
+
+
+# Create all database tables, and the search index of a database created before it existed
+def init_db():
     db.create_all()
+    with db.engine.begin() as connection:
+        create_barbershop_fts(Barbershop.__table__, connection)
+
+
+@bp.cli.command('init-db')
+def init_db_command():
+    """Create any missing database tables and the barbershop search index."""
+    init_db()
+    click.echo('Database initialised')
+
+
+# Parse a YYYY-MM-DD date from the URL, 404 if it is not a valid date
+def parse_date_or_404(date_str):
+    try:
+        return datetime.strptime(date_str, '%Y-%m-%d').date()
+    except ValueError:
+        abort(404)
+
+
+# Bitmaps of recently used barber-days, dropped as soon as a transaction touching that day commits
+day_bitmaps = LRUCache(maxsize=4096, ttl=60)
+# Calendar events of recently viewed barber-days, invalidated together with the bitmaps
+day_events = LRUCache(maxsize=4096, ttl=60)
+# Every cache keyed by (barber_id, date)
+barber_day_caches = (day_bitmaps, day_events)
+
+
+# Record that a barber-day's availability or appointments change in the current transaction.
+# A day of None means every day of the barber, e.g. when a weekly rule changes
+def schedule_changed(barber_id, day=None):
+    db.session.info.setdefault('changed_schedules', set()).add((barber_id, day))
+
+
+# Stamp the barbers whose schedule changed, in the same transaction as the change
+@event.listens_for(db.session, 'before_commit')
+def stamp_changed_schedules(session):
+    barber_ids = {barber_id for barber_id, _ in session.info.get('changed_schedules', ())}
+    if not barber_ids:
+        return
+
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    dialect = session.get_bind().dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        upsert = (sqlite if dialect == 'sqlite' else postgresql).insert(ScheduleStamp).values(
+            [{'barber_id': barber_id, 'updated_at': now} for barber_id in barber_ids])
+        session.execute(upsert.on_conflict_do_update(index_elements=['barber_id'], set_={'updated_at': now}))
+    else:
+        for barber_id in barber_ids:
+            session.merge(ScheduleStamp(barber_id=barber_id, updated_at=now))
+
+
+@event.listens_for(db.session, 'after_commit')
+def drop_changed_schedules(session):
+    for barber_id, day in session.info.pop('changed_schedules', ()):
+        for cache in barber_day_caches:
+            if day is None:
+                cache.invalidate_matching(lambda key: key[0] == barber_id)
+            else:
+                cache.invalidate((barber_id, day))
+
+
+@event.listens_for(db.session, 'after_rollback')
+def forget_changed_schedules(session):
+    session.info.pop('changed_schedules', None)
+
+
+# Record that a barber-day's appointments change in the current transaction: its cached schedule is dropped and,
+# if reminders are enabled, the change is written to appointment_change for the reminder scheduler
+def appointments_changed(barber_id, day):
+    schedule_changed(barber_id, day)
+    if current_app.config['REMINDERS_ENABLED']:
+        db.session.info.setdefault('changed_appointments', set()).add((barber_id, day))
+
+
+@event.listens_for(db.session, 'before_commit')
+def record_appointment_changes(session):
+    changed = session.info.pop('changed_appointments', None)
+    if not changed:
+        return
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    session.execute(insert(AppointmentChange), [{'barber_id': barber_id, 'date': day, 'changed_at': now}
+                                                for barber_id, day in sorted(changed)])
+
+
+@event.listens_for(db.session, 'after_rollback')
+def forget_appointment_changes(session):
+    session.info.pop('changed_appointments', None)
+
+
+# Tables created or dropped (e.g. a fresh test database), so nothing cached is valid any more
+@event.listens_for(db.metadata, 'after_create')
+@event.listens_for(db.metadata, 'after_drop')
+def clear_schedule_caches(*args, **kwargs):
+    for cache in barber_day_caches:
+        cache.clear()
+
+
+# Weekly rules of barbers expanded into concrete windows between two dates, minus their exceptions.
+# Without an end date rules are expanded up to the booking horizon, without a start date from when they begin.
+# Reads go through `session`, the request's session by default
+def expand_availability_rules(barber_ids, start_date=None, end_date=None, session=None):
+    session = db.session if session is None else session
+    if end_date is None:
+        end_date = datetime.today().date() + timedelta(days=current_app.config['BOOKING_HORIZON_DAYS'])
+    rules = session.query(AvailabilityRule).filter(AvailabilityRule.barber_id.in_(barber_ids),
+                                                   AvailabilityRule.valid_from <= end_date)
+    if start_date is not None:
+        rules = rules.filter(or_(AvailabilityRule.valid_until.is_(None), AvailabilityRule.valid_until >= start_date))
+    rules = rules.all()
+    if not rules:
+        return []
+
+    if start_date is None:
+        start_date = min(rule.valid_from for rule in rules)
+    skipped = set(session.query(AvailabilityException.rule_id, AvailabilityException.date).filter(
+        AvailabilityException.rule_id.in_([rule.id for rule in rules]),
+        AvailabilityException.date.between(start_date, end_date)).all())
+    return expand_weekly_rules(rules, skipped, start_date, end_date)
+
+
+# Availability windows of barbers between two dates: stored Availability rows plus expanded weekly rules.
+# This is the one place availability is read for booking and calendars. Missing dates leave stored rows unbounded
+def expand_availability(barber_ids, start_date=None, end_date=None, session=None):
+    session = db.session if session is None else session
+    query = session.query(Availability.barber_id, Availability.date, Availability.start_time,
+                          Availability.end_time).filter(Availability.barber_id.in_(barber_ids))
+    if start_date is not None:
+        query = query.filter(Availability.date >= start_date)
+    if end_date is not None:
+        query = query.filter(Availability.date <= end_date)
+    windows = [AvailabilityWindow(*row) for row in query]
+    windows.extend(expand_availability_rules(barber_ids, start_date, end_date, session))
+    return windows
+
+
+# One barber's day as a bitmap, from the cache or built from its availability and Appointment rows. fresh skips
+# the cache, whose copy can be up to SCHEDULE_CACHE_TTL old when another worker changed the day
+def get_day_bitmap(barber_id, day, fresh=False):
+    def load():
+        availabilities = expand_availability([barber_id], day, day)
+        appointments = db.session.query(Appointment.start_time, Appointment.end_time).filter(
+            Appointment.barber_id == barber_id, Appointment.date == day).all()
+        return DayBitmap.from_rows(availabilities, appointments)
+
+    if fresh:
+        return load()
+    return day_bitmaps.get_or_load((barber_id, day), load)
+
+
+# SQL expression for the minutes between two time columns of the same row
+def duration_minutes(start_column, end_column):
+    if db.engine.dialect.name == 'sqlite':
+        return (cast(func.strftime('%s', end_column), Integer) - cast(func.strftime('%s', start_column), Integer)) / 60
+    return cast(func.extract('epoch', end_column - start_column), Integer) / 60
+
+
+# Per-day capacity of a barber between two dates, only for days with an availability window of at least
+# min_duration minutes. Returns {date: (available minutes, booked minutes)}. Stored rows are summed by grouped
+# queries; weekly rules are expanded for the window and added in memory
+def day_capacity_summary(barber_id, start_date, end_date, min_duration=0):
+    rule_capacity = {}
+    for window in expand_availability_rules([barber_id], start_date, end_date):
+        minutes = to_minutes(window.end_time) - to_minutes(window.start_time)
+        longest, total = rule_capacity.get(window.date, (0, 0))
+        rule_capacity[window.date] = (max(longest, minutes), total + minutes)
+    long_rule_days = [day for day, (longest, _) in rule_capacity.items() if longest >= min_duration]
+
+    window = duration_minutes(Availability.start_time, Availability.end_time)
+    available = dict(db.session.query(Availability.date, func.sum(window)).filter(
+        Availability.barber_id == barber_id, Availability.date.between(start_date, end_date)).group_by(
+        Availability.date).having(or_(func.max(window) >= min_duration, Availability.date.in_(long_rule_days))).all())
+    for day in long_rule_days:
+        available[day] = available.get(day, 0) + rule_capacity[day][1]
+    if not available:
+        return {}
+
+    booked = dict(db.session.query(Appointment.date,
+                                   func.sum(duration_minutes(Appointment.start_time, Appointment.end_time))).filter(
+        Appointment.barber_id == barber_id, Appointment.date.between(start_date, end_date)).group_by(
+        Appointment.date).all())
+    return {day: (available_minutes, booked.get(day, 0)) for day, available_minutes in available.items()}
+
+
+# Condition that holds when another appointment of the barber overlaps [start_time, end_time) on that day
+def overlapping_appointment_exists(barber_id, day, start_time, end_time, exclude_appointment_id=None):
+    query = select(Appointment.id).where(Appointment.barber_id == barber_id, Appointment.date == day,
+                                         Appointment.start_time < end_time, Appointment.end_time > start_time)
+    if exclude_appointment_id is not None:
+        query = query.where(Appointment.id != exclude_appointment_id)
+    return exists(query)
+
+
+# Raised when the schedule's write lock could not be taken in time, so whether the slot is free is unknown
+class ScheduleBusy(RuntimeError):
+    pass
+
+
+# True if a database error only means a concurrent writer held the lock (SQLITE_BUSY / SQLITE_LOCKED)
+def is_write_conflict(error):
+    code = getattr(error.orig, 'sqlite_errorcode', None)
+    return code is not None and code & 0xff in (5, 6)
+
+
+# Serialize slot claims for one barber. SQLite already serializes writers on the database lock,
+# other databases take a row lock on the barber so different barbers never wait on each other
+def lock_barber_schedule(barber_id):
+    if db.engine.dialect.name != 'sqlite':
+        db.session.execute(select(Barber.__table__.c.id).where(Barber.__table__.c.id == barber_id).with_for_update())
+
+
+# Insert an appointment only if its slot is still free. The overlap check and the insert are one statement,
+# so two customers posting the same slot can never both succeed. Returns False if the slot was taken, raises
+# ScheduleBusy if the write lock could not be taken
+def claim_appointment_slot(barber_id, customer_id, service_id, customer_name, day, start_time, end_time):
+    claim = select(
+        literal(barber_id, db.Integer), literal(customer_id, db.Integer), literal(service_id, db.Integer),
+        literal(customer_name, db.String), literal(day, db.Date), literal(start_time, db.Time),
+        literal(end_time, db.Time)
+    ).where(~overlapping_appointment_exists(barber_id, day, start_time, end_time))
+    columns = ['barber_id', 'customer_id', 'service_id', 'customer_name', 'date', 'start_time', 'end_time']
+
+    try:
+        lock_barber_schedule(barber_id)
+        result = db.session.execute(insert(Appointment).from_select(columns, claim))
+        if result.rowcount != 1:
+            db.session.rollback()
+            return False
+        appointments_changed(barber_id, day)
+        db.session.commit()
+        return True
+    except OperationalError as e:
+        db.session.rollback()
+        # Waited out the busy timeout for the write lock; the slot itself may well be free
+        if not is_write_conflict(e):
+            raise
+        raise ScheduleBusy(f'schedule of barber {barber_id} is locked') from e
+
+
+# Move an appointment only if the new slot is still free, checked and written in one statement. Returns False if
+# the slot was taken, raises ScheduleBusy if the write lock could not be taken
+def move_appointment_slot(appointment, start_time, end_time):
+    overlap = overlapping_appointment_exists(appointment.barber_id, appointment.date, start_time, end_time,
+                                             exclude_appointment_id=appointment.id)
+    statement = update(Appointment).where(Appointment.id == appointment.id, ~overlap).values(
+        start_time=start_time, end_time=end_time).execution_options(synchronize_session=False)
+
+    try:
+        lock_barber_schedule(appointment.barber_id)
+        result = db.session.execute(statement)
+        if result.rowcount != 1:
+            db.session.rollback()
+            return False
+        appointments_changed(appointment.barber_id, appointment.date)
+        db.session.commit()
+        return True
+    except OperationalError as e:
+        db.session.rollback()
+        if not is_write_conflict(e):
+            raise
+        raise ScheduleBusy(f'schedule of barber {appointment.barber_id} is locked') from e
+
+
+# The server is too busy to do the work now (password hashing pool full, schedule locked): ask the user to retry
+# instead of queueing more work or guessing at the outcome
+def server_busy(reason, template, **context):
+    current_app.logger.warning('Server busy: %s', reason)
+    flash('The server is busy right now. Please try again in a moment.', 'error')
+    return render_template(template, **context), 503, {'Retry-After': '5'}
 
 
 # First page. Create an account
-@app.route('/', methods=['POST', 'GET'])
+@bp.route('/', methods=['POST', 'GET'])
 def index():
     if current_user.is_authenticated:
         if current_user.type == 'customer':
-            return redirect(url_for('customer_home'))
+            return redirect(url_for('main.customer_home'))
         elif current_user.type == 'barber':
-            return redirect(url_for('barber_home'))
+            return redirect(url_for('main.barber_home'))
     if request.method == 'POST':
         first_name = request.form['first_name']
         last_name = request.form['last_name']
@@ -166,13 +762,16 @@ def index():
 
         if existing_user:
             flash('An account with this email already exists.', 'error')
-            return redirect(url_for('index'))
+            return redirect(url_for('main.index'))
 
         if password != confirm_password:
             flash('Passwords do not match', 'error')
-            return redirect(url_for('index'))
+            return redirect(url_for('main.index'))
 
-        hashed_password = generate_password_hash(password, method='pbkdf2:sha256')
+        try:
+            hashed_password = get_password_hasher().hash(password)
+        except HashingBusy:
+            return server_busy(f'password hashing pool full: {get_password_hasher().stats()}', 'index.html')
 
         if user_type == 'customer':
             new_user = Customer(first_name=first_name, last_name=last_name, email=email, password=hashed_password)
@@ -180,84 +779,190 @@ def index():
             new_user = Barber(first_name=first_name, last_name=last_name, email=email, password=hashed_password)
         else:
             flash('Invalid user type selected.', 'error')
-            return redirect(url_for('index'))
+            return redirect(url_for('main.index'))
 
         try:
             db.session.add(new_user)
             db.session.commit()
             flash('Account created successfully. Please sign in.', 'success')
-            return redirect(url_for('signin'))
+            return redirect(url_for('main.signin'))
         except Exception as e:
             db.session.rollback()
             flash(f'There was an issue adding your account: {e}', 'error')
-            return redirect(url_for('index'))
+            return redirect(url_for('main.index'))
     else:
         return render_template('index.html')
 
 
 # Sign in page for both barbers and customers
-@app.route('/signin', methods=['POST', 'GET'])
+@bp.route('/signin', methods=['POST', 'GET'])
 def signin():
     if current_user.is_authenticated:
         if current_user.type == 'customer':
-            return redirect(url_for('customer_home'))
+            return redirect(url_for('main.customer_home'))
         elif current_user.type == 'barber':
-            return redirect(url_for('barber_home'))
+            return redirect(url_for('main.barber_home'))
     if request.method == 'POST':
         email = request.form['email']
         password = request.form['password']
 
         user = User.query.filter_by(email=email).first()
-        if user and check_password_hash(user.password, password):
+        password_hasher = get_password_hasher()
+        try:
+            valid = user is not None and password_hasher.verify(user.password, password)
+        except HashingBusy:
+            return server_busy(f'password hashing pool full: {password_hasher.stats()}', 'signin.html')
+
+        if valid:
+            # Upgrade a hash made with other cost parameters while the password is at hand. If the pool is full
+            # it is upgraded at a later sign-in
+            if password_hasher.needs_rehash(user.password):
+                try:
+                    user.password = password_hasher.hash(password)
+                    db.session.commit()
+                except HashingBusy:
+                    pass
             login_user(user)
             if user.type == 'customer':
-                return redirect(url_for('customer_home'))
+                return redirect(url_for('main.customer_home'))
             elif user.type == 'barber':
-                return redirect(url_for('barber_home'))
+                return redirect(url_for('main.barber_home'))
             else:
                 flash('Invalid user type.', 'error')
-                return redirect(url_for('signin'))
+                return redirect(url_for('main.signin'))
         else:
             flash('Invalid email or password', 'error')
-            return redirect(url_for('signin'))
+            return redirect(url_for('main.signin'))
     else:
         return render_template('signin.html')
 
 
+# Barbershops matching a search on name or address, best match first. Uses the FTS5 index when the database
+# has one, otherwise a LIKE on the name
+def search_barbershops(search_query, limit=None):
+    limit = limit or current_app.config['SHOP_SEARCH_LIMIT']
+    query = match_expression(search_query)
+    if query is None:
+        return []
+
+    if db.engine.dialect.name == 'sqlite':
+        try:
+            return Barbershop.query.from_statement(SEARCH_SQL.bindparams(query=query, limit=limit)).all()
+        except OperationalError:
+            pass
+    return Barbershop.query.filter(Barbershop.name.contains(search_query.strip())).order_by(Barbershop.name) \
+        .limit(limit).all()
+
+
+# Barbershops within a radius of a point, nearest first. Only shops in the grid cells around the point are read
+# and measured, through the geo_cell index
+@bp.route('/api/nearby_barbershops')
+@login_required
+def api_nearby_barbershops():
+    try:
+        latitude, longitude = float(request.args['lat']), float(request.args['lon'])
+        radius = float(request.args.get('radius', current_app.config['NEARBY_RADIUS_KM']))
+        limit = int(request.args.get('limit', current_app.config['NEARBY_LIMIT']))
+    except (KeyError, ValueError):
+        abort(400)
+    if not valid_coordinates(latitude, longitude) or not 0 < radius <= current_app.config['NEARBY_MAX_RADIUS_KM']:
+        abort(400)
+
+    ranges = cell_ranges(latitude, longitude, radius)
+    candidates = Barbershop.query.filter(or_(*(Barbershop.geo_cell.between(first, last) for first, last in ranges)))
+    nearby = []
+    for shop in candidates.all():
+        distance = distance_km(latitude, longitude, shop.latitude, shop.longitude)
+        if distance <= radius:
+            nearby.append((distance, shop.shop_id, shop))
+    nearest = heapq.nsmallest(max(limit, 0), nearby, key=lambda item: item[:2])
+
+    return jsonify([{'shop_id': shop.shop_id, 'name': shop.name, 'address': shop.address,
+                     'distance_km': round(distance, 2)} for distance, _, shop in nearest])
+
+
+# Barbershop names starting with what has been typed so far (or with a word starting with it), for type-ahead
+@bp.route('/api/barbershop_names')
+@login_required
+def api_barbershop_names():
+    try:
+        limit = min(int(request.args.get('limit', current_app.config['AUTOCOMPLETE_LIMIT'])),
+                    current_app.config['AUTOCOMPLETE_MAX_LIMIT'])
+    except ValueError:
+        abort(400)
+
+    if shop_names.age() > current_app.config['AUTOCOMPLETE_REFRESH_SECONDS']:
+        rebuild_shop_names()
+    matches = shop_names.complete(request.args.get('q', ''), max(limit, 0))
+    return jsonify([{'shop_id': shop_id, 'name': name} for shop_id, name in matches])
+
+
 # Customer home page that shows their appointment details and option to book an appointment
-@app.route('/customer_home')
+@bp.route('/customer_home')
 @login_required
 def customer_home():
     if current_user.type != 'customer':
         flash('Access denied.', 'error')
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
 
-    # Query appointments with barber details
-    appointments = db.session.query(Appointment, Barber).join(Barber, Appointment.barber_id == Barber.id).filter(
-        Appointment.customer_id == current_user.id).all()
-
-    return render_template('customer_home.html', appointments=appointments)
+    return render_template('customer_home.html', **customer_appointments(current_user.id, request.args.get('before')))
 
 
 # Variation of customer home page which shows results of barbershops via search bar
-@app.route('/customer_search_barbershop', methods=['GET'])
+@bp.route('/customer_search_barbershop', methods=['GET'])
 @login_required
 def customer_search_barbershop():
     search_query = request.args.get('search')
-    barbershops = Barbershop.query.filter(Barbershop.name.contains(search_query)).all()
-    appointments = db.session.query(Appointment, Barber).join(Barber, Appointment.barber_id == Barber.id).filter(
-        Appointment.customer_id == current_user.id).all()
-    return render_template('customer_home.html', appointments=appointments, barbershops=barbershops)
+    barbershops = search_barbershops(search_query)
+    return render_template('customer_home.html', barbershops=barbershops,
+                           **customer_appointments(current_user.id, request.args.get('before')))
+
+
+# Keyset cursor of a past appointment: its date, start time and id, the sort key of the history list
+def history_cursor(appointment):
+    return f"{appointment.date.isoformat()}_{appointment.start_time.isoformat()}_{appointment.id}"
+
+
+def parse_history_cursor_or_404(cursor):
+    try:
+        date_str, time_str, appointment_id = cursor.split('_')
+        return datetime.strptime(date_str, '%Y-%m-%d').date(), time.fromisoformat(time_str), int(appointment_id)
+    except ValueError:
+        abort(404)
+
+
+# A customer's upcoming appointments, soonest first, then one page of past ones, latest first. Barber and service
+# are loaded in the same query, so a page costs the same however long the history is. `before` is the cursor of
+# the last past appointment already shown; upcoming appointments are only listed on the first page
+def customer_appointments(customer_id, before=None):
+    today = datetime.today().date()
+    page_size = current_app.config['HISTORY_PAGE_SIZE']
+    appointments = Appointment.query.options(joinedload(Appointment.barber), joinedload(Appointment.service)) \
+        .filter(Appointment.customer_id == customer_id)
+
+    upcoming = []
+    past = appointments.filter(Appointment.date < today)
+    if before:
+        past = past.filter(tuple_(Appointment.date, Appointment.start_time, Appointment.id) <
+                           parse_history_cursor_or_404(before))
+    else:
+        upcoming = appointments.filter(Appointment.date >= today) \
+            .order_by(Appointment.date, Appointment.start_time, Appointment.id).all()
+    past = past.order_by(Appointment.date.desc(), Appointment.start_time.desc(), Appointment.id.desc()) \
+        .limit(page_size + 1).all()
+
+    next_cursor = history_cursor(past[page_size - 1]) if len(past) > page_size else None
+    return {'upcoming_appointments': upcoming, 'past_appointments': past[:page_size], 'history_before': next_cursor}
 
 
 # Barber home page
-@app.route('/barber_home')
+@bp.route('/barber_home')
 @login_required
 def barber_home():
     barbershops = []
     search_query = request.args.get('search')
     if search_query and not current_user.shop_id:
-        barbershops = Barbershop.query.filter(Barbershop.name.contains(search_query)).all()
+        barbershops = search_barbershops(search_query)
 
     barbershop = None
     if current_user.shop_id:
@@ -265,23 +970,42 @@ def barber_home():
 
     services = Service.query.filter_by(barber_id=current_user.id).all()
     availabilities = Availability.query.filter_by(barber_id=current_user.id).all()
+    availability_rules = AvailabilityRule.query.filter_by(barber_id=current_user.id).all()
 
     return render_template('barber_home.html', barbershops=barbershops, barbershop=barbershop,
-                           services=services, availabilities=availabilities)
+                           services=services, availabilities=availabilities, availability_rules=availability_rules)
+
+
+# Optional latitude and longitude from a barbershop form: both blank gives (None, None), anything else must be
+# a valid pair of coordinates or ValueError is raised
+def parse_location(form):
+    latitude, longitude = form.get('latitude', '').strip(), form.get('longitude', '').strip()
+    if not latitude and not longitude:
+        return None, None
+    latitude, longitude = float(latitude), float(longitude)
+    if not valid_coordinates(latitude, longitude):
+        raise ValueError('coordinates out of range')
+    return latitude, longitude
 
 
 # Page reached via barber_home. Can create a new barbershop from here
-@app.route('/new_barbershop', methods=['POST'])
+@bp.route('/new_barbershop', methods=['POST'])
 @login_required
 def new_barbershop():
     if current_user.shop_id:
         flash('You cannot create a new barbershop because you are already associated with one.', 'error')
-        return redirect(url_for('barber_home'))
+        return redirect(url_for('main.barber_home'))
 
     name = request.form['name']
     address = request.form['address']
     phone_number = request.form['phone_number']
-    new_shop = Barbershop(name=name, address=address, phone_number=phone_number, creator_id=current_user.id)
+    try:
+        latitude, longitude = parse_location(request.form)
+    except ValueError:
+        flash('Latitude and longitude must be given together, as valid coordinates.', 'error')
+        return redirect(url_for('main.barber_home'))
+    new_shop = Barbershop(name=name, address=address, phone_number=phone_number, creator_id=current_user.id,
+                          latitude=latitude, longitude=longitude)
 
     try:
         db.session.add(new_shop)
@@ -293,43 +1017,49 @@ def new_barbershop():
         db.session.rollback()
         flash(f'There was an issue creating the barbershop: {e}', 'error')
 
-    return redirect(url_for('barber_home'))
+    return redirect(url_for('main.barber_home'))
 
 
 # Update an existing barbershop
-@app.route('/update_barbershop/<int:shop_id>', methods=['GET', 'POST'])
+@bp.route('/update_barbershop/<int:shop_id>', methods=['GET', 'POST'])
 @login_required
 def update_barbershop(shop_id):
     shop = Barbershop.query.get_or_404(shop_id)
     if shop.creator_id != current_user.id:
         flash('You do not have permission to update this barbershop.', 'error')
-        return redirect(url_for('barber_home'))
+        return redirect(url_for('main.barber_home'))
 
     if request.method == 'POST':
         shop.name = request.form['name']
         shop.address = request.form['address']
         shop.phone_number = request.form['phone_number']
+        try:
+            shop.set_location(*parse_location(request.form))
+        except ValueError:
+            db.session.rollback()
+            flash('Latitude and longitude must be given together, as valid coordinates.', 'error')
+            return redirect(url_for('main.update_barbershop', shop_id=shop_id))
 
         try:
             db.session.commit()
             flash('Barbershop updated successfully.', 'success')
-            return redirect(url_for('barber_home'))
+            return redirect(url_for('main.barber_home'))
         except Exception as e:
             db.session.rollback()
             flash(f'There was an issue updating the barbershop: {e}', 'error')
-            return redirect(url_for('update_barbershop', shop_id=shop_id))
+            return redirect(url_for('main.update_barbershop', shop_id=shop_id))
 
     return render_template('update_barbershop.html', shop=shop)
 
 
 # Delete an existing barbershop
-@app.route('/delete_barbershop/<int:shop_id>', methods=['POST'])
+@bp.route('/delete_barbershop/<int:shop_id>', methods=['POST'])
 @login_required
 def delete_barbershop(shop_id):
     shop = Barbershop.query.get_or_404(shop_id)
     if shop.creator_id != current_user.id:
         flash('You do not have permission to delete this barbershop.', 'error')
-        return redirect(url_for('barber_home'))
+        return redirect(url_for('main.barber_home'))
 
     try:
         db.session.delete(shop)
@@ -342,82 +1072,77 @@ def delete_barbershop(shop_id):
         db.session.rollback()
         flash(f'There was an issue deleting the barbershop: {e}', 'error')
 
-    return redirect(url_for('barber_home'))
+    return redirect(url_for('main.barber_home'))
 
 
 # Booking appointment page - generated by ChatGPT
-@app.route('/book_appointment/<int:service_id>', methods=['GET'])
+@bp.route('/book_appointment/<int:service_id>', methods=['GET'])
 @login_required
 def book_appointment(service_id):
     service = Service.query.get_or_404(service_id)
     barber = Barber.query.get(service.barber_id)
-    availabilities = Availability.query.filter_by(barber_id=barber.id).all()
-    available_days = []
+    today = datetime.today().date()
+    horizon = today + timedelta(days=current_app.config['BOOKING_HORIZON_DAYS'])
 
-    for availability in availabilities:
-        availability_duration = (datetime.combine(datetime.min, availability.end_time) -
-                                 datetime.combine(datetime.min, availability.start_time)).seconds // 60
-        if availability_duration >= service.duration:
-            available_days.append(availability.date)
+    # Days up to the horizon with a long enough window and enough unbooked time left for the service
+    capacity = day_capacity_summary(barber.id, today, horizon, min_duration=service.duration)
+    available_days = sorted(day for day, (available_minutes, booked_minutes) in capacity.items()
+                            if available_minutes - booked_minutes >= service.duration)
 
     return render_template('book_appointment.html', service=service, barber=barber, available_days=available_days)
 
 
 # Follow up on book_appointment. Pick a time on barber's schedule - generated by ChatGPT
-@app.route('/choose_time/<int:service_id>/<date>', methods=['GET', 'POST'])
+@bp.route('/choose_time/<int:service_id>/<date>', methods=['GET', 'POST'])
 @login_required
 def choose_time(service_id, date):
     service = Service.query.get_or_404(service_id)
     barber = Barber.query.get(service.barber_id)
-    availabilities = Availability.query.filter_by(barber_id=barber.id, date=date).all()
-    appointments = Appointment.query.filter_by(barber_id=barber.id, date=date).all()
+    day = parse_date_or_404(date)
 
     if request.method == 'POST':
         start_time_str = request.form['start_time']
         start_time = datetime.strptime(start_time_str, '%H:%M').time()
-        end_time = (datetime.combine(datetime.min, start_time) + timedelta(minutes=service.duration)).time()
+        start = to_minutes(start_time)
+        end = start + service.duration
+        # Booking checks the availability in the database, the claim below only rechecks overlaps
+        schedule = get_day_bitmap(barber.id, day, fresh=True)
 
         # Check if the selected time is within the barber's availability
-        is_within_availability = False
-        for availability in availabilities:
-            if start_time >= availability.start_time and end_time <= availability.end_time:
-                is_within_availability = True
-                break
-
-        if not is_within_availability:
+        if not schedule.within_availability(start, end):
             flash('Selected time is not within the barber\'s availability. Please choose another time.', 'error')
             return render_template('choose_time.html', service=service, barber=barber, date=date)
 
         # Check if the selected time overlaps with any existing appointments
-        for appointment in appointments:
-            if not (end_time <= appointment.start_time or start_time >= appointment.end_time):
-                flash('Selected time overlaps with an existing appointment. Please choose another time.', 'error')
-                return render_template('choose_time.html', service=service, barber=barber, date=date)
-
-        # Book the appointment
-        appointment = Appointment(
-            barber_id=barber.id,
-            customer_id=current_user.id,
-            service_id=service.id,
-            customer_name=f"{current_user.first_name} {current_user.last_name}",
-            date=datetime.strptime(date, '%Y-%m-%d').date(),
-            start_time=start_time,
-            end_time=end_time
-        )
-        db.session.add(appointment)
-        db.session.commit()
+        if schedule.overlaps_booking(start, end):
+            flash('Selected time overlaps with an existing appointment. Please choose another time.', 'error')
+            return render_template('choose_time.html', service=service, barber=barber, date=date)
+
+        # Book the appointment, unless a concurrent booking claimed the slot first
+        try:
+            booked = claim_appointment_slot(
+                barber_id=barber.id,
+                customer_id=current_user.id,
+                service_id=service.id,
+                customer_name=f"{current_user.first_name} {current_user.last_name}",
+                day=day,
+                start_time=start_time,
+                end_time=to_time(end)
+            )
+        except ScheduleBusy as e:
+            return server_busy(e, 'choose_time.html', service=service, barber=barber, date=date)
+        if not booked:
+            flash('Selected time overlaps with an existing appointment. Please choose another time.', 'error')
+            return render_template('choose_time.html', service=service, barber=barber, date=date)
+
         flash('Appointment confirmed.', 'success')
-        return redirect(url_for('customer_home'))
+        return redirect(url_for('main.customer_home'))
 
     return render_template('choose_time.html', service=service, barber=barber, date=date)
 
 
-# Used by calendar in choose_time to highlight barber's availability - generated by ChatGPT
-@app.route('/api/availability_and_appointments/<int:barber_id>/<date>')
-@login_required
-def api_availability_and_appointments(barber_id, date):
-    availabilities = Availability.query.filter_by(barber_id=barber_id, date=date).all()
-    appointments = Appointment.query.filter_by(barber_id=barber_id, date=date).all()
+# FullCalendar events for availability windows (green) and appointments (blue)
+def calendar_events(availabilities, appointments):
     events = []
 
     for availability in availabilities:
@@ -436,16 +1161,145 @@ def api_availability_and_appointments(barber_id, date):
             'color': 'blue'
         })
 
-    return jsonify(events)
+    return events
+
+
+# Calendar events of one barber-day, read through `session` (the request's session by default)
+def load_day_events(barber_id, day, session=None):
+    session = db.session if session is None else session
+    availabilities = expand_availability([barber_id], day, day, session)
+    appointments = session.query(Appointment).filter_by(barber_id=barber_id, date=day).all()
+    return calendar_events(availabilities, appointments)
+
+
+# Calendar events of one barber-day, served from day_events until a commit touches that day
+def get_day_events(barber_id, day):
+    return day_events.get_or_load((barber_id, day), lambda: load_day_events(barber_id, day))
+
+
+# Used by calendar in choose_time to highlight barber's availability - generated by ChatGPT
+@bp.route('/api/availability_and_appointments/<int:barber_id>/<date>')
+@login_required
+def api_availability_and_appointments(barber_id, date):
+    day = parse_date_or_404(date)
+    return jsonify(get_day_events(barber_id, day))
+
+
+# Free start times for a service on one day, computed by the slot engine
+@bp.route('/api/free_slots/<int:service_id>/<date>')
+@login_required
+def api_free_slots(service_id, date):
+    service = Service.query.get_or_404(service_id)
+    day = parse_date_or_404(date)
+    schedule = get_day_bitmap(service.barber_id, day)
+    slots = []
+
+    for start in schedule.free_starts(service.duration, step=current_app.config['SLOT_INTERVAL_MINUTES']):
+        slots.append({
+            'start': f"{day}T{to_time(start)}",
+            'end': f"{day}T{to_time(start + service.duration)}"
+        })
+
+    return jsonify(slots)
+
+
+# Earliest free slots across every barber in a shop, for a service name or a duration in minutes.
+# Loads the shop's barbers, availabilities and appointments for the window in a few set-based queries,
+# then merges each barber-day's free slots in time order
+@bp.route('/api/earliest_slots/<int:shop_id>')
+@login_required
+def api_earliest_slots(shop_id):
+    service_name = request.args.get('service')
+    duration = request.args.get('duration', type=int)
+    if not service_name and 'duration' not in request.args:
+        return jsonify({'error': 'Provide a service name or a duration.'}), 400
+    if 'duration' in request.args and (duration is None or duration <= 0):
+        return jsonify({'error': 'Duration must be a positive number of minutes.'}), 400
+
+    # Past days have no bookable slots, so the window starts today at the earliest
+    today = datetime.today().date()
+    try:
+        start_date = max(datetime.strptime(request.args['start'], '%Y-%m-%d').date(), today) \
+            if 'start' in request.args else today
+        end_date = datetime.strptime(request.args['end'], '%Y-%m-%d').date() \
+            if 'end' in request.args else start_date + timedelta(days=current_app.config['SLOT_SEARCH_DAYS'] - 1)
+    except ValueError:
+        return jsonify({'error': 'Dates must be in YYYY-MM-DD format.'}), 400
+    if end_date < start_date:
+        return jsonify({'error': 'End date must not be before the start date or today.'}), 400
+    # Every weekly rule is expanded for every day of the window, so its length is capped
+    max_days = current_app.config['SLOT_SEARCH_MAX_DAYS']
+    if (end_date - start_date).days >= max_days:
+        return jsonify({'error': f'Search at most {max_days} days at a time.'}), 400
+    limit = request.args.get('limit', type=int) if 'limit' in request.args else 10
+    if limit is None or limit < 1:
+        return jsonify({'error': 'Limit must be a positive number.'}), 400
+    limit = min(limit, current_app.config['SLOT_SEARCH_LIMIT'])
+
+    # Barbers in the shop, with the service they offer and its duration
+    if service_name:
+        rows = db.session.query(Barber.id, Barber.first_name, Barber.last_name, Service.id.label('service_id'),
+                                Service.duration).join(Service, Service.barber_id == Barber.id).filter(
+            Barber.shop_id == shop_id, Service.name == service_name).all()
+    else:
+        rows = db.session.query(Barber.id, Barber.first_name, Barber.last_name).filter(
+            Barber.shop_id == shop_id).all()
+    offers = defaultdict(list)
+    for row in rows:
+        offers[row.id].append({
+            'barber_id': row.id,
+            'barber_name': f"{row.first_name} {row.last_name}",
+            'service_id': row.service_id if service_name else None,
+            'duration': row.duration if service_name else duration
+        })
+    if not offers:
+        return jsonify([])
+
+    availabilities = defaultdict(list)
+    for window in expand_availability(list(offers), start_date, end_date):
+        availabilities[window.barber_id, window.date].append(window)
+    appointments = defaultdict(list)
+    for row in db.session.query(Appointment.barber_id, Appointment.date, Appointment.start_time,
+                                Appointment.end_time).filter(Appointment.barber_id.in_(offers),
+                                                             Appointment.date.between(start_date, end_date)):
+        appointments[row.barber_id, row.date].append(row)
+
+    # Slots that have already started today are not offered
+    now = datetime.now()
+    step = current_app.config['SLOT_INTERVAL_MINUTES']
+
+    def barber_day_slots(offer, day, schedule):
+        not_before = to_minutes(now.time()) if day == now.date() else 0
+        for start in schedule.free_starts(offer['duration'], step=step):
+            if start >= not_before:
+                yield day, start, offer['barber_id'], offer
+
+    streams = []
+    for (barber_id, day), rows in availabilities.items():
+        schedule = DaySchedule.from_rows(rows, appointments[barber_id, day])
+        for offer in offers[barber_id]:
+            streams.append(barber_day_slots(offer, day, schedule))
+
+    slots = []
+    for day, start, _, offer in islice(heapq.merge(*streams, key=lambda slot: slot[:3]), limit):
+        slots.append({
+            'barber_id': offer['barber_id'],
+            'barber_name': offer['barber_name'],
+            'service_id': offer['service_id'],
+            'start': f"{day}T{to_time(start)}",
+            'end': f"{day}T{to_time(start + offer['duration'])}"
+        })
+
+    return jsonify(slots)
 
 
 # Barber can join barbershop if he doesn't already have one
-@app.route('/join_barbershop/<int:shop_id>', methods=['POST'])
+@bp.route('/join_barbershop/<int:shop_id>', methods=['POST'])
 @login_required
 def join_barbershop(shop_id):
     if current_user.shop_id:
         flash('You are already associated with a barbershop.', 'error')
-        return redirect(url_for('barber_home'))
+        return redirect(url_for('main.barber_home'))
 
     barbershop = Barbershop.query.get_or_404(shop_id)
     current_user.shop_id = barbershop.shop_id
@@ -457,112 +1311,114 @@ def join_barbershop(shop_id):
         db.session.rollback()
         flash(f'There was an issue joining the barbershop: {e}', 'error')
 
-    return redirect(url_for('barber_home'))
+    return redirect(url_for('main.barber_home'))
 
 
-# Used by calendar in calendar.html. Find barber's availability and apply to calendar - generated by ChatGPT
-@app.route('/api/barber_events')
+# Used by calendar in calendar.html. Find barber's availability and apply to calendar - generated by ChatGPT.
+# Only the visible start/end range is loaded when the calendar sends one
+@bp.route('/api/barber_events')
 @login_required
 def api_barber_events():
     if current_user.type != 'barber':
         return jsonify([])
 
-    availabilities = Availability.query.filter_by(barber_id=current_user.id).all()
-    appointments = Appointment.query.filter_by(barber_id=current_user.id).all()
-    events = []
-
-    for availability in availabilities:
-        events.append({
-            'title': 'Available',
-            'start': f"{availability.date}T{availability.start_time}",
-            'end': f"{availability.date}T{availability.end_time}",
-            'color': 'green'
-        })
-
-    for appointment in appointments:
-        events.append({
-            'title': f"Appointment with {appointment.customer_name}",
-            'start': f"{appointment.date}T{appointment.start_time}",
-            'end': f"{appointment.date}T{appointment.end_time}",
-            'color': 'blue'
-        })
-
-    return jsonify(events)
+    try:
+        start_date, end_date = parse_calendar_range(request.args)
+    except ValueError:
+        return jsonify({'error': 'start and end must be ISO dates.'}), 400
+    return jsonify(barber_calendar_events(current_user.id, start_date, end_date))
+
+
+# Inclusive dates of the range FullCalendar asks for. It sends ISO datetimes, the end being exclusive.
+# Either date may be missing (None)
+def parse_calendar_range(args):
+    start_date = end_date = None
+    if args.get('start'):
+        start_date = datetime.strptime(args['start'][:10], '%Y-%m-%d').date()
+    if args.get('end'):
+        end_date = datetime.strptime(args['end'][:10], '%Y-%m-%d').date() - timedelta(days=1)
+    return start_date, end_date
+
+
+# A barber's availability and appointments between two dates as calendar events, read through `session`
+def barber_calendar_events(barber_id, start_date=None, end_date=None, session=None):
+    session = db.session if session is None else session
+    availabilities = expand_availability([barber_id], start_date, end_date, session)
+    appointments = session.query(Appointment.date, Appointment.start_time, Appointment.end_time,
+                                 Appointment.customer_name).filter(Appointment.barber_id == barber_id)
+    if start_date is not None:
+        appointments = appointments.filter(Appointment.date >= start_date)
+    if end_date is not None:
+        appointments = appointments.filter(Appointment.date <= end_date)
+    return calendar_events(availabilities, appointments.all())
 
 
 # Search result for barbershops made by sole barbers
-@app.route('/search_barbershop', methods=['GET'])
+@bp.route('/search_barbershop', methods=['GET'])
 @login_required
 def search_barbershop():
     if current_user.shop_id:
         flash('You cannot search for a barbershop because you are already associated with one.'
               , 'error')
-        return redirect(url_for('barber_home'))
+        return redirect(url_for('main.barber_home'))
 
     search_query = request.args.get('search')
-    barbershops = Barbershop.query.filter(Barbershop.name.contains(search_query)).all()
+    barbershops = search_barbershops(search_query)
     return render_template('barber_home.html', barbershops=barbershops)
 
 
 # Customer views all barbers in barbershop that's been selected
-@app.route('/view_barbers/<int:shop_id>', methods=['GET'])
+@bp.route('/view_barbers/<int:shop_id>', methods=['GET'])
 @login_required
 def view_barbers(shop_id):
     barbershop = Barbershop.query.get_or_404(shop_id)
     barbers = Barber.query.filter_by(shop_id=shop_id).all()
-    barber_services = {}
 
-    for barber in barbers:
-        services = Service.query.filter_by(barber_id=barber.id).all()
-        barber_services[barber.id] = services
+    # Services of every barber in one query, grouped per barber
+    barber_services = defaultdict(list)
+    if barbers:
+        barber_ids = [barber.id for barber in barbers]
+        for service in Service.query.filter(Service.barber_id.in_(barber_ids)).order_by(Service.id).all():
+            barber_services[service.barber_id].append(service)
 
     return render_template('view_barbers.html', barbershop=barbershop, barbers=barbers,
                            barber_services=barber_services)
 
 
 # Customer can update existing appointment
-@app.route('/update_appointment/<int:appointment_id>', methods=['GET', 'POST'])
+@bp.route('/update_appointment/<int:appointment_id>', methods=['GET', 'POST'])
 @login_required
 def update_appointment(appointment_id):
     appointment = Appointment.query.get_or_404(appointment_id)
     if appointment.customer_id != current_user.id:
         flash('You do not have permission to update this appointment.', 'error')
-        return redirect(url_for('customer_home'))
+        return redirect(url_for('main.customer_home'))
 
     if request.method == 'POST':
         start_time = datetime.strptime(request.form['start_time'], '%H:%M').time()
-        end_time = (datetime.combine(datetime.min, start_time) + timedelta(minutes=appointment.service.duration)).time()
+        start = to_minutes(start_time)
+        end = start + appointment.service.duration
+        schedule = get_day_bitmap(appointment.barber_id, appointment.date, fresh=True).without_booking(
+            to_minutes(appointment.start_time), to_minutes(appointment.end_time))
 
         # Check if the selected time is within the barber's availability
-        availabilities = Availability.query.filter_by(barber_id=appointment.barber_id, date=appointment.date).all()
-        is_within_availability = any(
-            availability.start_time <= start_time and availability.end_time >= end_time
-            for availability in availabilities
-        )
-
-        if not is_within_availability:
+        if not schedule.within_availability(start, end):
             flash('Selected time is not within the barber\'s availability. Please choose another time.', 'error')
             return render_template('update_appointment.html', appointment=appointment)
 
         # Check if the selected time overlaps with any existing appointments
-        existing_appointments = Appointment.query.filter_by(barber_id=appointment.barber_id,
-                                                            date=appointment.date).all()
-        is_time_conflict = any(
-            not (end_time <= existing_appointment.start_time or start_time >= existing_appointment.end_time)
-            for existing_appointment in existing_appointments if existing_appointment.id != appointment_id
-        )
-
-        if is_time_conflict:
+        if schedule.overlaps_booking(start, end):
             flash('Selected time overlaps with an existing appointment. Please choose another time.', 'error')
             return render_template('update_appointment.html', appointment=appointment)
 
-        appointment.start_time = start_time
-        appointment.end_time = end_time
-
         try:
-            db.session.commit()
+            if not move_appointment_slot(appointment, start_time, to_time(end)):
+                flash('Selected time overlaps with an existing appointment. Please choose another time.', 'error')
+                return render_template('update_appointment.html', appointment=appointment)
             flash('Appointment updated successfully.', 'success')
-            return redirect(url_for('customer_home'))
+            return redirect(url_for('main.customer_home'))
+        except ScheduleBusy as e:
+            return server_busy(e, 'update_appointment.html', appointment=appointment)
         except Exception as e:
             db.session.rollback()
             flash(f'There was an issue updating the appointment: {e}', 'error')
@@ -571,37 +1427,38 @@ def update_appointment(appointment_id):
 
 
 # Customer can delete existing appointment
-@app.route('/delete_appointment/<int:appointment_id>', methods=['POST'])
+@bp.route('/delete_appointment/<int:appointment_id>', methods=['POST'])
 @login_required
 def delete_appointment(appointment_id):
     appointment = Appointment.query.get_or_404(appointment_id)
     if appointment.customer_id != current_user.id:
         flash('You do not have permission to delete this appointment.', 'error')
-        return redirect(url_for('customer_home'))
+        return redirect(url_for('main.customer_home'))
 
     try:
         db.session.delete(appointment)
+        appointments_changed(appointment.barber_id, appointment.date)
         db.session.commit()
         flash('Appointment deleted successfully.', 'success')
     except Exception as e:
         db.session.rollback()
         flash(f'There was an issue deleting the appointment: {e}', 'error')
 
-    return redirect(url_for('customer_home'))
+    return redirect(url_for('main.customer_home'))
 
 
 # Barber can leave barbershop (except the creator)
-@app.route('/leave_barbershop/<int:shop_id>', methods=['POST'])
+@bp.route('/leave_barbershop/<int:shop_id>', methods=['POST'])
 @login_required
 def leave_barbershop(shop_id):
     if current_user.shop_id != shop_id:
         flash('You cannot leave a barbershop you are not associated with.', 'error')
-        return redirect(url_for('barber_home'))
+        return redirect(url_for('main.barber_home'))
 
     barbershop = Barbershop.query.get_or_404(shop_id)
     if barbershop.creator_id == current_user.id:
         flash('You cannot leave a barbershop you created. Delete the barbershop instead.', 'error')
-        return redirect(url_for('barber_home'))
+        return redirect(url_for('main.barber_home'))
 
     current_user.shop_id = None
 
@@ -612,45 +1469,48 @@ def leave_barbershop(shop_id):
         db.session.rollback()
         flash(f'There was an issue leaving the barbershop: {e}', 'error')
 
-    return redirect(url_for('barber_home'))
+    return redirect(url_for('main.barber_home'))
 
 
 # Barber can update their service details
-@app.route('/update_service/<int:service_id>', methods=['GET', 'POST'])
+@bp.route('/update_service/<int:service_id>', methods=['GET', 'POST'])
 @login_required
 def update_service(service_id):
     service = Service.query.get_or_404(service_id)
     if service.barber_id != current_user.id:
         flash('You do not have permission to update this service.', 'error')
-        return redirect(url_for('barber_home'))
+        return redirect(url_for('main.barber_home'))
 
     if request.method == 'POST':
         service.name = request.form['name']
         service.duration = request.form['duration']
         service.price = request.form['price']
+        # Calendar feeds show the service name of each appointment
+        schedule_changed(service.barber_id)
 
         try:
             db.session.commit()
             flash('Service updated successfully.', 'success')
-            return redirect(url_for('barber_home'))
+            return redirect(url_for('main.barber_home'))
         except Exception as e:
             db.session.rollback()
             flash(f'There was an issue updating the service: {e}', 'error')
-            return redirect(url_for('update_service', service_id=service_id))
+            return redirect(url_for('main.update_service', service_id=service_id))
 
     return render_template('update_service.html', service=service)
 
 
 # Barber can delete a service
-@app.route('/delete_service/<int:service_id>', methods=['POST'])
+@bp.route('/delete_service/<int:service_id>', methods=['POST'])
 @login_required
 def delete_service(service_id):
     service = Service.query.get_or_404(service_id)
     if service.barber_id != current_user.id:
         flash('You do not have permission to delete this service.', 'error')
-        return redirect(url_for('barber_home'))
+        return redirect(url_for('main.barber_home'))
 
     try:
+        schedule_changed(service.barber_id)
         db.session.delete(service)
         db.session.commit()
         flash('Service deleted successfully.', 'success')
@@ -658,17 +1518,17 @@ def delete_service(service_id):
         db.session.rollback()
         flash(f'There was an issue deleting the service: {e}', 'error')
 
-    return redirect(url_for('barber_home'))
+    return redirect(url_for('main.barber_home'))
 
 
 # Barber can update their availability
-@app.route('/update_availability/<int:availability_id>', methods=['GET', 'POST'])
+@bp.route('/update_availability/<int:availability_id>', methods=['GET', 'POST'])
 @login_required
 def update_availability(availability_id):
     availability = Availability.query.get_or_404(availability_id)
     if availability.barber_id != current_user.id:
         flash('You do not have permission to update this availability.', 'error')
-        return redirect(url_for('barber_home'))
+        return redirect(url_for('main.barber_home'))
 
     if request.method == 'POST':
         try:
@@ -676,57 +1536,171 @@ def update_availability(availability_id):
             start_time_str = request.form['start_time'] + ':00'
             end_time_str = request.form['end_time'] + ':00'
 
+            schedule_changed(availability.barber_id, availability.date)
             availability.date = datetime.strptime(date_str, '%Y-%m-%d').date()
             availability.start_time = datetime.strptime(start_time_str, '%H:%M:%S').time()
             availability.end_time = datetime.strptime(end_time_str, '%H:%M:%S').time()
+            schedule_changed(availability.barber_id, availability.date)
 
             db.session.commit()
             flash('Availability updated successfully.', 'success')
-            return redirect(url_for('barber_home'))
+            return redirect(url_for('main.barber_home'))
         except Exception as e:
             db.session.rollback()
             flash(f'There was an issue updating the availability: {e}', 'error')
-            return redirect(url_for('update_availability', availability_id=availability_id))
+            return redirect(url_for('main.update_availability', availability_id=availability_id))
 
     return render_template('update_availability.html', availability=availability)
 
 
 # Barber can delete availability
-@app.route('/delete_availability/<int:availability_id>', methods=['POST'])
+@bp.route('/delete_availability/<int:availability_id>', methods=['POST'])
 @login_required
 def delete_availability(availability_id):
     availability = Availability.query.get_or_404(availability_id)
     if availability.barber_id != current_user.id:
         flash('You do not have permission to delete this availability.', 'error')
-        return redirect(url_for('barber_home'))
+        return redirect(url_for('main.barber_home'))
 
     try:
         db.session.delete(availability)
+        schedule_changed(availability.barber_id, availability.date)
         db.session.commit()
         flash('Availability deleted successfully.', 'success')
     except Exception as e:
         db.session.rollback()
         flash(f'There was an issue deleting the availability: {e}', 'error')
 
-    return redirect(url_for('barber_home'))
+    return redirect(url_for('main.barber_home'))
+
+
+# Barber can delete a weekly availability rule
+@bp.route('/delete_availability_rule/<int:rule_id>', methods=['POST'])
+@login_required
+def delete_availability_rule(rule_id):
+    rule = AvailabilityRule.query.get_or_404(rule_id)
+    if rule.barber_id != current_user.id:
+        flash('You do not have permission to delete this availability.', 'error')
+        return redirect(url_for('main.barber_home'))
+
+    try:
+        db.session.delete(rule)
+        schedule_changed(rule.barber_id)
+        db.session.commit()
+        flash('Weekly availability deleted successfully.', 'success')
+    except Exception as e:
+        db.session.rollback()
+        flash(f'There was an issue deleting the weekly availability: {e}', 'error')
+
+    return redirect(url_for('main.barber_home'))
+
+
+# Barber can take one date off a weekly availability rule
+@bp.route('/skip_availability_rule/<int:rule_id>', methods=['POST'])
+@login_required
+def skip_availability_rule(rule_id):
+    rule = AvailabilityRule.query.get_or_404(rule_id)
+    if rule.barber_id != current_user.id:
+        flash('You do not have permission to update this availability.', 'error')
+        return redirect(url_for('main.barber_home'))
+
+    try:
+        date = datetime.strptime(request.form['date'], '%Y-%m-%d').date()
+        db.session.add(AvailabilityException(rule_id=rule.id, date=date))
+        schedule_changed(rule.barber_id, date)
+        db.session.commit()
+        flash('Date removed from weekly availability.', 'success')
+    except Exception as e:
+        db.session.rollback()
+        flash(f'There was an issue updating the weekly availability: {e}', 'error')
+
+    return redirect(url_for('main.barber_home'))
 
 
 # View calendar - generated by ChatGPT
-@app.route('/calendar')
+@bp.route('/calendar')
 @login_required
 def calendar():
-    return render_template('calendar.html')
+    feed_url = None
+    if current_user.type == 'barber':
+        feed_url = url_for('main.calendar_feed', token=calendar_feed_token(current_user.id), _external=True)
+    return render_template('calendar.html', feed_url=feed_url)
+
+
+# Secret token identifying a barber's calendar feed, signed with the app's secret key
+def calendar_feed_token(barber_id):
+    return URLSafeSerializer(current_app.config['SECRET_KEY'], salt='calendar-feed').dumps(barber_id)
+
+
+# iCalendar feed of a barber's availability and appointments for phone calendars, addressed by a token
+# instead of a login. The ETag and Last-Modified come from the barber's schedule stamp, so clients polling
+# every few minutes get a 304 without the schedule being loaded
+@bp.route('/calendar/feed/<token>.ics')
+def calendar_feed(token):
+    try:
+        barber_id = URLSafeSerializer(current_app.config['SECRET_KEY'], salt='calendar-feed').loads(token)
+    except BadSignature:
+        abort(404)
+
+    today = datetime.today().date()
+    start_date = today - timedelta(days=current_app.config['CALENDAR_FEED_PAST_DAYS'])
+    end_date = today + timedelta(days=current_app.config['CALENDAR_FEED_FUTURE_DAYS'])
+    stamp = db.session.get(ScheduleStamp, barber_id)
+    updated_at = stamp.updated_at.replace(microsecond=0, tzinfo=timezone.utc) if stamp else None
+    etag = hashlib.sha1(f"{barber_id}:{stamp.updated_at if stamp else ''}:{start_date}:{end_date}".encode()
+                        ).hexdigest()
+
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains(etag)
+    else:
+        not_modified = updated_at is not None and request.if_modified_since is not None and \
+                       updated_at <= request.if_modified_since
+    if not_modified:
+        response = Response(status=304)
+    else:
+        barber = Barber.query.get_or_404(barber_id)
+        events = []
+        for window in expand_availability([barber_id], start_date, end_date):
+            events.append(CalendarEvent(
+                uid=f"availability-{barber_id}-{window.date}-{window.start_time.strftime('%H%M')}@barberbooking",
+                start=datetime.combine(window.date, window.start_time),
+                end=datetime.combine(window.date, window.end_time),
+                summary='Available',
+                busy=False
+            ))
+        appointments = db.session.query(Appointment.id, Appointment.date, Appointment.start_time,
+                                        Appointment.end_time, Appointment.customer_name, Service.name).join(
+            Service, Appointment.service_id == Service.id).filter(Appointment.barber_id == barber_id,
+                                                                  Appointment.date.between(start_date, end_date))
+        for appointment_id, date, start_time, end_time, customer_name, service_name in appointments:
+            events.append(CalendarEvent(
+                uid=f"appointment-{appointment_id}@barberbooking",
+                start=datetime.combine(date, start_time),
+                end=datetime.combine(date, end_time),
+                summary=f"{service_name} with {customer_name}",
+                busy=True
+            ))
+        events.sort(key=lambda event: (event.start, event.uid))
+        calendar_name = f"{barber.first_name} {barber.last_name} - Barber Booking System"
+        body = render_calendar(calendar_name, events, updated_at or datetime.now(timezone.utc))
+        response = Response(body, mimetype='text/calendar')
+
+    response.set_etag(etag)
+    if updated_at:
+        response.last_modified = updated_at
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 
 # Add availability
-@app.route('/add_availability')
+@bp.route('/add_availability')
 @login_required
 def add_availability():
     return render_template('add_availability.html')
 
 
 # API to save availability. Taken back to barber_home
-@app.route('/save_availability', methods=['POST'])
+@bp.route('/save_availability', methods=['POST'])
 @login_required
 def save_availability():
     date_str = request.form['date']
@@ -738,32 +1712,414 @@ def save_availability():
         start_time = datetime.strptime(start_time_str, '%H:%M').time()
         end_time = datetime.strptime(end_time_str, '%H:%M').time()
 
-        new_availability = Availability(
-            barber_id=current_user.id,
-            date=date,
-            start_time=start_time,
-            end_time=end_time
-        )
+        # A weekly availability is stored once as a rule instead of one row per date
+        if request.form.get('repeat') == 'weekly':
+            until_str = request.form.get('until')
+            rule = AvailabilityRule(
+                barber_id=current_user.id,
+                weekday=date.weekday(),
+                start_time=start_time,
+                end_time=end_time,
+                valid_from=date,
+                valid_until=datetime.strptime(until_str, '%Y-%m-%d').date() if until_str else None
+            )
+            db.session.add(rule)
+            schedule_changed(current_user.id)
+        else:
+            new_availability = Availability(
+                barber_id=current_user.id,
+                date=date,
+                start_time=start_time,
+                end_time=end_time
+            )
+            db.session.add(new_availability)
+            schedule_changed(current_user.id, date)
 
-        db.session.add(new_availability)
         db.session.commit()
         flash('Availability added successfully.', 'success')
     except Exception as e:
         db.session.rollback()
         flash(f'There was an issue adding your availability: {e}', 'error')
 
-    return redirect(url_for('barber_home'))
+    return redirect(url_for('main.barber_home'))
+
+
+# Validate parsed availability rows and insert them in one transaction with a single executemany.
+# allowed_barber_ids limits whose availability may be imported. Returns the number of rows inserted,
+# raises AvailabilityImportError without writing anything if any row is invalid
+def import_availability(rows, allowed_barber_ids=None):
+    if not rows:
+        return 0
+
+    emails = {row['barber_email'] for row in rows if 'barber_email' in row}
+    ids_by_email = dict(db.session.query(Barber.email, Barber.id).filter(Barber.email.in_(emails))) if emails else {}
+    errors = []
+    for number, row in enumerate(rows, start=1):
+        if 'barber_email' in row:
+            row['barber_id'] = ids_by_email.get(row.pop('barber_email'))
+            if row['barber_id'] is None:
+                errors.append(f'record {number}: unknown barber email')
+
+    barber_ids = {row['barber_id'] for row in rows if row['barber_id'] is not None}
+    known_ids = {barber_id for barber_id, in db.session.query(Barber.id).filter(Barber.id.in_(barber_ids))}
+    for number, row in enumerate(rows, start=1):
+        if row['barber_id'] is None:
+            continue
+        if row['barber_id'] not in known_ids:
+            errors.append(f"record {number}: unknown barber {row['barber_id']}")
+        elif allowed_barber_ids is not None and row['barber_id'] not in allowed_barber_ids:
+            errors.append(f"record {number}: not allowed to import availability for barber {row['barber_id']}")
+    if errors:
+        raise AvailabilityImportError(errors)
+
+    existing = expand_availability(barber_ids, min(row['date'] for row in rows), max(row['date'] for row in rows))
+    errors = find_overlaps(rows, existing)
+    if errors:
+        raise AvailabilityImportError(errors)
+
+    try:
+        db.session.execute(insert(Availability), rows)
+        for row in rows:
+            schedule_changed(row['barber_id'], row['date'])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return len(rows)
+
+
+# API to import many availabilities at once, as CSV or a JSON list. A barbershop creator can import for every
+# barber in their shop, other barbers only for themselves
+@bp.route('/api/import_availability', methods=['POST'])
+@login_required
+def api_import_availability():
+    if current_user.type != 'barber':
+        return jsonify({'errors': ['Only barbers can import availability.']}), 403
+
+    upload = request.files.get('file')
+    try:
+        text = upload.read().decode('utf-8') if upload else request.get_data(as_text=True)
+    except UnicodeDecodeError:
+        return jsonify({'errors': ['The file must be UTF-8 encoded text.']}), 400
+    filename = upload.filename if upload else ''
+    data_format = 'json' if request.is_json or filename.endswith('.json') else 'csv'
+
+    allowed_barber_ids = {current_user.id}
+    if current_user.shop_id:
+        shop = Barbershop.query.get(current_user.shop_id)
+        if shop.creator_id == current_user.id:
+            allowed_barber_ids = {barber_id for barber_id, in
+                                  db.session.query(Barber.id).filter(Barber.shop_id == shop.shop_id)}
+
+    try:
+        count = import_availability(parse_availability(text, data_format), allowed_barber_ids=allowed_barber_ids)
+    except AvailabilityImportError as e:
+        return jsonify({'errors': e.errors}), 400
+
+    return jsonify({'imported': count})
+
+
+# CLI: flask --app app import-availability schedule.csv
+@bp.cli.command('import-availability')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'data_format', type=click.Choice(['csv', 'json']),
+              help='Defaults to the file extension.')
+def import_availability_command(path, data_format):
+    """Import barber availability from a CSV or JSON file in one transaction."""
+    data_format = data_format or ('json' if path.endswith('.json') else 'csv')
+    with open(path, encoding='utf-8') as file:
+        text = file.read()
+
+    try:
+        count = import_availability(parse_availability(text, data_format))
+    except AvailabilityImportError as e:
+        for error in e.errors:
+            click.echo(error, err=True)
+        raise SystemExit(1)
+
+    click.echo(f'Imported {count} availabilities.')
+
+
+# Create user accounts from parsed rows (see user_import.parse_users). Passwords are hashed across `workers`
+# processes while earlier batches are inserted, and each batch of base and subclass rows is inserted with ORM bulk
+# INSERTs and committed on its own. Emails already registered are errors, or skipped with skip_existing.
+# progress(done, total) is called after each batch. Returns the number of users created
+def import_users(rows, method, batch_size=1000, workers=None, skip_existing=False, progress=None):
+    existing = set()
+    emails = [row['email'] for row in rows]
+    for start in range(0, len(emails), 500):
+        existing.update(db.session.scalars(select(User.email).where(User.email.in_(emails[start:start + 500]))))
+    if existing and not skip_existing:
+        raise UserImportError([f"record {number}: email {row['email']} is already registered"
+                               for number, row in enumerate(rows, start=1) if row['email'] in existing])
+    rows = [row for row in rows if row['email'] not in existing]
+
+    hashes = hash_passwords((row['password'] for row in rows), method, workers)
+    created = 0
+    try:
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            users = defaultdict(list)
+            for row, password_hash in zip(batch, islice(hashes, len(batch))):
+                users[row['user_type']].append({'first_name': row['first_name'], 'last_name': row['last_name'],
+                                                'email': row['email'], 'password': password_hash})
+            try:
+                for model, user_type in ((Barber, 'barber'), (Customer, 'customer')):
+                    if users[user_type]:
+                        db.session.execute(insert(model), users[user_type])
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            created += len(batch)
+            if progress:
+                progress(created, len(rows))
+    finally:
+        hashes.close()
+    return created
+
+
+# CLI: flask --app app import-users users.csv
+@bp.cli.command('import-users')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--batch-size', default=1000, show_default=True, help='Users inserted per transaction.')
+@click.option('--workers', type=int, help='Hashing processes. Defaults to the number of CPUs.')
+@click.option('--skip-existing', is_flag=True, help='Skip emails that are already registered.')
+def import_users_command(path, batch_size, workers, skip_existing):
+    """Create barber and customer accounts from a CSV file."""
+    with open(path, encoding='utf-8') as file:
+        text = file.read()
+
+    started = datetime.now()
+
+    def report(done, total):
+        elapsed = (datetime.now() - started).total_seconds()
+        click.echo(f'{done}/{total} users, {done / elapsed if elapsed else 0:.0f} users/s')
+
+    try:
+        count = import_users(parse_users(text), current_app.config['PASSWORD_HASH_METHOD'], batch_size=batch_size,
+                             workers=workers, skip_existing=skip_existing, progress=report)
+    except UserImportError as e:
+        for error in e.errors:
+            click.echo(error, err=True)
+        raise SystemExit(1)
+
+    elapsed = (datetime.now() - started).total_seconds()
+    click.echo(f'Imported {count} users in {elapsed:.1f}s ({count / elapsed if elapsed else 0:.0f} users/s).')
+
+
+# Sends each appointment's reminder `lead` before it starts. Only reminders due before the end of the loaded window
+# are held, in a TimerQueue, so the work grows with the number of reminders falling due rather than with the
+# appointment table. Booking changes arrive through appointment_change: each poll rereads just the barber-days
+# changed since the last one. The window is reloaded every `reload_interval`, which moves it forward and picks up
+# anything a poll could have missed. `sender` is called with a reminders.Reminder and `now` gives local time
+class ReminderScheduler:
+    def __init__(self, sender, lead, reload_interval, retry_delay, now=datetime.now):
+        self.sender = sender
+        self.lead = lead
+        self.reload_interval = reload_interval
+        self.retry_delay = retry_delay
+        self.now = now
+        self.queue = TimerQueue()
+        self.change_cursor = 0
+        self.window_end = None
+        self.reloaded_at = None
+        self.sent = 0
+        self.failed = 0
+
+    # Reminders not yet sent for appointments starting after now whose reminder falls due before the window ends,
+    # on the given (barber_id, date) days or on every day of the window
+    def load(self, now, days=None):
+        query = db.session.query(Appointment.id, Appointment.barber_id, Appointment.date, Appointment.start_time,
+                                 Appointment.customer_name, User.email).join(User, Appointment.customer_id == User.id)
+        if days is None:
+            rows = query.filter(Appointment.date.between(now.date(), (self.window_end + self.lead).date())).all()
+        else:
+            rows = [row for barber_id, day in days for row in
+                    query.filter(Appointment.barber_id == barber_id, Appointment.date == day)]
+
+        reminders = []
+        for appointment_id, barber_id, day, start_time, customer_name, email in rows:
+            starts_at = datetime.combine(day, start_time)
+            if now < starts_at <= self.window_end + self.lead:
+                reminders.append(Reminder(appointment_id, barber_id, day, starts_at, starts_at - self.lead,
+                                          customer_name, email))
+        if not reminders:
+            return []
+        sent = set(db.session.query(SentReminder.appointment_id, SentReminder.starts_at).filter(
+            SentReminder.appointment_id.in_([reminder.appointment_id for reminder in reminders])))
+        return [reminder for reminder in reminders if (reminder.appointment_id, reminder.starts_at) not in sent]
+
+    def schedule(self, reminder, due):
+        self.queue.push(reminder.appointment_id, due, reminder, group=(reminder.barber_id, reminder.date))
+
+    # Replace everything queued with the reminders of a new window, and drop change rows a day old
+    def reload(self):
+        now = self.now()
+        cursor = db.session.query(func.max(AppointmentChange.id)).scalar() or 0
+        self.window_end = now + 2 * self.reload_interval
+        self.queue.clear()
+        for reminder in self.load(now):
+            self.schedule(reminder, reminder.remind_at)
+        # Changes up to the cursor are in what was just loaded; later ones are applied by the next poll
+        self.change_cursor = cursor
+        self.reloaded_at = now
+        expired = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=1)
+        db.session.query(AppointmentChange).filter(AppointmentChange.id <= cursor,
+                                                   AppointmentChange.changed_at < expired).delete()
+        db.session.commit()
+
+    # Reread the barber-days changed since the last poll. Returns the number of days reread
+    def poll_changes(self):
+        changes = db.session.query(AppointmentChange.id, AppointmentChange.barber_id, AppointmentChange.date).filter(
+            AppointmentChange.id > self.change_cursor).order_by(AppointmentChange.id).all()
+        if not changes:
+            return 0
+        self.change_cursor = changes[-1].id
+        days = {(barber_id, day) for _, barber_id, day in changes}
+        for day in days:
+            self.queue.discard_group(day)
+        for reminder in self.load(self.now(), days):
+            self.schedule(reminder, reminder.remind_at)
+        return len(days)
+
+    # Send a due reminder, unless its appointment was moved or cancelled since the last poll
+    def send(self, reminder):
+        current = db.session.query(Appointment.date, Appointment.start_time).filter(
+            Appointment.id == reminder.appointment_id).first()
+        if current is None or datetime.combine(*current) != reminder.starts_at:
+            return
+        try:
+            self.sender(reminder)
+        except Exception:
+            current_app.logger.exception('Sending the reminder for appointment %s failed', reminder.appointment_id)
+            self.failed += 1
+            retry_at = self.now() + self.retry_delay
+            if retry_at < reminder.starts_at:
+                self.schedule(reminder, retry_at)
+            return
+        db.session.add(SentReminder(reminder.appointment_id, reminder.starts_at,
+                                    datetime.now(timezone.utc).replace(tzinfo=None)))
+        db.session.commit()
+        self.sent += 1
+
+    # Reload when due, otherwise apply booking changes, then send every reminder that has fallen due
+    def run_pending(self):
+        if self.reloaded_at is None or self.now() - self.reloaded_at >= self.reload_interval:
+            self.reload()
+        else:
+            self.poll_changes()
+        for reminder in self.queue.pop_due(self.now()):
+            self.send(reminder)
+        # End the read transaction, so the next run sees other processes' commits
+        db.session.commit()
+
+    # Seconds to sleep before the next run: until the next reminder, at most poll_seconds
+    def seconds_until_next(self, poll_seconds):
+        next_due = self.queue.next_due()
+        if next_due is None:
+            return poll_seconds
+        return min(max((next_due - self.now()).total_seconds(), 0), poll_seconds)
+
+
+# CLI: flask --app app run-reminders
+@bp.cli.command('run-reminders')
+@click.option('--once', is_flag=True, help='Send the reminders due now and exit.')
+def run_reminders_command(once):
+    """Send appointment reminders as they fall due, until interrupted."""
+    config = current_app.config
+    # Without change rows the scheduler would only see bookings at its hourly reload
+    if not config['REMINDERS_ENABLED']:
+        click.echo('Reminders are disabled. Set REMINDERS_ENABLED=1 for the web app and this command.', err=True)
+        raise SystemExit(1)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    scheduler = ReminderScheduler(import_string(config['REMINDER_SENDER']),
+                                  lead=timedelta(hours=config['REMINDER_LEAD_HOURS']),
+                                  reload_interval=timedelta(seconds=config['REMINDER_RELOAD_SECONDS']),
+                                  retry_delay=timedelta(seconds=config['REMINDER_RETRY_SECONDS']))
+    while True:
+        scheduler.run_pending()
+        if once:
+            break
+        sleep(scheduler.seconds_until_next(config['REMINDER_POLL_SECONDS']))
+    click.echo(f'Sent {scheduler.sent} reminders, {scheduler.failed} failed, {len(scheduler.queue)} pending.')
+
+
+# Export appointments for payroll and reconciliation as CSV or NDJSON (?format=csv|ndjson), filtered by
+# shop_id, barber_id and a start/end date. Rows are streamed from a server-side cursor in batches, so memory
+# stays flat however many appointments match. A barbershop creator can export the whole shop, other barbers
+# only their own appointments
+@bp.route('/export/appointments')
+@login_required
+def export_appointments():
+    if current_user.type != 'barber':
+        flash('Access denied.', 'error')
+        return redirect(url_for('main.index'))
+
+    data_format = request.args.get('format', 'csv')
+    if data_format not in ('csv', 'ndjson'):
+        return jsonify({'error': 'Format must be csv or ndjson.'}), 400
+
+    query = select(Appointment.id, Appointment.date, Appointment.start_time, Appointment.end_time,
+                   Appointment.barber_id, (Barber.first_name + ' ' + Barber.last_name).label('barber_name'),
+                   Appointment.customer_id, Appointment.customer_name, Service.name.label('service'),
+                   Service.duration, Service.price).join(Barber, Appointment.barber_id == Barber.id).join(
+        Service, Appointment.service_id == Service.id)
+
+    shop = Barbershop.query.get(current_user.shop_id) if current_user.shop_id else None
+    if shop and shop.creator_id == current_user.id:
+        query = query.where(Barber.shop_id == shop.shop_id)
+    else:
+        query = query.where(Appointment.barber_id == current_user.id)
+    shop_id = request.args.get('shop_id', type=int)
+    if shop_id is not None:
+        query = query.where(Barber.shop_id == shop_id)
+    barber_id = request.args.get('barber_id', type=int)
+    if barber_id is not None:
+        query = query.where(Appointment.barber_id == barber_id)
+    try:
+        if request.args.get('start'):
+            query = query.where(Appointment.date >= datetime.strptime(request.args['start'], '%Y-%m-%d').date())
+        if request.args.get('end'):
+            query = query.where(Appointment.date <= datetime.strptime(request.args['end'], '%Y-%m-%d').date())
+    except ValueError:
+        return jsonify({'error': 'Dates must be in YYYY-MM-DD format.'}), 400
+    query = query.order_by(Appointment.date, Appointment.start_time, Appointment.id).execution_options(
+        yield_per=current_app.config['EXPORT_BATCH_SIZE'])
+
+    columns = ['appointment_id', 'date', 'start_time', 'end_time', 'barber_id', 'barber_name', 'customer_id',
+               'customer_name', 'service', 'duration', 'price']
+
+    def generate():
+        if data_format == 'csv':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+        for partition in db.session.execute(query).partitions():
+            if data_format == 'csv':
+                writer.writerows(partition)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            else:
+                yield ''.join(json.dumps(dict(zip(columns, row)), default=str) + '\n' for row in partition)
+        if data_format == 'csv' and buffer.tell():
+            yield buffer.getvalue()
+
+    mimetype = 'text/csv' if data_format == 'csv' else 'application/x-ndjson'
+    return Response(stream_with_context(generate()), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename=appointments.{data_format}'})
 
 
 # Barber can add service
-@app.route('/add_service')
+@bp.route('/add_service')
 @login_required
 def add_service():
     return render_template('add_service.html')
 
 
 # API to save barber service
-@app.route('/save_service', methods=['POST'])
+@bp.route('/save_service', methods=['POST'])
 @login_required
 def save_service():
     name = request.form['name']
@@ -785,17 +2141,20 @@ def save_service():
         db.session.rollback()
         flash(f'There was an issue adding your service: {e}', 'error')
 
-    return redirect(url_for('barber_home'))
+    return redirect(url_for('main.barber_home'))
 
 
 # Logout
-@app.route('/logout', methods=['POST'])
+@bp.route('/logout', methods=['POST'])
 @login_required
 def logout():
     logout_user()
     flash('You have been logged out successfully.', 'success')
-    return redirect(url_for('signin'))
+    return redirect(url_for('main.signin'))
 
 
 if __name__ == '__main__':
+    app = create_app()
+    with app.app_context():
+        init_db()
     app.run(debug=True)
@@ -0,0 +1,128 @@
+from datetime import datetime
+from urllib.parse import parse_qsl
+
+from asgiref.wsgi import WsgiToAsgi
+from itsdangerous import BadSignature
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from werkzeug.exceptions import HTTPException
+from werkzeug.http import parse_cookie
+
+from app import User, barber_calendar_events, create_app, db, day_events, load_day_events, parse_calendar_range, \
+    user_cache
+from database import async_database_url, install_sqlite_pragmas
+
+
+# ASGI entry point for the Flask app with async versions of the read-only calendar endpoints. Those are answered
+# on the event loop through an async database driver, so one worker serves many calendar polls at once; every
+# other request, and anything the async views do not handle themselves (signed out users, bad dates), goes to the
+# Flask app, which runs on asgiref's thread pool. The JSON returned is the Flask views' own
+class AsyncCalendarApp:
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.wsgi = WsgiToAsgi(flask_app)
+        with flask_app.app_context():
+            url = db.engine.url
+        self.engine = create_async_engine(async_database_url(url), **flask_app.config['SQLALCHEMY_ENGINE_OPTIONS'])
+        install_sqlite_pragmas(self.engine.sync_engine, flask_app.config)
+        self.sessions = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.url_adapter = flask_app.url_map.bind('localhost')
+        self.views = {
+            'main.api_barber_events': self.barber_events,
+            'main.api_availability_and_appointments': self.availability_and_appointments,
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] == 'http' and scope['method'] == 'GET':
+            response = await self.dispatch(scope)
+            if response is not None:
+                await self.send_response(response, send)
+                return
+        await self.wsgi(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    # Response of an async view, or None to hand the request to the Flask app
+    async def dispatch(self, scope):
+        try:
+            endpoint, view_args = self.url_adapter.match(scope['path'], method='GET')
+        except HTTPException:
+            return None
+        view = self.views.get(endpoint)
+        user_id = self.session_user_id(scope)
+        if view is None or user_id is None:
+            return None
+
+        query = dict(parse_qsl(scope['query_string'].decode('latin-1')))
+        # The shared code reads the config through current_app
+        with self.flask_app.app_context():
+            async with self.sessions() as session:
+                user_type = await self.user_type(session, user_id)
+                data = await view(session, user_id, user_type, query, **view_args) if user_type else None
+            return self.flask_app.json.response(data) if data is not None else None
+
+    # Id of the user signed in with Flask-Login, from the signed Flask session cookie
+    def session_user_id(self, scope):
+        headers = dict(scope['headers'])
+        cookies = parse_cookie(headers.get(b'cookie', b'').decode('latin-1'))
+        cookie = cookies.get(self.flask_app.config['SESSION_COOKIE_NAME'])
+        serializer = self.flask_app.session_interface.get_signing_serializer(self.flask_app)
+        if cookie is None or serializer is None:
+            return None
+        try:
+            session = serializer.loads(cookie, max_age=int(self.flask_app.permanent_session_lifetime.total_seconds()))
+        except BadSignature:
+            return None
+        user_id = session.get('_user_id')
+        return int(user_id) if user_id is not None and str(user_id).isdigit() else None
+
+    # Type of a user from user_cache or the database, None if the user no longer exists
+    async def user_type(self, session, user_id):
+        user = user_cache.get(user_id)
+        if user is not None:
+            return user.type
+        return await session.scalar(select(User.type).where(User.id == user_id))
+
+    # Same as the api_barber_events view. A bad range is left to the Flask view, which answers it with a 400
+    async def barber_events(self, session, user_id, user_type, query):
+        try:
+            start_date, end_date = parse_calendar_range(query)
+        except ValueError:
+            return None
+        if user_type != 'barber':
+            return []
+        return await session.run_sync(
+            lambda sync_session: barber_calendar_events(user_id, start_date, end_date, sync_session))
+
+    # Same as the api_availability_and_appointments view, sharing its day_events cache
+    async def availability_and_appointments(self, session, user_id, user_type, query, barber_id, date):
+        try:
+            day = datetime.strptime(date, '%Y-%m-%d').date()
+        except ValueError:
+            return None
+
+        async def load():
+            return await session.run_sync(lambda sync_session: load_day_events(barber_id, day, sync_session))
+
+        return await day_events.get_or_load_async((barber_id, day), load)
+
+    async def send_response(self, response, send):
+        headers = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in response.headers]
+        await send({'type': 'http.response.start', 'status': response.status_code, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': response.get_data()})
+
+
+# ASGI app for the configured database, e.g. `uvicorn --factory asgi:create_asgi_app`
+def create_asgi_app(config=None):
+    return AsyncCalendarApp(create_app(config))
@@ -0,0 +1,82 @@
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+
+
+# Lower-case text without accents, so "cafe" completes "Café"
+def normalize(text):
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+# Keys a name is found under: the whole name, and the rest of it from the start of each later word, so typing
+# "cuts" completes "Sharp Cuts"
+def name_keys(name):
+    normalized = normalize(name).strip()
+    return {normalized[match.start():] for match in re.finditer(r'\w+', normalized)}
+
+
+# Names by prefix, kept as one sorted array of (key, id) pairs. A lookup is a binary search to the first key with
+# the prefix and a scan over the matches that follow, so it costs O(log n + k) however many names there are
+class PrefixIndex:
+    def __init__(self):
+        self._keys = []
+        self._names = {}
+        self._lock = threading.Lock()
+        self.built_at = None
+
+    def __len__(self):
+        return len(self._names)
+
+    # Seconds since the last rebuild
+    def age(self):
+        return time.monotonic() - self.built_at if self.built_at is not None else float('inf')
+
+    # Replace the contents with (id, name) pairs
+    def rebuild(self, items):
+        names = dict(items)
+        keys = sorted((key, item_id) for item_id, name in names.items() for key in name_keys(name))
+        with self._lock:
+            self._names = names
+            self._keys = keys
+            self.built_at = time.monotonic()
+
+    # Add a name, or replace the name stored under item_id
+    def set(self, item_id, name):
+        with self._lock:
+            self._remove(item_id)
+            self._names[item_id] = name
+            for key in name_keys(name):
+                insort(self._keys, (key, item_id))
+
+    def remove(self, item_id):
+        with self._lock:
+            self._remove(item_id)
+
+    def _remove(self, item_id):
+        name = self._names.pop(item_id, None)
+        if name is None:
+            return
+        for key in name_keys(name):
+            index = bisect_left(self._keys, (key, item_id))
+            if index < len(self._keys) and self._keys[index] == (key, item_id):
+                del self._keys[index]
+
+    # Up to `limit` (id, name) pairs with a name or name word starting with prefix, in order of the matched text
+    def complete(self, prefix, limit=10):
+        prefix = normalize(prefix).strip()
+        if not prefix:
+            return []
+        matches = []
+        seen = set()
+        with self._lock:
+            index = bisect_left(self._keys, (prefix,))
+            while index < len(self._keys) and len(matches) < limit and self._keys[index][0].startswith(prefix):
+                item_id = self._keys[index][1]
+                if item_id not in seen:
+                    seen.add(item_id)
+                    matches.append((item_id, self._names[item_id]))
+                index += 1
+        return matches
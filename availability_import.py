@@ -0,0 +1,89 @@
+import csv
+import io
+import json
+from collections import defaultdict
+from datetime import datetime
+
+from slots import to_minutes
+
+
+# Raised with every problem found in an import, so a file can be fixed in one go
+class AvailabilityImportError(ValueError):
+    def __init__(self, errors):
+        super().__init__('; '.join(errors))
+        self.errors = errors
+
+
+def _parse_time(value):
+    for time_format in ('%H:%M', '%H:%M:%S'):
+        try:
+            return datetime.strptime(value.strip(), time_format).time()
+        except ValueError:
+            pass
+    raise ValueError(f"invalid time '{value}'")
+
+
+# Parse CSV text or a JSON list of objects into availability rows. Each record needs date, start_time, end_time
+# and either barber_id or barber_email. Returns dicts with date/time objects; barber_email is kept for lookup
+def parse_availability(text, data_format):
+    if data_format == 'json':
+        try:
+            records = json.loads(text)
+        except ValueError as e:
+            raise AvailabilityImportError([f'invalid JSON: {e}'])
+        if not isinstance(records, list):
+            raise AvailabilityImportError(['JSON must be a list of availability objects'])
+    elif data_format == 'csv':
+        records = list(csv.DictReader(io.StringIO(text)))
+    else:
+        raise AvailabilityImportError([f"unsupported format '{data_format}'"])
+
+    rows = []
+    errors = []
+    for number, record in enumerate(records, start=1):
+        try:
+            row = {
+                'date': datetime.strptime(str(record['date']).strip(), '%Y-%m-%d').date(),
+                'start_time': _parse_time(str(record['start_time'])),
+                'end_time': _parse_time(str(record['end_time'])),
+            }
+            if record.get('barber_id') not in (None, ''):
+                row['barber_id'] = int(record['barber_id'])
+            elif record.get('barber_email'):
+                row['barber_email'] = record['barber_email'].strip()
+            else:
+                raise ValueError('missing barber_id or barber_email')
+            if row['end_time'] <= row['start_time']:
+                raise ValueError('end_time must be after start_time')
+            rows.append(row)
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            errors.append(f'record {number}: {e}')
+
+    if errors:
+        raise AvailabilityImportError(errors)
+    return rows
+
+
+# Overlapping windows for the same barber and date, among the new rows or between a new row and an existing
+# window (anything with barber_id, date, start_time and end_time). Returns error messages
+def find_overlaps(rows, existing=()):
+    windows = defaultdict(list)
+    for row in existing:
+        windows[row.barber_id, row.date].append((to_minutes(row.start_time), to_minutes(row.end_time), None))
+    for number, row in enumerate(rows, start=1):
+        windows[row['barber_id'], row['date']].append(
+            (to_minutes(row['start_time']), to_minutes(row['end_time']), number))
+
+    errors = []
+    for (barber_id, day), day_windows in windows.items():
+        day_windows.sort(key=lambda window: window[:2])
+        furthest_end, furthest_number = None, None
+        for start, end, number in day_windows:
+            # Existing windows overlapping each other are not this import's problem
+            if furthest_end is not None and start < furthest_end and (number or furthest_number):
+                record, other = (number, furthest_number) if number else (furthest_number, None)
+                other = f'record {other}' if other else 'an existing availability'
+                errors.append(f'record {record}: barber {barber_id} on {day} overlaps {other}')
+            if furthest_end is None or end > furthest_end:
+                furthest_end, furthest_number = end, number
+    return errors
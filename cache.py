@@ -0,0 +1,81 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+# Thread-safe in-process cache with LRU eviction past `maxsize` entries and an optional time-to-live in seconds.
+# Every invalidation bumps an epoch, so a value loaded before an invalidation is never stored after it
+class LRUCache:
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    # Cached value for key, or None if missing or expired
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > time.monotonic()):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value, epoch=None):
+        with self._lock:
+            # Skip values loaded before a later invalidation, they may already be stale
+            if epoch is not None and epoch != self._epoch:
+                return
+            expires = time.monotonic() + self.ttl if self.ttl else None
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    # Cached value for key, calling loader() and storing its result on a miss
+    def get_or_load(self, key, loader):
+        value = self.get(key)
+        if value is None:
+            epoch = self._epoch
+            value = loader()
+            self.set(key, value, epoch=epoch)
+        return value
+
+    # get_or_load for a coroutine function loader, e.g. a query on an async session
+    async def get_or_load_async(self, key, loader):
+        value = self.get(key)
+        if value is None:
+            epoch = self._epoch
+            value = await loader()
+            self.set(key, value, epoch=epoch)
+        return value
+
+    def invalidate(self, key):
+        with self._lock:
+            self._epoch += 1
+            self._entries.pop(key, None)
+
+    # Drop every key for which predicate(key) is true
+    def invalidate_matching(self, predicate):
+        with self._lock:
+            self._epoch += 1
+            for key in [key for key in self._entries if predicate(key)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
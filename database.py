@@ -0,0 +1,69 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+SYNCHRONOUS_LEVELS = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+JOURNAL_MODES = ('WAL', 'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'OFF')
+# asyncio driver used for each backend by the async read path (asgi.py)
+ASYNC_DRIVERS = {'sqlite': 'aiosqlite', 'postgresql': 'asyncpg', 'mysql': 'aiomysql'}
+
+
+# Database URL from the environment. Some hosts still hand out postgres://, which SQLAlchemy no longer accepts
+def database_url(environ, default):
+    url = environ.get('DATABASE_URL', default)
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+# The same database as `url` through its asyncio driver, e.g. sqlite+aiosqlite:// for sqlite://
+def async_database_url(url):
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f'No async driver configured for {backend} databases')
+    return url.set(drivername=f'{backend}+{ASYNC_DRIVERS[backend]}')
+
+
+# SQLALCHEMY_ENGINE_OPTIONS for the configured database: a sized, health-checked connection pool for server
+# databases. SQLite keeps SQLAlchemy's default pool and is tuned on connect instead, see install_sqlite_pragmas
+def engine_options(config):
+    if make_url(config['SQLALCHEMY_DATABASE_URI']).get_backend_name() == 'sqlite':
+        return {}
+    return {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': True,
+    }
+
+
+# Set the SQLite pragmas on every new connection: WAL so readers and the writer do not block each other, a busy
+# timeout so a writer waits for the lock instead of failing at once, and the synchronous level and page cache
+# size from the config. In-memory databases have no journal to switch
+def install_sqlite_pragmas(engine, config):
+    if engine.dialect.name != 'sqlite':
+        return
+    synchronous = config['SQLITE_SYNCHRONOUS'].upper()
+    journal_mode = config['SQLITE_JOURNAL_MODE'].upper()
+    if synchronous not in SYNCHRONOUS_LEVELS or journal_mode not in JOURNAL_MODES:
+        raise ValueError(f'Unsupported SQLite synchronous level {synchronous} or journal mode {journal_mode}')
+
+    in_memory = engine.url.database in (None, '', ':memory:')
+    pragmas = [
+        f"PRAGMA busy_timeout = {int(config['SQLITE_BUSY_TIMEOUT_MS'])}",
+        f"PRAGMA synchronous = {synchronous}",
+        # A negative cache_size is in KiB rather than pages
+        f"PRAGMA cache_size = {-int(config['SQLITE_CACHE_SIZE_KB'])}",
+    ]
+    if not in_memory:
+        pragmas.insert(0, f"PRAGMA journal_mode = {journal_mode}")
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
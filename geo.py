@@ -0,0 +1,56 @@
+import math
+
+EARTH_RADIUS_KM = 6371.0
+# Side of a grid cell in degrees (about 5.5 km north to south). Stored cell numbers depend on it
+CELL_DEGREES = 0.05
+LAT_CELLS = round(180 / CELL_DEGREES)
+LON_CELLS = round(360 / CELL_DEGREES)
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+# Great-circle distance in kilometres between two points given in degrees
+def distance_km(lat1, lon1, lat2, lon2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _row(latitude):
+    return min(int((latitude + 90) // CELL_DEGREES), LAT_CELLS - 1)
+
+
+def _column(longitude):
+    return int((longitude + 180) // CELL_DEGREES) % LON_CELLS
+
+
+# Number of the grid cell containing a point. Cells are numbered row by row from the south-west, so the cells of
+# one row between two longitudes are a single range of numbers
+def grid_cell(latitude, longitude):
+    return _row(latitude) * LON_CELLS + _column(longitude)
+
+
+# (first, last) ranges of cell numbers covering every point within radius_km of a point, one or two per row of
+# cells (two where the box crosses the antimeridian)
+def cell_ranges(latitude, longitude, radius_km):
+    lat_delta = radius_km / KM_PER_DEGREE
+    south, north = max(latitude - lat_delta, -90.0), min(latitude + lat_delta, 90.0)
+    # Longitude degrees shrink towards the poles; use the widest span inside the box
+    widest = max(abs(south), abs(north))
+    cos_lat = math.cos(math.radians(widest)) if widest < 90 else 0
+    if cos_lat <= 0 or radius_km / (KM_PER_DEGREE * cos_lat) >= 180:
+        columns = [(0, LON_CELLS - 1)]
+    else:
+        lon_delta = radius_km / (KM_PER_DEGREE * cos_lat)
+        west, east = _column(longitude - lon_delta), _column(longitude + lon_delta)
+        columns = [(west, east)] if west <= east else [(west, LON_CELLS - 1), (0, east)]
+
+    ranges = []
+    for row in range(_row(south), _row(north) + 1):
+        ranges += [(row * LON_CELLS + first, row * LON_CELLS + last) for first, last in columns]
+    return ranges
+
+
+def valid_coordinates(latitude, longitude):
+    return -90 <= latitude <= 90 and -180 <= longitude <= 180
@@ -0,0 +1,50 @@
+from collections import namedtuple
+
+# One calendar entry. start and end are naive local datetimes, written as floating times
+CalendarEvent = namedtuple('CalendarEvent', ['uid', 'start', 'end', 'summary', 'busy'])
+
+
+def _escape(text):
+    return text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+
+# Fold content lines longer than 75 octets, as RFC 5545 requires
+def _fold(line):
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line
+    parts = []
+    while len(encoded) > 75:
+        cut = 75 if not parts else 74
+        # Never split a multi-byte character
+        while cut and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode('utf-8'))
+        encoded = encoded[cut:]
+    parts.append(encoded.decode('utf-8'))
+    return '\r\n '.join(parts)
+
+
+# Render an iCalendar (RFC 5545) document. stamp is the UTC datetime of the last change, used for DTSTAMP
+def render_calendar(name, events, stamp):
+    dtstamp = stamp.strftime('%Y%m%dT%H%M%SZ')
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//Barber Booking System//Calendar Feed//EN',
+        'CALSCALE:GREGORIAN',
+        f'X-WR-CALNAME:{_escape(name)}',
+    ]
+    for event in events:
+        lines += [
+            'BEGIN:VEVENT',
+            f'UID:{event.uid}',
+            f'DTSTAMP:{dtstamp}',
+            f"DTSTART:{event.start.strftime('%Y%m%dT%H%M%S')}",
+            f"DTEND:{event.end.strftime('%Y%m%dT%H%M%S')}",
+            f'SUMMARY:{_escape(event.summary)}',
+            f"TRANSP:{'OPAQUE' if event.busy else 'TRANSPARENT'}",
+            'END:VEVENT',
+        ]
+    lines.append('END:VCALENDAR')
+    return '\r\n'.join(_fold(line) for line in lines) + '\r\n'
@@ -0,0 +1,47 @@
+"""Add indexes for barber-day and customer lookups
+
+Revision ID: 4b7d2e9a1c63
+Revises: cf5cf7f8a154
+Create Date: 2026-10-18 10:12:40.512033
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '4b7d2e9a1c63'
+down_revision = 'cf5cf7f8a154'
+branch_labels = None
+depends_on = None
+
+# (index name, table, columns)
+INDEXES = [
+    ('ix_appointment_barber_id_date', 'appointment', ['barber_id', 'date']),
+    ('ix_appointment_customer_id_date', 'appointment', ['customer_id', 'date']),
+    ('ix_availability_barber_id_date', 'availability', ['barber_id', 'date']),
+    ('ix_availability_rule_barber_id_weekday', 'availability_rule', ['barber_id', 'weekday']),
+    ('ix_availability_exception_rule_id_date', 'availability_exception', ['rule_id', 'date']),
+    ('ix_barber_shop_id', 'barber', ['shop_id']),
+    ('ix_service_barber_id', 'service', ['barber_id']),
+]
+
+
+# Indexes already present, e.g. on a database created by db.create_all() after the models declared them
+def existing_indexes():
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+    return tables, {(table, index['name']) for table in tables for index in inspector.get_indexes(table)}
+
+
+def upgrade():
+    tables, existing = existing_indexes()
+    for name, table, columns in INDEXES:
+        if table in tables and (table, name) not in existing:
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    tables, existing = existing_indexes()
+    for name, table, columns in reversed(INDEXES):
+        if (table, name) in existing:
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,48 @@
+"""Add optional barbershop location and its grid cell index
+
+Revision ID: 9e1f6a3b2d84
+Revises: 4b7d2e9a1c63
+Create Date: 2026-10-18 14:37:05.218764
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '9e1f6a3b2d84'
+down_revision = '4b7d2e9a1c63'
+branch_labels = None
+depends_on = None
+
+COLUMNS = [
+    sa.Column('latitude', sa.Float(), nullable=True),
+    sa.Column('longitude', sa.Float(), nullable=True),
+    sa.Column('geo_cell', sa.Integer(), nullable=True),
+]
+
+
+# Columns already present, e.g. on a database created by db.create_all() after the model declared them
+def existing_columns():
+    return {column['name'] for column in sa.inspect(op.get_bind()).get_columns('barbershop')}
+
+
+def upgrade():
+    existing = existing_columns()
+    with op.batch_alter_table('barbershop') as batch_op:
+        for column in COLUMNS:
+            if column.name not in existing:
+                batch_op.add_column(column.copy())
+    if 'geo_cell' not in existing:
+        op.create_index('ix_barbershop_geo_cell', 'barbershop', ['geo_cell'])
+
+
+def downgrade():
+    existing = existing_columns()
+    if 'geo_cell' in existing:
+        op.drop_index('ix_barbershop_geo_cell', table_name='barbershop')
+    # SQLite drops columns by rebuilding the table, which also drops the search index triggers on it. Run
+    # `flask --app app init-db` afterwards to recreate them
+    with op.batch_alter_table('barbershop') as batch_op:
+        for column in reversed(COLUMNS):
+            if column.name in existing:
+                batch_op.drop_column(column.name)
@@ -0,0 +1,46 @@
+"""Add appointment change and sent reminder tables for the reminder scheduler
+
+Revision ID: c3a8f5d17e42
+Revises: 9e1f6a3b2d84
+Create Date: 2026-10-18 16:41:05.218734
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'c3a8f5d17e42'
+down_revision = '9e1f6a3b2d84'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+    # Skip what a database created by db.create_all() after the models declared it already has
+    if 'appointment_change' not in tables:
+        op.create_table(
+            'appointment_change',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('barber_id', sa.Integer(), nullable=False),
+            sa.Column('date', sa.Date(), nullable=False),
+            sa.Column('changed_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if 'sent_reminder' not in tables:
+        op.create_table(
+            'sent_reminder',
+            sa.Column('appointment_id', sa.Integer(), nullable=False),
+            sa.Column('starts_at', sa.DateTime(), nullable=False),
+            sa.Column('sent_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('appointment_id', 'starts_at')
+        )
+    if 'ix_appointment_date' not in {index['name'] for index in inspector.get_indexes('appointment')}:
+        op.create_index('ix_appointment_date', 'appointment', ['date'])
+
+
+def downgrade():
+    op.drop_index('ix_appointment_date', table_name='appointment')
+    op.drop_table('sent_reminder')
+    op.drop_table('appointment_change')
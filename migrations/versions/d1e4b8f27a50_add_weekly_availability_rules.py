@@ -0,0 +1,60 @@
+"""Add weekly availability rules and their exception dates
+
+Revision ID: d1e4b8f27a50
+Revises: c3a8f5d17e42
+Create Date: 2026-10-18 18:05:42.731906
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'd1e4b8f27a50'
+down_revision = 'c3a8f5d17e42'
+branch_labels = None
+depends_on = None
+
+# (index name, table, columns)
+INDEXES = [
+    ('ix_availability_rule_barber_id_weekday', 'availability_rule', ['barber_id', 'weekday']),
+    ('ix_availability_exception_rule_id_date', 'availability_exception', ['rule_id', 'date']),
+]
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+    # Skip what a database created by db.create_all() after the models declared it already has
+    if 'availability_rule' not in tables:
+        op.create_table(
+            'availability_rule',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('barber_id', sa.Integer(), nullable=False),
+            sa.Column('weekday', sa.Integer(), nullable=False),
+            sa.Column('start_time', sa.Time(), nullable=False),
+            sa.Column('end_time', sa.Time(), nullable=False),
+            sa.Column('valid_from', sa.Date(), nullable=False),
+            sa.Column('valid_until', sa.Date(), nullable=True),
+            sa.ForeignKeyConstraint(['barber_id'], ['barber.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if 'availability_exception' not in tables:
+        op.create_table(
+            'availability_exception',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('rule_id', sa.Integer(), nullable=False),
+            sa.Column('date', sa.Date(), nullable=False),
+            sa.ForeignKeyConstraint(['rule_id'], ['availability_rule.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+    # 4b7d2e9a1c63 skipped these indexes on databases that did not have the tables yet
+    inspector = sa.inspect(op.get_bind())
+    for name, table, columns in INDEXES:
+        if name not in {index['name'] for index in inspector.get_indexes(table)}:
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    op.drop_table('availability_exception')
+    op.drop_table('availability_rule')
@@ -0,0 +1,31 @@
+"""Add schedule stamps for calendar feed revalidation
+
+Revision ID: e6a2c9d14b07
+Revises: d1e4b8f27a50
+Create Date: 2026-10-18 18:32:17.604518
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'e6a2c9d14b07'
+down_revision = 'd1e4b8f27a50'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Skip what a database created by db.create_all() after the model declared it already has
+    if 'schedule_stamp' not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table(
+            'schedule_stamp',
+            sa.Column('barber_id', sa.Integer(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['barber_id'], ['barber.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('barber_id')
+        )
+
+
+def downgrade():
+    op.drop_table('schedule_stamp')
@@ -0,0 +1,28 @@
+"""Widen user.password to fit scrypt hashes
+
+Revision ID: f3b7d0a85c19
+Revises: e6a2c9d14b07
+Create Date: 2026-10-18 19:04:51.380265
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'f3b7d0a85c19'
+down_revision = 'e6a2c9d14b07'
+branch_labels = None
+depends_on = None
+
+
+# werkzeug's scrypt hashes are 162 characters, pbkdf2:sha256 ones about 100
+def upgrade():
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.alter_column('password', existing_type=sa.String(length=100), type_=sa.String(length=255),
+                              existing_nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.alter_column('password', existing_type=sa.String(length=255), type_=sa.String(length=100),
+                              existing_nullable=False)
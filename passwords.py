@@ -0,0 +1,103 @@
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+
+# Raised instead of queueing more work when the pool already has max_pending hashes waiting or running
+class HashingBusy(RuntimeError):
+    pass
+
+
+# What werkzeug writes in front of the salt for a method, with its default cost parameters filled in the way
+# werkzeug fills them: 'pbkdf2:sha256' hashes start with 'pbkdf2:sha256:600000', 'scrypt' ones with
+# 'scrypt:32768:8:1'. Worked out from the method string, since hashing to find out costs as much as a sign-in
+def hash_prefix(method):
+    name, *args = method.split(':')
+    if name == 'pbkdf2' and len(args) < 2:
+        return f"pbkdf2:{args[0] if args else 'sha256'}:{DEFAULT_PBKDF2_ITERATIONS}"
+    if name == 'scrypt' and not args:
+        return 'scrypt:32768:8:1'
+    return method
+
+
+def _timed(function, *args):
+    started = time.perf_counter()
+    return function(*args), started
+
+
+# Password hashing on a small, bounded worker pool, so a burst of sign-ins queues behind a few workers instead of
+# every request thread burning CPU at once. `method` is a werkzeug method string with its cost parameters, e.g.
+# 'pbkdf2:sha256:600000' or 'scrypt:32768:8:1'. werkzeug's PBKDF2 and scrypt release the GIL, so threads hash in
+# parallel; executor='process' moves hashing out of the web process entirely
+class PasswordHasher:
+    def __init__(self, method='pbkdf2:sha256:600000', workers=2, max_pending=64, executor='thread'):
+        self.method = method
+        self.prefix = hash_prefix(method)
+        self.workers = workers
+        self.max_pending = max_pending
+        self.executor = executor
+        self._pool = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.peak_pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.queue_wait = 0.0
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                pool_class = ProcessPoolExecutor if self.executor == 'process' else ThreadPoolExecutor
+                self._pool = pool_class(max_workers=self.workers)
+            return self._pool
+
+    # Run function(*args) on the pool and wait for its result
+    def _run(self, function, *args):
+        pool = self._get_pool()
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise HashingBusy(f'{self.pending} password hashes already pending')
+            self.pending += 1
+            self.peak_pending = max(self.peak_pending, self.pending)
+        submitted = time.perf_counter()
+        try:
+            result, started = pool.submit(_timed, function, *args).result()
+        finally:
+            with self._lock:
+                self.pending -= 1
+        with self._lock:
+            self.completed += 1
+            self.queue_wait += max(started - submitted, 0.0)
+        return result
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, stored_hash, password):
+        return self._run(check_password_hash, stored_hash, password)
+
+    # True if a stored hash was made with another method or other cost parameters than the current ones
+    def needs_rehash(self, stored_hash):
+        return stored_hash.split('$', 1)[0] != self.prefix
+
+    # Queue depth and throughput counters, e.g. for logging or a health check
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'pending': self.pending,
+                'peak_pending': self.peak_pending,
+                'max_pending': self.max_pending,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'average_queue_wait': self.queue_wait / self.completed if self.completed else 0.0,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
@@ -0,0 +1,99 @@
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from blinker import Namespace
+from flask import g, has_app_context, request
+from sqlalchemy import event
+
+_signals = Namespace()
+# Sent once per request with the request's QueryStats, see capture_query_stats
+query_stats_recorded = _signals.signal('query-stats-recorded')
+
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_SPACE = re.compile(r'\s+')
+
+
+# Shape of a statement: literals replaced by ? and IN lists collapsed, so the same query run for different rows
+# gets the same fingerprint
+def statement_fingerprint(statement):
+    fingerprint = _STRING.sub('?', statement)
+    fingerprint = _NUMBER.sub('?', fingerprint)
+    fingerprint = _IN_LIST.sub('(?)', fingerprint)
+    return _SPACE.sub(' ', fingerprint).strip()
+
+
+# SQL statements run while handling one request: how many, how long they took in seconds and how often each
+# statement shape ran
+class QueryStats:
+    def __init__(self, endpoint=None):
+        self.endpoint = endpoint
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def record(self, statement, duration):
+        self.count += 1
+        self.duration += duration
+        self.fingerprints[statement_fingerprint(statement)] += 1
+
+    # Statement shapes run at least `threshold` times, most frequent first: the signature of a query in a loop
+    def repeated(self, threshold):
+        return [(fingerprint, count) for fingerprint, count in self.fingerprints.most_common() if count >= threshold]
+
+
+# Count the statements every request runs on db's engine. Requests over QUERY_BUDGET statements, or running one
+# statement shape QUERY_REPEAT_THRESHOLD times or more, are logged as warnings (either check is off when unset)
+def init_query_stats(app, db):
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info['query_start'].pop()
+        stats = g.get('query_stats') if has_app_context() else None
+        if stats is not None:
+            stats.record(statement, time.perf_counter() - started)
+
+    @event.listens_for(engine, 'handle_error')
+    def drop_timer(context):
+        if context.connection is not None and context.connection.info.get('query_start'):
+            context.connection.info['query_start'].pop()
+
+    @app.before_request
+    def start_query_stats():
+        g.query_stats = QueryStats(request.endpoint)
+
+    @app.teardown_request
+    def report_query_stats(exc):
+        stats = g.pop('query_stats', None)
+        if stats is None:
+            return
+        budget = app.config.get('QUERY_BUDGET')
+        if budget and stats.count > budget:
+            app.logger.warning('%s ran %d SQL statements (budget %d) in %.1f ms', stats.endpoint, stats.count,
+                               budget, stats.duration * 1000)
+        threshold = app.config.get('QUERY_REPEAT_THRESHOLD')
+        for fingerprint, count in stats.repeated(threshold) if threshold else ():
+            app.logger.warning('%s ran the same statement %d times, possible N+1 query: %s', stats.endpoint,
+                               count, fingerprint)
+        query_stats_recorded.send(app, stats=stats)
+
+
+# Collect the QueryStats of every request handled inside the block, e.g. to assert on a route's query count in tests
+@contextmanager
+def capture_query_stats(app):
+    recorded = []
+
+    def collect(sender, stats):
+        recorded.append(stats)
+
+    with query_stats_recorded.connected_to(collect, app):
+        yield recorded
@@ -0,0 +1,27 @@
+from collections import namedtuple
+from datetime import timedelta
+
+WEEKDAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# One concrete availability window, from a stored Availability row or an expanded weekly rule
+AvailabilityWindow = namedtuple('AvailabilityWindow', ['barber_id', 'date', 'start_time', 'end_time'])
+
+
+# Dates from start to end (inclusive) that fall on `weekday` (0 is Monday) between valid_from and valid_until
+def weekly_dates(weekday, valid_from, valid_until, start, end):
+    first = max(start, valid_from)
+    last = min(end, valid_until) if valid_until else end
+    day = first + timedelta(days=(weekday - first.weekday()) % 7)
+    while day <= last:
+        yield day
+        day += timedelta(days=7)
+
+
+# Expand weekly rules into concrete windows between start and end, leaving out the (rule_id, date) pairs skipped
+def expand_weekly_rules(rules, skipped, start, end):
+    windows = []
+    for rule in rules:
+        for day in weekly_dates(rule.weekday, rule.valid_from, rule.valid_until, start, end):
+            if (rule.id, day) not in skipped:
+                windows.append(AvailabilityWindow(rule.barber_id, day, rule.start_time, rule.end_time))
+    return windows
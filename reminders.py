@@ -0,0 +1,83 @@
+import heapq
+import itertools
+import logging
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+# A reminder to send a customer before an appointment. remind_at and starts_at are naive local datetimes
+Reminder = namedtuple('Reminder', ['appointment_id', 'barber_id', 'date', 'starts_at', 'remind_at', 'customer_name',
+                                   'customer_email'])
+
+
+# Timers ordered by due time in a min-heap. Replacing or cancelling a timer leaves its old heap entry in place and
+# skips it when it comes up, so every operation is O(log n) in the number of pending timers. Timers can be
+# cancelled one by one, by key, or as a group
+class TimerQueue:
+    def __init__(self):
+        self._heap = []
+        self._timers = {}
+        self._groups = {}
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self._timers)
+
+    def __contains__(self, key):
+        return key in self._timers
+
+    # Add a timer, or replace the one stored under key
+    def push(self, key, due, item, group=None):
+        self.discard(key)
+        entry = [due, next(self._counter), key, item, group]
+        self._timers[key] = entry
+        if group is not None:
+            self._groups.setdefault(group, set()).add(key)
+        heapq.heappush(self._heap, entry)
+        # Rebuild once cancelled entries outnumber live ones, so the heap stays proportional to the pending timers
+        if len(self._heap) > 2 * len(self._timers) + 64:
+            self._heap = [entry for entry in self._heap if entry[2] is not None]
+            heapq.heapify(self._heap)
+
+    def discard(self, key):
+        entry = self._timers.pop(key, None)
+        if entry is None:
+            return
+        if entry[4] is not None:
+            keys = self._groups[entry[4]]
+            keys.discard(key)
+            if not keys:
+                del self._groups[entry[4]]
+        # Mark the entry cancelled; it is dropped when it reaches the top of the heap
+        entry[2] = None
+
+    def discard_group(self, group):
+        for key in list(self._groups.get(group, ())):
+            self.discard(key)
+
+    def clear(self):
+        self._heap.clear()
+        self._timers.clear()
+        self._groups.clear()
+
+    # Due time of the earliest timer, None if there are none
+    def next_due(self):
+        while self._heap and self._heap[0][2] is None:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    # Remove and return the items of every timer due at or before now, earliest first
+    def pop_due(self, now):
+        items = []
+        while self._heap and (self._heap[0][2] is None or self._heap[0][0] <= now):
+            entry = heapq.heappop(self._heap)
+            if entry[2] is not None:
+                self.discard(entry[2])
+                items.append(entry[3])
+        return items
+
+
+# Default sender: log the reminder. A real deployment points REMINDER_SENDER at a function sending SMS or email
+def log_reminder(reminder):
+    logger.info('Reminder for %s <%s>: appointment at %s', reminder.customer_name, reminder.customer_email,
+                reminder.starts_at)
@@ -0,0 +1,54 @@
+import re
+
+from sqlalchemy import text
+
+# FTS5 index over barbershop name and address. It is an external-content table: the text stays in barbershop,
+# the triggers keep the index in step with every insert, update and delete
+BARBERSHOP_FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS barbershop_fts USING fts5(
+        name, address, content='barbershop', content_rowid='shop_id', tokenize='unicode61 remove_diacritics 2')""",
+    """CREATE TRIGGER IF NOT EXISTS barbershop_fts_ai AFTER INSERT ON barbershop BEGIN
+        INSERT INTO barbershop_fts(rowid, name, address) VALUES (new.shop_id, new.name, new.address);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS barbershop_fts_ad AFTER DELETE ON barbershop BEGIN
+        INSERT INTO barbershop_fts(barbershop_fts, rowid, name, address)
+        VALUES ('delete', old.shop_id, old.name, old.address);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS barbershop_fts_au AFTER UPDATE OF name, address ON barbershop BEGIN
+        INSERT INTO barbershop_fts(barbershop_fts, rowid, name, address)
+        VALUES ('delete', old.shop_id, old.name, old.address);
+        INSERT INTO barbershop_fts(rowid, name, address) VALUES (new.shop_id, new.name, new.address);
+    END""",
+]
+
+# Ranked by BM25 with a match in the name weighted well above one in the address
+SEARCH_SQL = text("""
+    SELECT barbershop.* FROM barbershop_fts JOIN barbershop ON barbershop.shop_id = barbershop_fts.rowid
+    WHERE barbershop_fts MATCH :query
+    ORDER BY bm25(barbershop_fts, 10.0, 1.0), barbershop.shop_id
+    LIMIT :limit
+""")
+
+MAX_QUERY_WORDS = 8
+
+
+# Create the index and its triggers if missing, filling the index from the rows already in barbershop
+def install_barbershop_fts(connection):
+    exists = connection.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'barbershop_fts'")).first()
+    for ddl in BARBERSHOP_FTS_DDL:
+        connection.execute(text(ddl))
+    if not exists:
+        connection.execute(text("INSERT INTO barbershop_fts(barbershop_fts) VALUES ('rebuild')"))
+
+
+def drop_barbershop_fts(connection):
+    connection.execute(text('DROP TABLE IF EXISTS barbershop_fts'))
+
+
+# FTS5 query for what a user typed: every word must match as a word prefix, so partly typed words still find
+# shops. None if there is nothing to search for
+def match_expression(search_query):
+    words = re.findall(r'\w+', search_query or '')[:MAX_QUERY_WORDS]
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
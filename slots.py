@@ -0,0 +1,160 @@
+from bisect import bisect_left, bisect_right
+from datetime import time
+
+MINUTES_PER_DAY = 24 * 60
+
+
+# Minutes after midnight for a time of day
+def to_minutes(value):
+    return value.hour * 60 + value.minute
+
+
+# Time of day for a number of minutes after midnight
+def to_time(minutes):
+    return time(minutes // 60, minutes % 60)
+
+
+# Sort (start, end) minute intervals and merge the ones that overlap or touch
+def merge_intervals(intervals):
+    merged = []
+    for start, end in sorted(intervals):
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+# One barber's day as sorted, merged availability and booked intervals (in minutes after midnight).
+# Slot checks are a binary search over the interval starts instead of a scan over every row.
+class DaySchedule:
+    def __init__(self, availability=(), booked=()):
+        self.availability = merge_intervals(availability)
+        self.booked = merge_intervals(booked)
+        self._availability_starts = [start for start, _ in self.availability]
+        self._booked_starts = [start for start, _ in self.booked]
+
+    # Build from Availability/Appointment rows (anything with start_time and end_time)
+    @classmethod
+    def from_rows(cls, availabilities, appointments):
+        return cls(
+            [(to_minutes(row.start_time), to_minutes(row.end_time)) for row in availabilities],
+            [(to_minutes(row.start_time), to_minutes(row.end_time)) for row in appointments],
+        )
+
+    # True if [start, end) lies inside a single availability window
+    def within_availability(self, start, end):
+        index = bisect_right(self._availability_starts, start) - 1
+        return index >= 0 and end <= self.availability[index][1]
+
+    # True if [start, end) overlaps a booked interval
+    def overlaps_booking(self, start, end):
+        # Booked intervals are merged, so the last one starting before `end` reaches furthest right
+        index = bisect_left(self._booked_starts, end) - 1
+        return index >= 0 and self.booked[index][1] > start
+
+    def is_free(self, start, end):
+        return self.within_availability(start, end) and not self.overlaps_booking(start, end)
+
+    # Yield the free (start, end) gaps in order: availability minus bookings
+    def free_gaps(self):
+        for window_start, window_end in self.availability:
+            cursor = window_start
+            index = max(bisect_right(self._booked_starts, window_start) - 1, 0)
+            while index < len(self.booked) and self.booked[index][0] < window_end:
+                booked_start, booked_end = self.booked[index]
+                if booked_end > cursor:
+                    if booked_start > cursor:
+                        yield cursor, booked_start
+                    cursor = booked_end
+                index += 1
+            if cursor < window_end:
+                yield cursor, window_end
+
+    # Yield every start minute where a service of `duration` minutes fits, stepping by `step` inside each gap
+    def free_starts(self, duration, step=15):
+        for gap_start, gap_end in self.free_gaps():
+            start = gap_start
+            while start + duration <= gap_end:
+                yield start
+                start += step
+
+
+# Bits for minutes [start, end) of the day
+def span_mask(start, end):
+    if end <= start:
+        return 0
+    return ((1 << (end - start)) - 1) << start
+
+
+# One barber's day as two 1440-bit integers: bit m of `available` is set when minute m is inside an availability
+# window, bit m of `booked` when an appointment covers it. Checks are a single mask test and free-slot
+# enumeration is a sliding-window AND over the whole day at once
+class DayBitmap:
+    def __init__(self, availability=(), booked=()):
+        self.available = 0
+        self.booked = 0
+        for start, end in availability:
+            self.available |= span_mask(start, end)
+        for start, end in booked:
+            self.booked |= span_mask(start, end)
+
+    # Build from Availability/Appointment rows (anything with start_time and end_time)
+    @classmethod
+    def from_rows(cls, availabilities, appointments):
+        return cls(
+            [(to_minutes(row.start_time), to_minutes(row.end_time)) for row in availabilities],
+            [(to_minutes(row.start_time), to_minutes(row.end_time)) for row in appointments],
+        )
+
+    # Minutes that are available and not booked
+    @property
+    def free(self):
+        return self.available & ~self.booked
+
+    def within_availability(self, start, end):
+        mask = span_mask(start, end)
+        return end <= MINUTES_PER_DAY and self.available & mask == mask
+
+    def overlaps_booking(self, start, end):
+        return self.booked & span_mask(start, end) != 0
+
+    def is_free(self, start, end):
+        mask = span_mask(start, end)
+        return end <= MINUTES_PER_DAY and self.free & mask == mask
+
+    # Copy of the day with [start, end) no longer booked, e.g. to check where an appointment can move to
+    def without_booking(self, start, end):
+        copy = DayBitmap()
+        copy.available = self.available
+        copy.booked = self.booked & ~span_mask(start, end)
+        return copy
+
+    # Bit m is set when the `duration` minutes starting at m are all free. Each AND with a shifted copy doubles
+    # the run length checked, so this takes O(log duration) big-integer operations
+    def fit_mask(self, duration):
+        fits = self.free
+        width = 1
+        while width * 2 <= duration:
+            fits &= fits >> width
+            width *= 2
+        if width < duration:
+            fits &= fits >> (duration - width)
+        return fits
+
+    # Yield every start minute where a service of `duration` minutes fits, stepping by `step` from the start of
+    # each free gap, in the same order as DaySchedule.free_starts
+    def free_starts(self, duration, step=15):
+        free = self.free
+        gap_starts = free & ~(free << 1)
+        fits = self.fit_mask(duration)
+        while fits:
+            lowest = fits & -fits
+            start = lowest.bit_length() - 1
+            fits ^= lowest
+            gap_start = (gap_starts & ((lowest << 1) - 1)).bit_length() - 1
+            if (start - gap_start) % step == 0:
+                yield start
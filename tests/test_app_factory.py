@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+from sqlalchemy import inspect
+from app import create_app, db, Barbershop
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# Test case to check that importing the app module opens no database
+def test_import_does_no_database_io(tmp_path):
+    path = tmp_path / 'BBS.db'
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{path}')
+    result = subprocess.run([sys.executable, '-c', 'import app'], cwd=ROOT, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert not path.exists()
+
+
+# Test case to check that create_app only connects on first use, and init-db creates the schema
+def test_create_app_and_init_db(tmp_path):
+    path = tmp_path / 'BBS.db'
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}'})
+    assert not path.exists()
+
+    result = app.test_cli_runner().invoke(args=['init-db'])
+    assert result.exit_code == 0, result.output
+    assert 'Database initialised' in result.output
+    with app.app_context():
+        tables = inspect(db.engine).get_table_names()
+        assert {'user', 'barber', 'customer', 'barbershop', 'appointment', 'barbershop_fts'} <= set(tables)
+
+        # Running it again leaves an existing database as it is
+        db.session.add(Barbershop(name="Test Barbershop", address="123 Barber St", phone_number="1234567890",
+                                  creator_id=None))
+        db.session.commit()
+    assert app.test_cli_runner().invoke(args=['init-db']).exit_code == 0
+    with app.app_context():
+        assert Barbershop.query.count() == 1
+        db.drop_all()
+
+
+# Test case to check that apps built with different configs keep separate databases
+def test_apps_are_independent(tmp_path):
+    first = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'first.db'}"})
+    second = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'second.db'}",
+                         'HISTORY_PAGE_SIZE': 3})
+    assert second.config['HISTORY_PAGE_SIZE'] == 3
+    assert first.config['HISTORY_PAGE_SIZE'] == 10
+    with first.app_context():
+        db.create_all()
+    assert (tmp_path / 'first.db').exists()
+    assert not (tmp_path / 'second.db').exists()
+    with first.app_context():
+        db.drop_all()
@@ -0,0 +1,216 @@
+from datetime import datetime, time, timedelta
+import pytest
+from werkzeug.security import generate_password_hash
+from app import create_app, db, Barber, Customer, Barbershop, Service, Availability, Appointment, \
+    AppointmentChange, ReminderScheduler, SentReminder
+from reminders import TimerQueue
+
+app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:', 'REMINDERS_ENABLED': True})
+
+
+# Fixture to configure the test client and in-memory database
+@pytest.fixture
+def client():
+    client = app.test_client()
+
+    with app.app_context():
+        db.create_all()
+        yield client
+        db.drop_all()
+
+
+# Fixture to set up a barber available 9:00-17:00 tomorrow with a 30 minute service, and a signed in customer
+@pytest.fixture
+def setup_database(client):
+    with app.app_context():
+        hashed_password = generate_password_hash("password", method='pbkdf2:sha256')
+        barber = Barber(first_name="Barber", last_name="User", email="barber@example.com", password=hashed_password)
+        customer = Customer(first_name="Customer", last_name="User", email="customer@example.com",
+                            password=hashed_password)
+        db.session.add_all([barber, customer])
+        db.session.commit()
+
+        barbershop = Barbershop(name="Test Barbershop", address="123 Barber St", phone_number="1234567890",
+                                creator_id=barber.id)
+        db.session.add(barbershop)
+        db.session.commit()
+        barber.shop_id = barbershop.shop_id
+        db.session.add(Service(barber_id=barber.id, name="Haircut", duration=30, price=25.0))
+        db.session.add(Availability(barber_id=barber.id, date=datetime.today().date() + timedelta(days=1),
+                                    start_time=time(9, 0), end_time=time(17, 0)))
+        db.session.commit()
+
+        client.post('/signin', data=dict(email="customer@example.com", password="password"), follow_redirects=True)
+        yield db
+
+
+# A clock the test moves by hand
+class Clock:
+    def __init__(self, now):
+        self.current = now
+
+    def __call__(self):
+        return self.current
+
+
+def make_scheduler(clock, sender):
+    return ReminderScheduler(sender, lead=timedelta(hours=2), reload_interval=timedelta(hours=1),
+                             retry_delay=timedelta(minutes=5), now=clock)
+
+
+# Test case for the timer queue: earliest first, replaced and cancelled timers skipped
+def test_timer_queue():
+    queue = TimerQueue()
+    start = datetime(2026, 1, 1, 9, 0)
+    for minutes in (30, 10, 20):
+        queue.push(minutes, start + timedelta(minutes=minutes), f"timer {minutes}", group=minutes % 20)
+    queue.push(30, start + timedelta(minutes=5), "timer 30 moved", group=10)
+    queue.discard(20)
+    assert len(queue) == 2 and 20 not in queue
+    assert queue.next_due() == start + timedelta(minutes=5)
+    assert queue.pop_due(start) == []
+    assert queue.pop_due(start + timedelta(minutes=10)) == ["timer 30 moved", "timer 10"]
+    assert len(queue) == 0 and queue.next_due() is None
+
+    queue.push(1, start, "a", group='day')
+    queue.push(2, start, "b", group='day')
+    queue.push(3, start, "c")
+    queue.discard_group('day')
+    assert queue.pop_due(start) == ["c"]
+
+    # Replacing a timer over and over does not grow the heap without bound
+    for minute in range(1000):
+        queue.push('moving', start + timedelta(minutes=minute), minute)
+    assert len(queue._heap) < 200
+    assert queue.pop_due(start + timedelta(days=1)) == [999]
+
+
+# Test case to check a reminder is sent once when due, and not again after a restart
+def test_reminder_sent_when_due(client, setup_database):
+    service = Service.query.first()
+    tomorrow = datetime.today().date() + timedelta(days=1)
+    client.post(f'/choose_time/{service.id}/{tomorrow}', data=dict(start_time='10:00'), follow_redirects=True)
+    appointment = Appointment.query.first()
+
+    clock = Clock(datetime.combine(tomorrow, time(7, 0)))
+    sent = []
+    scheduler = make_scheduler(clock, sent.append)
+    scheduler.run_pending()
+    assert sent == [] and len(scheduler.queue) == 1
+    assert scheduler.seconds_until_next(30) == 30
+
+    clock.current = datetime.combine(tomorrow, time(7, 59, 50))
+    assert scheduler.seconds_until_next(30) == 10
+    clock.current = datetime.combine(tomorrow, time(8, 0))
+    scheduler.run_pending()
+    assert [(reminder.appointment_id, reminder.customer_email, reminder.starts_at) for reminder in sent] == [
+        (appointment.id, "customer@example.com", datetime.combine(tomorrow, time(10, 0)))]
+    scheduler.run_pending()
+    assert len(sent) == 1 and scheduler.sent == 1
+
+    restarted = make_scheduler(clock, sent.append)
+    restarted.run_pending()
+    assert len(sent) == 1 and len(restarted.queue) == 0
+    assert SentReminder.query.count() == 1
+
+
+# Test case to check that booking, moving and cancelling appointments reach a running scheduler
+def test_reminders_follow_booking_changes(client, setup_database):
+    service = Service.query.first()
+    tomorrow = datetime.today().date() + timedelta(days=1)
+    clock = Clock(datetime.combine(tomorrow, time(7, 0)))
+    sent = []
+    scheduler = make_scheduler(clock, sent.append)
+    scheduler.run_pending()
+    assert len(scheduler.queue) == 0
+
+    # A new booking is written to appointment_change and picked up by the next poll
+    client.post(f'/choose_time/{service.id}/{tomorrow}', data=dict(start_time='10:00'), follow_redirects=True)
+    appointment = Appointment.query.first()
+    assert AppointmentChange.query.count() == 1
+    assert scheduler.poll_changes() == 1
+    assert scheduler.queue.next_due() == datetime.combine(tomorrow, time(8, 0))
+    assert scheduler.poll_changes() == 0
+
+    # Moving it moves its reminder
+    client.post(f'/update_appointment/{appointment.id}', data=dict(start_time='11:00'), follow_redirects=True)
+    clock.current = datetime.combine(tomorrow, time(8, 0))
+    scheduler.run_pending()
+    assert sent == [] and scheduler.queue.next_due() == datetime.combine(tomorrow, time(9, 0))
+
+    # Cancelling it cancels its reminder
+    client.post(f'/delete_appointment/{appointment.id}', follow_redirects=True)
+    scheduler.run_pending()
+    assert len(scheduler.queue) == 0
+    clock.current = datetime.combine(tomorrow, time(9, 0))
+    scheduler.run_pending()
+    assert sent == []
+
+
+# Test case to check a reminder is not sent for an appointment cancelled since the last poll, and that a failed
+# send is retried
+def test_reminder_checked_before_sending_and_retried(client, setup_database):
+    service = Service.query.first()
+    tomorrow = datetime.today().date() + timedelta(days=1)
+    client.post(f'/choose_time/{service.id}/{tomorrow}', data=dict(start_time='10:00'), follow_redirects=True)
+    client.post(f'/choose_time/{service.id}/{tomorrow}', data=dict(start_time='11:00'), follow_redirects=True)
+    first, second = Appointment.query.order_by(Appointment.start_time).all()
+
+    clock = Clock(datetime.combine(tomorrow, time(7, 0)))
+    attempts = []
+
+    def flaky_sender(reminder):
+        attempts.append(reminder.appointment_id)
+        if len(attempts) == 1:
+            raise ConnectionError("SMS gateway down")
+
+    scheduler = ReminderScheduler(flaky_sender, lead=timedelta(hours=2), reload_interval=timedelta(hours=3),
+                                  retry_delay=timedelta(minutes=5), now=clock)
+    scheduler.run_pending()
+    assert len(scheduler.queue) == 2
+
+    # Deleted behind the scheduler's back, without an appointment_change row
+    db.session.delete(second)
+    db.session.commit()
+    clock.current = datetime.combine(tomorrow, time(9, 0))
+    scheduler.run_pending()
+    assert attempts == [first.id] and scheduler.failed == 1
+    assert scheduler.queue.next_due() == datetime.combine(tomorrow, time(9, 5))
+
+    clock.current = datetime.combine(tomorrow, time(9, 5))
+    scheduler.run_pending()
+    assert attempts == [first.id, first.id] and scheduler.sent == 1
+
+
+# Test case for the CLI runner with the default logging sender
+def test_run_reminders_command(client, setup_database):
+    service = Service.query.first()
+    day = datetime.today().date() + timedelta(days=1)
+    client.post(f'/choose_time/{service.id}/{day}', data=dict(start_time='10:00'), follow_redirects=True)
+
+    # With a 48 hour lead the reminder for tomorrow is already due
+    lead = app.config['REMINDER_LEAD_HOURS']
+    app.config['REMINDER_LEAD_HOURS'] = 48
+    try:
+        result = app.test_cli_runner().invoke(args=['run-reminders', '--once'])
+    finally:
+        app.config['REMINDER_LEAD_HOURS'] = lead
+    assert result.exit_code == 0, result.output
+    assert 'Sent 1 reminders, 0 failed, 0 pending.' in result.output
+    assert SentReminder.query.count() == 1
+
+
+# Test case to check nothing is written to appointment_change, and the scheduler refuses to run, with reminders off
+def test_reminders_disabled(client, setup_database):
+    service = Service.query.first()
+    day = datetime.today().date() + timedelta(days=1)
+    app.config['REMINDERS_ENABLED'] = False
+    try:
+        client.post(f'/choose_time/{service.id}/{day}', data=dict(start_time='10:00'), follow_redirects=True)
+        result = app.test_cli_runner().invoke(args=['run-reminders', '--once'])
+    finally:
+        app.config['REMINDERS_ENABLED'] = True
+    assert Appointment.query.count() == 1
+    assert AppointmentChange.query.count() == 0
+    assert result.exit_code == 1
+    assert 'Reminders are disabled' in result.output
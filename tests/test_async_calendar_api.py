@@ -0,0 +1,163 @@
+import asyncio
+import json
+import os
+import tempfile
+from datetime import datetime, time, timedelta
+import pytest
+from werkzeug.security import generate_password_hash
+from app import create_app, db, Barber, Customer, Barbershop, Service, Availability, AvailabilityRule, Appointment, \
+    day_events
+
+pytest.importorskip('aiosqlite')
+pytest.importorskip('asgiref')
+from asgi import AsyncCalendarApp
+
+# A database file, which the async engine opens through its own connections
+app = create_app({'TESTING': True,
+                  'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'BBS.db')})
+
+
+# Fixture to configure the test client and database file
+@pytest.fixture
+def client():
+    client = app.test_client()
+
+    with app.app_context():
+        db.create_all()
+        yield client
+        db.drop_all()
+
+
+# Fixture to set up a barber with availability, a weekly rule and an appointment tomorrow, and a customer
+@pytest.fixture
+def setup_database():
+    with app.app_context():
+        hashed_password = generate_password_hash("password", method='pbkdf2:sha256')
+        barber = Barber(first_name="Barber", last_name="User", email="barber@example.com", password=hashed_password)
+        customer = Customer(first_name="Customer", last_name="User", email="customer@example.com",
+                            password=hashed_password)
+        db.session.add_all([barber, customer])
+        db.session.commit()
+
+        barbershop = Barbershop(name="Test Barbershop", address="123 Barber St", phone_number="1234567890",
+                                creator_id=barber.id)
+        db.session.add(barbershop)
+        db.session.commit()
+        barber.shop_id = barbershop.shop_id
+        service = Service(barber_id=barber.id, name="Haircut", duration=30, price=25.0)
+        db.session.add(service)
+        db.session.commit()
+
+        tomorrow = datetime.today().date() + timedelta(days=1)
+        db.session.add_all([
+            Availability(barber_id=barber.id, date=tomorrow, start_time=time(9, 0), end_time=time(12, 0)),
+            AvailabilityRule(barber_id=barber.id, weekday=tomorrow.weekday(), start_time=time(14, 0),
+                             end_time=time(16, 0), valid_from=tomorrow),
+            Appointment(barber_id=barber.id, customer_id=customer.id, service_id=service.id,
+                        customer_name="Customer User", date=tomorrow, start_time=time(10, 0),
+                        end_time=time(10, 30)),
+        ])
+        db.session.commit()
+
+        yield db
+
+
+# Run GET requests through the ASGI app at once, returning (status, headers, body) for each
+def asgi_get(asgi_app, paths, cookie=None):
+    async def get(path):
+        path, _, query_string = path.partition('?')
+        headers = [(b'cookie', f'session={cookie}'.encode())] if cookie else []
+        scope = {'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+                 'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'root_path': '',
+                 'query_string': query_string.encode(), 'headers': headers, 'server': ('localhost', 80),
+                 'client': ('127.0.0.1', 1234)}
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        await asgi_app(scope, receive, send)
+        start = messages[0]
+        body = b''.join(message.get('body', b'') for message in messages[1:])
+        return start['status'], dict(start['headers']), body
+
+    async def run():
+        try:
+            return await asyncio.gather(*(get(path) for path in paths))
+        finally:
+            await asgi_app.engine.dispose()
+
+    return asyncio.run(run())
+
+
+def sign_in(client, email):
+    client.post('/signin', data=dict(email=email, password="password"), follow_redirects=True)
+    return client.get_cookie('session').value
+
+
+# Test case to check the async views return exactly what the Flask views return
+def test_async_views_match_flask_views(client, setup_database):
+    barber = Barber.query.filter_by(email="barber@example.com").first()
+    tomorrow = datetime.today().date() + timedelta(days=1)
+    paths = [f'/api/barber_events?start={tomorrow}T00:00:00&end={tomorrow + timedelta(days=7)}T00:00:00',
+             '/api/barber_events',
+             f'/api/availability_and_appointments/{barber.id}/{tomorrow}']
+
+    cookie = sign_in(client, "barber@example.com")
+    expected = [client.get(path).get_data() for path in paths]
+    day_events.clear()
+    responses = asgi_get(AsyncCalendarApp(app), paths, cookie)
+    assert [status for status, _, _ in responses] == [200, 200, 200]
+    assert [body for _, _, body in responses] == expected
+    assert responses[0][1][b'content-type'] == b'application/json'
+    titles = [event['title'] for event in json.loads(responses[0][2])]
+    assert titles.count("Available") == 2 and "Appointment with Customer User" in titles
+
+    # The async view filled the cache shared with the Flask view
+    assert (barber.id, tomorrow) in day_events
+
+
+# Test case to check many concurrent calendar polls on one event loop, and that bookings show up in them
+def test_async_concurrent_polls(client, setup_database):
+    barber = Barber.query.filter_by(email="barber@example.com").first()
+    tomorrow = datetime.today().date() + timedelta(days=1)
+    path = f'/api/availability_and_appointments/{barber.id}/{tomorrow}'
+    cookie = sign_in(client, "customer@example.com")
+
+    responses = asgi_get(AsyncCalendarApp(app), [path] * 50, cookie)
+    assert {status for status, _, _ in responses} == {200}
+    assert len({body for _, _, body in responses}) == 1
+
+    service = Service.query.filter_by(barber_id=barber.id).first()
+    client.post(f'/choose_time/{service.id}/{tomorrow}', data=dict(start_time='11:00'), follow_redirects=True)
+    status, _, body = asgi_get(AsyncCalendarApp(app), [path], cookie)[0]
+    assert status == 200
+    assert len([event for event in json.loads(body) if event['title'].startswith("Appointment")]) == 2
+
+    # A customer's barber_events is empty, as in the Flask view
+    assert asgi_get(AsyncCalendarApp(app), ['/api/barber_events'], cookie)[0][2] == b'[]\n'
+
+
+# Test case to check that requests the async views do not handle are answered by the Flask app
+def test_async_app_falls_back_to_flask(client, setup_database):
+    barber = Barber.query.filter_by(email="barber@example.com").first()
+    tomorrow = datetime.today().date() + timedelta(days=1)
+    asgi_app = AsyncCalendarApp(app)
+
+    # Signed out, or with a forged cookie: Flask-Login redirects to sign in
+    for cookie in (None, 'forged'):
+        status, headers, _ = asgi_get(asgi_app, [f'/api/availability_and_appointments/{barber.id}/{tomorrow}'],
+                                      cookie)[0]
+        assert status == 302
+        assert b'/signin' in headers[b'location']
+
+    cookie = sign_in(client, "barber@example.com")
+    statuses = [status for status, _, _ in asgi_get(asgi_app, [
+        f'/api/availability_and_appointments/{barber.id}/not-a-date',
+        '/api/barber_events?start=not-a-date',
+        '/barber_home',
+    ], cookie)]
+    assert statuses == [404, 400, 200]
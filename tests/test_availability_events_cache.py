@@ -0,0 +1,102 @@
+from datetime import datetime, time, timedelta
+import pytest
+from werkzeug.security import generate_password_hash
+from app import create_app, db, Barber, Customer, Barbershop, Service, Availability, Appointment, day_events
+
+app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+
+
+# Fixture to configure the test client and in-memory database
+@pytest.fixture
+def client():
+    client = app.test_client()
+
+    with app.app_context():
+        db.create_all()
+        yield client
+        db.drop_all()
+
+
+# Fixture to set up a barber available 9:00-10:00 tomorrow with a 30 minute service, and a customer
+@pytest.fixture
+def setup_database():
+    with app.app_context():
+        hashed_password = generate_password_hash("password", method='pbkdf2:sha256')
+        barber = Barber(first_name="Barber", last_name="User", email="barber@example.com", password=hashed_password)
+        customer = Customer(first_name="Customer", last_name="User", email="customer@example.com",
+                            password=hashed_password)
+        db.session.add_all([barber, customer])
+        db.session.commit()
+
+        barbershop = Barbershop(name="Test Barbershop", address="123 Barber St", phone_number="1234567890",
+                                creator_id=barber.id)
+        db.session.add(barbershop)
+        db.session.commit()
+
+        barber.shop_id = barbershop.shop_id
+        db.session.add(Service(barber_id=barber.id, name="Haircut", duration=30, price=25.0))
+        db.session.add(Availability(barber_id=barber.id, date=datetime.today().date() + timedelta(days=1),
+                                    start_time=time(9, 0), end_time=time(10, 0)))
+        db.session.commit()
+
+        yield db
+
+
+def event_times(client, barber_id, day):
+    response = client.get(f'/api/availability_and_appointments/{barber_id}/{day}')
+    assert response.status_code == 200
+    return sorted((event['title'], event['start'][11:16], event['end'][11:16]) for event in response.get_json())
+
+
+# Test case to serve repeated calendar requests from the cache and drop a barber-day whenever it changes
+def test_availability_events_cache(client, setup_database):
+    # Sign in as the customer
+    client.post('/signin', data=dict(email="customer@example.com", password="password"), follow_redirects=True)
+
+    barber = Barber.query.filter_by(email="barber@example.com").first()
+    service = Service.query.filter_by(barber_id=barber.id).first()
+    day = datetime.today().date() + timedelta(days=1)
+
+    assert event_times(client, barber.id, day) == [("Available", "09:00", "10:00")]
+    assert (barber.id, day) in day_events
+
+    # A repeated request is a cache hit
+    hits = day_events.hits
+    assert event_times(client, barber.id, day) == [("Available", "09:00", "10:00")]
+    assert day_events.hits > hits
+
+    # Booking drops the cached day
+    client.post(f'/choose_time/{service.id}/{day}', data=dict(start_time="09:00"), follow_redirects=True)
+    assert (barber.id, day) not in day_events
+    assert event_times(client, barber.id, day) == [
+        ("Appointment with Customer User", "09:00", "09:30"), ("Available", "09:00", "10:00")]
+
+    # So does moving the appointment
+    appointment = Appointment.query.filter_by(barber_id=barber.id).first()
+    client.post(f'/update_appointment/{appointment.id}', data=dict(start_time="09:30"), follow_redirects=True)
+    assert (barber.id, day) not in day_events
+    assert event_times(client, barber.id, day) == [
+        ("Appointment with Customer User", "09:30", "10:00"), ("Available", "09:00", "10:00")]
+
+    # And cancelling it
+    client.post(f'/delete_appointment/{appointment.id}', follow_redirects=True)
+    assert (barber.id, day) not in day_events
+    assert event_times(client, barber.id, day) == [("Available", "09:00", "10:00")]
+
+    # Changes to the barber's availability drop it too
+    client.post('/logout')
+    client.post('/signin', data=dict(email="barber@example.com", password="password"), follow_redirects=True)
+    client.post('/save_availability', data=dict(date=day.isoformat(), start_time="11:00", end_time="12:00"),
+                follow_redirects=True)
+    assert (barber.id, day) not in day_events
+    assert event_times(client, barber.id, day) == [("Available", "09:00", "10:00"), ("Available", "11:00", "12:00")]
+
+    availability = Availability.query.filter_by(barber_id=barber.id, start_time=time(11, 0)).first()
+    client.post(f'/update_availability/{availability.id}',
+                data=dict(date=day.isoformat(), start_time="13:00", end_time="14:00"), follow_redirects=True)
+    assert (barber.id, day) not in day_events
+    assert event_times(client, barber.id, day) == [("Available", "09:00", "10:00"), ("Available", "13:00", "14:00")]
+
+    client.post(f'/delete_availability/{availability.id}', follow_redirects=True)
+    assert (barber.id, day) not in day_events
+    assert event_times(client, barber.id, day) == [("Available", "09:00", "10:00")]
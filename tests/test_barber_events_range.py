@@ -0,0 +1,64 @@
+from datetime import datetime, time, timedelta
+import pytest
+from werkzeug.security import generate_password_hash
+from app import create_app, db, Barber, Customer, Service, Availability, Appointment
+
+app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+
+
+# Fixture to configure the test client and in-memory database
+@pytest.fixture
+def client():
+    client = app.test_client()
+
+    with app.app_context():
+        db.create_all()
+        yield client
+        db.drop_all()
+
+
+# Fixture to set up a barber with an availability and an appointment in each of three weeks
+@pytest.fixture
+def setup_database():
+    with app.app_context():
+        monday = datetime.today().date() - timedelta(days=datetime.today().weekday())
+        hashed_password = generate_password_hash("password", method='pbkdf2:sha256')
+        barber = Barber(first_name="Barber", last_name="User", email="barber@example.com", password=hashed_password)
+        customer = Customer(first_name="Customer", last_name="User", email="customer@example.com",
+                            password=hashed_password)
+        db.session.add_all([barber, customer])
+        db.session.commit()
+
+        service = Service(barber_id=barber.id, name="Haircut", duration=30, price=25.0)
+        db.session.add(service)
+        db.session.commit()
+
+        for week in (-1, 0, 1):
+            day = monday + timedelta(weeks=week, days=2)
+            db.session.add(Availability(barber_id=barber.id, date=day, start_time=time(9, 0), end_time=time(17, 0)))
+            db.session.add(Appointment(barber_id=barber.id, customer_id=customer.id, service_id=service.id,
+                                       customer_name="Customer User", date=day, start_time=time(10, 0),
+                                       end_time=time(10, 30)))
+        db.session.commit()
+
+        yield db
+
+
+# Test case to only load the week the calendar shows
+def test_barber_events_range(client, setup_database):
+    # Sign in as the barber
+    client.post('/signin', data=dict(email="barber@example.com", password="password"), follow_redirects=True)
+    monday = datetime.today().date() - timedelta(days=datetime.today().weekday())
+    wednesday = monday + timedelta(days=2)
+
+    # The range FullCalendar sends for the current week, with an exclusive end
+    response = client.get('/api/barber_events', query_string={
+        'start': f"{monday}T00:00:00+01:00", 'end': f"{monday + timedelta(days=7)}T00:00:00+01:00"})
+    assert response.status_code == 200
+    events = response.get_json()
+    assert sorted((event['title'], event['start']) for event in events) == [
+        ("Appointment with Customer User", f"{wednesday}T10:00:00"), ("Available", f"{wednesday}T09:00:00")]
+
+    # Without a range every event is returned
+    response = client.get('/api/barber_events')
+    assert len(response.get_json()) == 6
@@ -0,0 +1,89 @@
+import pytest
+from werkzeug.security import generate_password_hash
+from app import create_app, db, Barber, Customer, Barbershop, shop_names
+from autocomplete import PrefixIndex
+
+app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+
+
+# Fixture to configure the test client and in-memory database
+@pytest.fixture
+def client():
+    client = app.test_client()
+
+    with app.app_context():
+        db.create_all()
+        yield client
+        db.drop_all()
+
+
+# Fixture to set up a barber with a barbershop, another barbershop, and a customer
+@pytest.fixture
+def setup_database():
+    with app.app_context():
+        hashed_password = generate_password_hash("password", method='pbkdf2:sha256')
+        barber = Barber(first_name="Barber", last_name="User", email="barber@example.com", password=hashed_password)
+        customer = Customer(first_name="Customer", last_name="User", email="customer@example.com",
+                            password=hashed_password)
+        db.session.add_all([barber, customer])
+        db.session.commit()
+
+        barbershop = Barbershop(name="Sharp Cuts", address="12 Baker Street", phone_number="1234567890",
+                                creator_id=barber.id)
+        db.session.add_all([barbershop, Barbershop(name="Café Crème", address="3 Rue de Paris",
+                                                   phone_number="1234567891", creator_id=None)])
+        db.session.commit()
+        barber.shop_id = barbershop.shop_id
+        db.session.commit()
+
+        yield db
+
+
+# Test case for prefix lookups in the sorted array
+def test_prefix_index():
+    index = PrefixIndex()
+    index.rebuild([(1, "Sharp Cuts"), (2, "Shave & Style"), (3, "Cutting Edge")])
+
+    assert index.complete("sh") == [(1, "Sharp Cuts"), (2, "Shave & Style")]
+    assert index.complete("cut") == [(1, "Sharp Cuts"), (3, "Cutting Edge")]
+    assert index.complete("SHARP c") == [(1, "Sharp Cuts")]
+    assert index.complete("sh", limit=1) == [(1, "Sharp Cuts")]
+    assert index.complete("") == []
+
+    index.set(1, "Blunt Cuts")
+    index.remove(2)
+    assert index.complete("sh") == []
+    assert index.complete("cut") == [(1, "Blunt Cuts"), (3, "Cutting Edge")]
+    assert len(index) == 2
+
+
+# Test case to complete barbershop names and follow shops being created, renamed and deleted
+def test_barbershop_autocomplete(client, setup_database):
+    client.post('/signin', data=dict(email="customer@example.com", password="password"), follow_redirects=True)
+    assert client.get('/api/barbershop_names?q=sha').get_json()[0]['name'] == "Sharp Cuts"
+    assert [shop['name'] for shop in client.get('/api/barbershop_names?q=cafe').get_json()] == ["Café Crème"]
+    assert client.get('/api/barbershop_names?q=sha&limit=x').status_code == 400
+    client.post('/logout')
+
+    # Renaming and deleting take effect as soon as they are committed
+    client.post('/signin', data=dict(email="barber@example.com", password="password"), follow_redirects=True)
+    shop = Barbershop.query.filter_by(name="Sharp Cuts").first()
+    client.post(f'/update_barbershop/{shop.shop_id}',
+                data=dict(name="Fade Factory", address="8 Mill Lane", phone_number="1234567890"),
+                follow_redirects=True)
+    assert client.get('/api/barbershop_names?q=sha').get_json() == []
+    assert client.get('/api/barbershop_names?q=fact').get_json() == [{'shop_id': shop.shop_id,
+                                                                      'name': "Fade Factory"}]
+
+    client.post(f'/delete_barbershop/{shop.shop_id}', follow_redirects=True)
+    assert client.get('/api/barbershop_names?q=fade').get_json() == []
+
+    client.post('/new_barbershop', data=dict(name="New Wave", address="1 Sea Road", phone_number="1234567892"),
+                follow_redirects=True)
+    assert [shop['name'] for shop in client.get('/api/barbershop_names?q=wav').get_json()] == ["New Wave"]
+
+    # A failed transaction leaves the names alone
+    db.session.add(Barbershop(name="Never Saved", address="Nowhere", phone_number="0", creator_id=None))
+    db.session.flush()
+    db.session.rollback()
+    assert shop_names.complete("never") == []
@@ -0,0 +1,80 @@
+import pytest
+from werkzeug.security import generate_password_hash
+from app import create_app, db, Barber, Customer, Barbershop, search_barbershops
+
+app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+
+
+# Fixture to configure the test client and in-memory database
+@pytest.fixture
+def client():
+    client = app.test_client()
+
+    with app.app_context():
+        db.create_all()
+        yield client
+        db.drop_all()
+
+
+# Fixture to set up a few barbershops, one created by the barber, and a customer
+@pytest.fixture
+def setup_database():
+    with app.app_context():
+        hashed_password = generate_password_hash("password", method='pbkdf2:sha256')
+        barber = Barber(first_name="Barber", last_name="User", email="barber@example.com", password=hashed_password)
+        customer = Customer(first_name="Customer", last_name="User", email="customer@example.com",
+                            password=hashed_password)
+        db.session.add_all([barber, customer])
+        db.session.commit()
+
+        db.session.add_all([
+            Barbershop(name="Sharp Cuts", address="12 Baker Street", phone_number="1234567890", creator_id=barber.id),
+            Barbershop(name="Baker's Barbers", address="1 High Street", phone_number="1234567891", creator_id=None),
+            Barbershop(name="Café Crème", address="3 Rue de Paris", phone_number="1234567892", creator_id=None),
+        ])
+        db.session.commit()
+
+        yield db
+
+
+def shop_names(search_query, limit=None):
+    return [shop.name for shop in search_barbershops(search_query, limit)]
+
+
+# Test case for ranked, prefix-aware search over name and address
+def test_barbershop_full_text_search(client, setup_database):
+    # Name matches rank above address matches, and partial words match
+    assert shop_names("bak") == ["Baker's Barbers", "Sharp Cuts"]
+    assert shop_names("high st") == ["Baker's Barbers"]
+    assert shop_names("cafe") == ["Café Crème"]
+    assert shop_names("sharp nowhere") == []
+    assert shop_names("  '\" ") == []
+
+    for number in range(30):
+        db.session.add(Barbershop(name=f"Chain Shop {number}", address="Main Road", phone_number="1", creator_id=None))
+    db.session.commit()
+    assert len(shop_names("chain")) == app.config['SHOP_SEARCH_LIMIT']
+    assert len(shop_names("chain", limit=5)) == 5
+
+    # The customer search page uses it too
+    client.post('/signin', data=dict(email="customer@example.com", password="password"), follow_redirects=True)
+    response = client.get('/customer_search_barbershop?search=baker', follow_redirects=True)
+    assert response.status_code == 200
+    assert b"Sharp Cuts" in response.data
+    assert b"Rue de Paris" not in response.data
+
+
+# Test case to keep the index in step when barbershops are renamed or deleted
+def test_barbershop_search_index_in_sync(client, setup_database):
+    client.post('/signin', data=dict(email="barber@example.com", password="password"), follow_redirects=True)
+    shop = Barbershop.query.filter_by(name="Sharp Cuts").first()
+
+    client.post(f'/update_barbershop/{shop.shop_id}',
+                data=dict(name="Fade Factory", address="8 Mill Lane", phone_number="1234567890"),
+                follow_redirects=True)
+    assert shop_names("sharp") == []
+    assert shop_names("fade mill") == ["Fade Factory"]
+
+    client.post(f'/delete_barbershop/{shop.shop_id}', follow_redirects=True)
+    assert shop_names("fade") == []
+    assert shop_names("barbers") == ["Baker's Barbers"]
@@ -0,0 +1,72 @@
+from datetime import datetime, time, timedelta
+import pytest
+from werkzeug.security import generate_password_hash
+from app import create_app, db, Barber, Customer, Barbershop, Service, Availability, Appointment
+
+app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+
+
+# Fixture to configure the test client and in-memory database
+@pytest.fixture
+def client():
+    client = app.test_client()
+
+    with app.app_context():
+        db.create_all()
+        yield client
+        db.drop_all()
+
+
+# Fixture to set up a barber with availabilities in the past, today, the next days and beyond the horizon
+@pytest.fixture
+def setup_database():
+    with app.app_context():
+        today = datetime.today().date()
+        hashed_password = generate_password_hash("password", method='pbkdf2:sha256')
+        barber = Barber(first_name="Barber", last_name="User", email="barber@example.com", password=hashed_password)
+        customer = Customer(first_name="Customer", last_name="User", email="customer@example.com",
+                            password=hashed_password)
+        db.session.add_all([barber, customer])
+        db.session.commit()
+
+        barbershop = Barbershop(name="Test Barbershop", address="123 Barber St", phone_number="1234567890",
+                                creator_id=barber.id)
+        db.session.add(barbershop)
+        db.session.commit()
+
+        barber.shop_id = barbershop.shop_id
+        service = Service(barber_id=barber.id, name="Haircut", duration=30, price=25.0)
+        db.session.add(service)
+        db.session.commit()
+
+        for day, start, end in [(today - timedelta(days=1), time(9, 0), time(17, 0)),
+                                (today, time(9, 0), time(10, 0)),
+                                (today + timedelta(days=1), time(9, 0), time(10, 0)),
+                                (today + timedelta(days=2), time(9, 0), time(9, 20)),
+                                (today + timedelta(days=app.config['BOOKING_HORIZON_DAYS'] + 1), time(9, 0),
+                                 time(17, 0))]:
+            db.session.add(Availability(barber_id=barber.id, date=day, start_time=start, end_time=end))
+
+        # Today's only hour is fully booked
+        for start, end in [(time(9, 0), time(9, 30)), (time(9, 30), time(10, 0))]:
+            db.session.add(Appointment(barber_id=barber.id, customer_id=customer.id, service_id=service.id,
+                                       customer_name="Customer User", date=today, start_time=start, end_time=end))
+        db.session.commit()
+
+        yield db
+
+
+# Test case to only offer upcoming days with room left for the service
+def test_book_appointment_available_days(client, setup_database):
+    # Sign in as the customer
+    client.post('/signin', data=dict(email="customer@example.com", password="password"), follow_redirects=True)
+
+    today = datetime.today().date()
+    barber = Barber.query.filter_by(email="barber@example.com").first()
+    service = Service.query.filter_by(barber_id=barber.id, name="Haircut").first()
+    response = client.get(f'/book_appointment/{service.id}', follow_redirects=True)
+    assert response.status_code == 200
+
+    choose_links = [day for day in range(-1, app.config['BOOKING_HORIZON_DAYS'] + 2)
+                    if f"/choose_time/{service.id}/{today + timedelta(days=day)}".encode() in response.data]
+    assert choose_links == [1]
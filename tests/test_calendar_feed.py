@@ -0,0 +1,104 @@
+from datetime import datetime, time
+import pytest
+from werkzeug.security import generate_password_hash
+from app import create_app, db, Barber, Customer, Barbershop, Service, Availability, Appointment, calendar_feed_token
+
+app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+
+
+# Fixture to configure the test client and in-memory database
+@pytest.fixture
+def client():
+    client = app.test_client()
+
+    with app.app_context():
+        db.create_all()
+        yield client
+        db.drop_all()
+
+
+# Fixture to set up a barber with an availability and an appointment today
+@pytest.fixture
+def setup_database():
+    with app.app_context():
+        hashed_password = generate_password_hash("password", method='pbkdf2:sha256')
+        barber = Barber(first_name="Barber", last_name="User", email="barber@example.com", password=hashed_password)
+        customer = Customer(first_name="Customer", last_name="User", email="customer@example.com",
+                            password=hashed_password)
+        db.session.add_all([barber, customer])
+        db.session.commit()
+
+        barbershop = Barbershop(name="Test Barbershop", address="123 Barber St", phone_number="1234567890",
+                                creator_id=barber.id)
+        db.session.add(barbershop)
+        db.session.commit()
+
+        barber.shop_id = barbershop.shop_id
+        service = Service(barber_id=barber.id, name="Haircut", duration=30, price=25.0)
+        db.session.add(service)
+        db.session.add(Availability(barber_id=barber.id, date=datetime.today().date(), start_time=time(9, 0),
+                                    end_time=time(17, 0)))
+        db.session.commit()
+
+        db.session.add(Appointment(barber_id=barber.id, customer_id=customer.id, service_id=service.id,
+                                   customer_name="Customer User", date=datetime.today().date(),
+                                   start_time=time(10, 0), end_time=time(10, 30)))
+        db.session.commit()
+
+        yield db
+
+
+# Test case to subscribe to a barber's calendar feed and revalidate it
+def test_calendar_feed(client, setup_database):
+    barber = Barber.query.filter_by(email="barber@example.com").first()
+    feed_path = f'/calendar/feed/{calendar_feed_token(barber.id)}.ics'
+
+    # The barber's calendar page shows the feed link
+    client.post('/signin', data=dict(email="barber@example.com", password="password"), follow_redirects=True)
+    response = client.get('/calendar')
+    assert feed_path.encode() in response.data
+    client.post('/logout')
+
+    # The feed needs no login, only the token
+    response = client.get(feed_path)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/calendar'
+    body = response.get_data(as_text=True)
+    assert "BEGIN:VCALENDAR" in body
+    assert "SUMMARY:Haircut with Customer User" in body
+    assert "SUMMARY:Available" in body
+    etag = response.headers['ETag']
+
+    # Polling again without a change is answered with 304
+    response = client.get(feed_path, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b""
+
+    # A booking changes the schedule stamp, so the feed is sent again
+    client.post('/signin', data=dict(email="customer@example.com", password="password"), follow_redirects=True)
+    service = Service.query.filter_by(barber_id=barber.id).first()
+    client.post(f'/choose_time/{service.id}/{datetime.today().date()}', data=dict(start_time="11:00"),
+                follow_redirects=True)
+    client.post('/logout')
+
+    response = client.get(feed_path, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_data(as_text=True).count("SUMMARY:Haircut with Customer User") == 2
+    assert 'Last-Modified' in response.headers
+    response = client.get(feed_path, headers={'If-Modified-Since': response.headers['Last-Modified']})
+    assert response.status_code == 304
+
+    # Renaming the service changes the feed too
+    etag = response.headers['ETag']
+    client.post('/signin', data=dict(email="barber@example.com", password="password"), follow_redirects=True)
+    client.post(f'/update_service/{service.id}', data=dict(name="Skin Fade", duration=30, price=25.0),
+                follow_redirects=True)
+    client.post('/logout')
+
+    response = client.get(feed_path, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_data(as_text=True).count("SUMMARY:Skin Fade with Customer User") == 2
+
+    # A forged token is rejected
+    response = client.get('/calendar/feed/not-a-token.ics')
+    assert response.status_code == 404
@@ -0,0 +1,136 @@
+import os
+import tempfile
+import threading
+from datetime import datetime, time, timedelta
+import pytest
+from werkzeug.security import generate_password_hash
+from app import create_app, db, Barber, Customer, Barbershop, Service, Availability, Appointment
+
+# A database file rather than an in-memory one, so that each connection has its own view of it
+app = create_app({'TESTING': True,
+                  'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'BBS.db')})
+
+THREADS = 8
+ROUNDS = 8
+
+
+# Fixture to configure the test client and database file
+@pytest.fixture
+def client():
+    client = app.test_client()
+
+    with app.app_context():
+        db.create_all()
+        yield client
+        db.drop_all()
+
+
+# Fixture to set up a barber available 9:00-17:00 with a 30 minute service, and a customer
+@pytest.fixture
+def setup_database():
+    with app.app_context():
+        hashed_password = generate_password_hash("password", method='pbkdf2:sha256')
+        barber = Barber(first_name="Barber", last_name="User", email="barber@example.com", password=hashed_password)
+        db.session.add(barber)
+        db.session.commit()
+
+        barbershop = Barbershop(name="Test Barbershop", address="123 Barber St", phone_number="1234567890",
+                                creator_id=barber.id)
+        db.session.add(barbershop)
+        db.session.commit()
+
+        barber.shop_id = barbershop.shop_id
+        db.session.commit()
+
+        service = Service(barber_id=barber.id, name="Haircut", duration=30, price=25.0)
+        db.session.add(service)
+        db.session.commit()
+
+        availability = Availability(barber_id=barber.id, date=datetime.today().date(), start_time=time(9, 0),
+                                    end_time=time(17, 0))
+        db.session.add(availability)
+        db.session.commit()
+
+        customer = Customer(first_name="Customer", last_name="User", email="customer@example.com",
+                            password=hashed_password)
+        db.session.add(customer)
+        db.session.commit()
+
+        yield db
+
+
+# Stress test: every round, all threads post overlapping times for the same hour at once.
+# Exactly one booking may win per round and no two stored appointments may overlap
+def test_concurrent_booking(client, setup_database):
+    barber = Barber.query.filter_by(email="barber@example.com").first()
+    service = Service.query.filter_by(barber_id=barber.id, name="Haircut").first()
+    customer = Customer.query.filter_by(email="customer@example.com").first()
+    available_day = datetime.today().date().isoformat()
+
+    # One signed-in client per thread
+    clients = []
+    for _ in range(THREADS):
+        thread_client = app.test_client()
+        with thread_client.session_transaction() as session:
+            session['_user_id'] = str(customer.id)
+            session['_fresh'] = True
+        clients.append(thread_client)
+
+    barrier = threading.Barrier(THREADS)
+    confirmed = [[] for _ in range(ROUNDS)]
+    errors = []
+
+    def book(index):
+        try:
+            for round_number in range(ROUNDS):
+                # Half the threads aim at the top of the hour, half a quarter past, so every pair overlaps
+                start = datetime.combine(datetime.min, time(9, 0)) + timedelta(hours=round_number,
+                                                                               minutes=15 * (index % 2))
+                barrier.wait()
+                response = clients[index].post(f'/choose_time/{service.id}/{available_day}',
+                                               data=dict(start_time=start.strftime('%H:%M')))
+                if response.status_code == 302:
+                    confirmed[round_number].append(index)
+                # A loser is told the slot is taken, or to retry if it gave up waiting for the write lock
+                elif not (b"overlaps with an existing appointment" in response.data or
+                          response.status_code == 503 and b"The server is busy right now" in response.data):
+                    errors.append(response.data)
+        except Exception as e:
+            errors.append(e)
+            barrier.abort()
+
+    threads = [threading.Thread(target=book, args=(index,)) for index in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert [len(winners) for winners in confirmed] == [1] * ROUNDS
+
+    db.session.expire_all()
+    appointments = Appointment.query.filter_by(barber_id=barber.id).order_by(Appointment.start_time).all()
+    assert len(appointments) == ROUNDS
+    for previous, current in zip(appointments, appointments[1:]):
+        assert previous.end_time <= current.start_time
+
+
+# Test case to check that a booking which cannot get the write lock asks the customer to retry, and books nothing
+def test_booking_while_schedule_locked(client, setup_database):
+    service = Service.query.filter_by(name="Haircut").first()
+    customer = Customer.query.filter_by(email="customer@example.com").first()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(customer.id)
+        session['_fresh'] = True
+
+    # Another writer holds the database lock for longer than the busy timeout
+    with db.engine.connect() as connection:
+        connection.exec_driver_sql('BEGIN IMMEDIATE')
+        response = client.post(f'/choose_time/{service.id}/{datetime.today().date()}', data=dict(start_time='09:00'))
+        connection.rollback()
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '5'
+    assert b"The server is busy right now" in response.data
+    assert b"overlaps with an existing appointment" not in response.data
+    assert Appointment.query.count() == 0
@@ -1,13 +1,13 @@
 import pytest
 from app import Customer
-from app import app, db
+from app import create_app, db
+
+app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
 
 
 # Fixture to configure the test client and in-memory database
 @pytest.fixture
 def client():
-    app.config['TESTING'] = True
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
     client = app.test_client()
 
     with app.app_context():
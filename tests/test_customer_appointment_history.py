@@ -0,0 +1,102 @@
+import re
+from datetime import datetime, time, timedelta
+import pytest
+from werkzeug.security import generate_password_hash
+from app import create_app, db, Barber, Customer, Barbershop, Service, Appointment
+from query_stats import capture_query_stats
+
+app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+
+
+# Fixture to configure the test client and in-memory database
+@pytest.fixture
+def client():
+    client = app.test_client()
+
+    with app.app_context():
+        db.create_all()
+        yield client
+        db.drop_all()
+
+
+# Fixture to set up a barber, a barbershop, and a customer with two upcoming appointments
+@pytest.fixture
+def setup_database():
+    with app.app_context():
+        hashed_password = generate_password_hash("password", method='pbkdf2:sha256')
+        barber = Barber(first_name="Barber", last_name="User", email="barber@example.com", password=hashed_password)
+        customer = Customer(first_name="Customer", last_name="User", email="customer@example.com",
+                            password=hashed_password)
+        db.session.add_all([barber, customer])
+        db.session.commit()
+
+        barbershop = Barbershop(name="Test Barbershop", address="123 Barber St", phone_number="1234567890",
+                                creator_id=barber.id)
+        db.session.add(barbershop)
+        db.session.commit()
+
+        barber.shop_id = barbershop.shop_id
+        db.session.commit()
+
+        today = datetime.today().date()
+        for number, offset in enumerate([3, 1]):
+            add_appointment(barber, customer, f"Upcoming {number}", today + timedelta(days=offset), time(9, 0))
+        db.session.commit()
+
+        yield db
+
+
+# Book a customer in for a service of their own, so each appointment's service name identifies it on the page
+def add_appointment(barber, customer, name, day, start_time):
+    service = Service(barber_id=barber.id, name=name, duration=30, price=20.0)
+    db.session.add(service)
+    db.session.flush()
+    db.session.add(Appointment(barber_id=barber.id, customer_id=customer.id, service_id=service.id,
+                               customer_name="Customer User", date=day, start_time=start_time,
+                               end_time=(datetime.combine(day, start_time) + timedelta(minutes=30)).time()))
+
+
+def customer_home_page(client, url):
+    db.session.expunge_all()
+    with capture_query_stats(app) as recorded:
+        response = client.get(url)
+    assert response.status_code == 200
+    html = response.get_data(as_text=True)
+    names = re.findall(r'Service: ((?:Upcoming|Past) \d+)', html)
+    next_page = re.search(r'href="(/customer_home\?before=[^"]+)"', html)
+    return names, next_page and next_page.group(1), recorded[0]
+
+
+# Test case to list upcoming appointments first and page through the history without skipping or repeating any
+def test_customer_appointment_history(client, setup_database):
+    client.post('/signin', data=dict(email="customer@example.com", password="password"), follow_redirects=True)
+    names, next_page, short_history = customer_home_page(client, '/customer_home')
+    assert names == ["Upcoming 1", "Upcoming 0"]
+    assert next_page is None
+
+    # 25 past appointments, several sharing a date and start time
+    barber = Barber.query.filter_by(email="barber@example.com").first()
+    customer = Customer.query.filter_by(email="customer@example.com").first()
+    today = datetime.today().date()
+    for number in range(25):
+        add_appointment(barber, customer, f"Past {number:02d}", today - timedelta(days=1 + number // 3), time(9, 0))
+    db.session.commit()
+
+    seen = []
+    names, next_page, first_page = customer_home_page(client, '/customer_home')
+    assert names[:2] == ["Upcoming 1", "Upcoming 0"]
+    seen += names[2:]
+    while next_page:
+        names, next_page, page = customer_home_page(client, next_page)
+        assert not any(name.startswith("Upcoming") for name in names)
+        seen += names
+        assert page.count <= first_page.count
+
+    # Latest first, ties in date and time broken by id, and every appointment exactly once
+    expected = sorted((f"Past {number:02d}" for number in range(25)), key=lambda name: (int(name[5:]) // 3,
+                                                                                         -int(name[5:])))
+    assert seen == expected
+
+    # Barber and service come with the appointments, so a long history costs no extra queries
+    assert first_page.count == short_history.count
+    assert first_page.repeated(2) == []
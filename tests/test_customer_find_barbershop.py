@@ -1,14 +1,14 @@
 import os
 import pytest
-from app import app, db, User, Barber, Customer, Barbershop
+from app import create_app, db, User, Barber, Customer, Barbershop
 from werkzeug.security import generate_password_hash
 
+app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+
 
 # Fixture to configure the test client and in-memory database
 @pytest.fixture
 def client():
-    app.config['TESTING'] = True
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
     client = app.test_client()
 
     with app.app_context():
@@ -0,0 +1,81 @@
+import os
+import tempfile
+import time as clock
+from datetime import datetime, time, timedelta
+import pytest
+from werkzeug.security import generate_password_hash
+from app import create_app, db, Barber, Customer, Availability
+from database import database_url, engine_options
+
+# A database file rather than an in-memory one, so that each connection has its own view of it
+app = create_app({'TESTING': True,
+                  'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'BBS.db')})
+
+
+# Fixture to configure the test client and database file
+@pytest.fixture
+def client():
+    client = app.test_client()
+
+    with app.app_context():
+        db.create_all()
+        yield client
+        db.drop_all()
+
+
+# Fixture to set up a barber available tomorrow, and a customer
+@pytest.fixture
+def setup_database():
+    with app.app_context():
+        hashed_password = generate_password_hash("password", method='pbkdf2:sha256')
+        barber = Barber(first_name="Barber", last_name="User", email="barber@example.com", password=hashed_password)
+        customer = Customer(first_name="Customer", last_name="User", email="customer@example.com",
+                            password=hashed_password)
+        db.session.add_all([barber, customer])
+        db.session.commit()
+        db.session.add(Availability(barber_id=barber.id, date=datetime.today().date() + timedelta(days=1),
+                                    start_time=time(9, 0), end_time=time(12, 0)))
+        db.session.commit()
+
+        yield db
+
+
+# Test case for the engine settings taken from the configuration
+def test_engine_options():
+    assert database_url({'DATABASE_URL': 'postgres://u:p@db/bbs'}, 'sqlite:///BBS.db') == 'postgresql://u:p@db/bbs'
+    assert database_url({}, 'sqlite:///BBS.db') == 'sqlite:///BBS.db'
+
+    config = dict(app.config, SQLALCHEMY_DATABASE_URI='postgresql://u:p@db/bbs')
+    options = engine_options(config)
+    assert options['pool_size'] == app.config['DB_POOL_SIZE']
+    assert options['max_overflow'] == app.config['DB_MAX_OVERFLOW']
+    assert options['pool_pre_ping'] is True
+    assert engine_options(dict(app.config, SQLALCHEMY_DATABASE_URI='sqlite:///BBS.db')) == {}
+
+
+# Test case to check the SQLite pragmas, and that calendar reads are not held up by an open write transaction
+def test_sqlite_pragmas_and_concurrent_reads(client, setup_database):
+    connection = db.engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        assert cursor.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        assert cursor.execute('PRAGMA busy_timeout').fetchone()[0] == app.config['SQLITE_BUSY_TIMEOUT_MS']
+        assert cursor.execute('PRAGMA synchronous').fetchone()[0] == 1  # NORMAL
+        assert cursor.execute('PRAGMA cache_size').fetchone()[0] == -app.config['SQLITE_CACHE_SIZE_KB']
+
+        # Another connection takes the write lock and keeps it while the calendar is read
+        client.post('/signin', data=dict(email="customer@example.com", password="password"), follow_redirects=True)
+        barber = Barber.query.filter_by(email="barber@example.com").first()
+        day = datetime.today().date() + timedelta(days=1)
+        db.session.commit()
+        cursor.execute('BEGIN EXCLUSIVE')
+        cursor.execute("UPDATE user SET first_name = 'Writer' WHERE email = 'customer@example.com'")
+
+        started = clock.perf_counter()
+        response = client.get(f'/api/availability_and_appointments/{barber.id}/{day}')
+        assert response.status_code == 200
+        assert [event['title'] for event in response.get_json()] == ["Available"]
+        assert clock.perf_counter() - started < app.config['SQLITE_BUSY_TIMEOUT_MS'] / 1000 / 2
+        connection.rollback()
+    finally:
+        connection.close()
@@ -0,0 +1,107 @@
+from datetime import datetime, time
+import pytest
+from sqlalchemy import delete
+from werkzeug.security import generate_password_hash
+from app import create_app, db, Barber, Customer, Barbershop, Service, Availability, Appointment, day_bitmaps
+from slots import DayBitmap
+
+app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+
+
+# Fixture to configure the test client and in-memory database
+@pytest.fixture
+def client():
+    client = app.test_client()
+
+    with app.app_context():
+        db.create_all()
+        yield client
+        db.drop_all()
+
+
+# Fixture to set up a barber available 9:00-10:00 today with a 30 minute service, and a customer
+@pytest.fixture
+def setup_database():
+    with app.app_context():
+        hashed_password = generate_password_hash("password", method='pbkdf2:sha256')
+        barber = Barber(first_name="Barber", last_name="User", email="barber@example.com", password=hashed_password)
+        customer = Customer(first_name="Customer", last_name="User", email="customer@example.com",
+                            password=hashed_password)
+        db.session.add_all([barber, customer])
+        db.session.commit()
+
+        barbershop = Barbershop(name="Test Barbershop", address="123 Barber St", phone_number="1234567890",
+                                creator_id=barber.id)
+        db.session.add(barbershop)
+        db.session.commit()
+
+        barber.shop_id = barbershop.shop_id
+        db.session.add(Service(barber_id=barber.id, name="Haircut", duration=30, price=25.0))
+        db.session.add(Availability(barber_id=barber.id, date=datetime.today().date(), start_time=time(9, 0),
+                                    end_time=time(10, 0)))
+        db.session.commit()
+
+        yield db
+
+
+# Test case for bitmap checks and free-slot enumeration
+def test_day_bitmap():
+    bitmap = DayBitmap(availability=[(540, 720)], booked=[(600, 630)])
+
+    assert bitmap.within_availability(540, 720)
+    assert not bitmap.within_availability(530, 560)
+    assert bitmap.overlaps_booking(615, 645)
+    assert not bitmap.overlaps_booking(630, 660)
+    assert not bitmap.is_free(590, 620)
+    assert bitmap.without_booking(600, 630).is_free(590, 620)
+    assert list(bitmap.free_starts(30, step=15)) == [540, 555, 570, 630, 645, 660, 675, 690]
+    assert list(bitmap.free_starts(60, step=60)) == [540, 630]
+
+
+# Test case to keep cached barber-days in sync with bookings and availability changes
+def test_day_bitmap_stays_in_sync(client, setup_database):
+    # Sign in as the customer
+    client.post('/signin', data=dict(email="customer@example.com", password="password"), follow_redirects=True)
+
+    barber = Barber.query.filter_by(email="barber@example.com").first()
+    service = Service.query.filter_by(barber_id=barber.id).first()
+    today = datetime.today().date()
+
+    response = client.get(f'/api/free_slots/{service.id}/{today}')
+    assert [slot['start'][11:16] for slot in response.get_json()] == ["09:00", "09:15", "09:30"]
+    assert (barber.id, today) in day_bitmaps
+
+    # Booking drops the cached day, so the next lookup sees the appointment
+    client.post(f'/choose_time/{service.id}/{today}', data=dict(start_time="09:00"), follow_redirects=True)
+    assert (barber.id, today) not in day_bitmaps
+    response = client.get(f'/api/free_slots/{service.id}/{today}')
+    assert [slot['start'][11:16] for slot in response.get_json()] == ["09:30"]
+
+    # So does a change to the barber's availability
+    client.post('/logout')
+    client.post('/signin', data=dict(email="barber@example.com", password="password"), follow_redirects=True)
+    client.post('/save_availability', data=dict(date=today.isoformat(), start_time="10:00", end_time="11:00"),
+                follow_redirects=True)
+    response = client.get(f'/api/free_slots/{service.id}/{today}')
+    assert [slot['start'][11:16] for slot in response.get_json()] == ["09:30", "09:45", "10:00", "10:15", "10:30"]
+
+
+# Test case to check a booking is checked against the database, not a cached day another worker has changed
+def test_booking_ignores_stale_cached_day(client, setup_database):
+    client.post('/signin', data=dict(email="customer@example.com", password="password"), follow_redirects=True)
+
+    barber = Barber.query.filter_by(email="barber@example.com").first()
+    service = Service.query.filter_by(barber_id=barber.id).first()
+    today = datetime.today().date()
+    client.get(f'/api/free_slots/{service.id}/{today}')
+    assert (barber.id, today) in day_bitmaps
+
+    # The availability is removed by another process, so this one's cache is not told
+    db.session.execute(delete(Availability).where(Availability.barber_id == barber.id))
+    db.session.commit()
+    assert (barber.id, today) in day_bitmaps
+
+    response = client.post(f'/choose_time/{service.id}/{today}', data=dict(start_time="09:00"),
+                           follow_redirects=True)
+    assert b"Selected time is not within the barber&#39;s availability" in response.data
+    assert Appointment.query.count() == 0
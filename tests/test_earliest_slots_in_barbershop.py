@@ -0,0 +1,116 @@
+from datetime import date, datetime, time, timedelta
+import pytest
+from werkzeug.security import generate_password_hash
+from app import create_app, db, Barber, Customer, Barbershop, Service, Availability, Appointment
+
+app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+
+
+# Fixture to configure the test client and in-memory database
+@pytest.fixture
+def client():
+    client = app.test_client()
+
+    with app.app_context():
+        db.create_all()
+        yield client
+        db.drop_all()
+
+
+# Fixture to set up a barbershop with two barbers offering a haircut tomorrow, and a customer
+@pytest.fixture
+def setup_database():
+    with app.app_context():
+        tomorrow = datetime.today().date() + timedelta(days=1)
+        hashed_password = generate_password_hash("password", method='pbkdf2:sha256')
+        first_barber = Barber(first_name="First", last_name="Barber", email="first@example.com",
+                              password=hashed_password)
+        second_barber = Barber(first_name="Second", last_name="Barber", email="second@example.com",
+                               password=hashed_password)
+        customer = Customer(first_name="Customer", last_name="User", email="customer@example.com",
+                            password=hashed_password)
+        db.session.add_all([first_barber, second_barber, customer])
+        db.session.commit()
+
+        barbershop = Barbershop(name="Test Barbershop", address="123 Barber St", phone_number="1234567890",
+                                creator_id=first_barber.id)
+        db.session.add(barbershop)
+        db.session.commit()
+
+        first_barber.shop_id = barbershop.shop_id
+        second_barber.shop_id = barbershop.shop_id
+        first_service = Service(barber_id=first_barber.id, name="Haircut", duration=30, price=25.0)
+        second_service = Service(barber_id=second_barber.id, name="Haircut", duration=30, price=20.0)
+        db.session.add_all([first_service, second_service])
+        db.session.add(Availability(barber_id=first_barber.id, date=tomorrow, start_time=time(10, 0),
+                                    end_time=time(12, 0)))
+        db.session.add(Availability(barber_id=second_barber.id, date=tomorrow, start_time=time(9, 0),
+                                    end_time=time(10, 0)))
+        db.session.commit()
+
+        db.session.add(Appointment(barber_id=second_barber.id, customer_id=customer.id, service_id=second_service.id,
+                                   customer_name="Customer User", date=tomorrow, start_time=time(9, 0),
+                                   end_time=time(9, 30)))
+        db.session.commit()
+
+        yield db
+
+
+# Test case to find the earliest free slots across every barber in a barbershop
+def test_earliest_slots_in_barbershop(client, setup_database):
+    # Sign in as the customer
+    client.post('/signin', data=dict(email="customer@example.com", password="password"), follow_redirects=True)
+
+    barbershop = Barbershop.query.filter_by(name="Test Barbershop").first()
+    tomorrow = (datetime.today().date() + timedelta(days=1)).isoformat()
+
+    response = client.get(f'/api/earliest_slots/{barbershop.shop_id}?service=Haircut&start={tomorrow}&limit=3')
+    assert response.status_code == 200
+    slots = response.get_json()
+    assert [(slot['barber_name'], slot['start'][11:16]) for slot in slots] == [
+        ("Second Barber", "09:30"), ("First Barber", "10:00"), ("First Barber", "10:15")]
+
+    # Searching by duration instead of service name
+    response = client.get(f'/api/earliest_slots/{barbershop.shop_id}?duration=60&start={tomorrow}&end={tomorrow}')
+    slots = response.get_json()
+    assert [(slot['barber_name'], slot['start'][11:16]) for slot in slots] == [
+        ("First Barber", "10:00"), ("First Barber", "10:15"), ("First Barber", "10:30"), ("First Barber", "10:45"),
+        ("First Barber", "11:00")]
+
+    # A service name or duration is required
+    response = client.get(f'/api/earliest_slots/{barbershop.shop_id}')
+    assert response.status_code == 400
+
+    # A limit below one, or a duration that is not a positive number of minutes, is rejected
+    for query in ('service=Haircut&limit=0', 'service=Haircut&limit=-3', 'service=Haircut&limit=many',
+                  'duration=0', 'duration=-30', 'duration=long'):
+        response = client.get(f'/api/earliest_slots/{barbershop.shop_id}?{query}')
+        assert response.status_code == 400
+        assert 'error' in response.get_json()
+
+
+# Test case to check the search window starts no earlier than today and is bounded in length
+def test_earliest_slots_window(client, setup_database):
+    client.post('/signin', data=dict(email="customer@example.com", password="password"), follow_redirects=True)
+    barbershop = Barbershop.query.filter_by(name="Test Barbershop").first()
+    barber = Barber.query.filter_by(email="first@example.com").first()
+    tomorrow = datetime.today().date() + timedelta(days=1)
+    db.session.add(Availability(barber_id=barber.id, date=date(2000, 1, 1), start_time=time(9, 0),
+                                end_time=time(17, 0)))
+    db.session.commit()
+
+    # A start date in the past is moved up to today, so past days are not offered
+    response = client.get(f'/api/earliest_slots/{barbershop.shop_id}?duration=30&start=2000-01-01&end={tomorrow}')
+    assert response.status_code == 200
+    days = {slot['start'][:10] for slot in response.get_json()}
+    assert days == {str(tomorrow)}
+
+    # An end before the start (or before today), or a window longer than SLOT_SEARCH_MAX_DAYS, is rejected
+    for query in ('start=2000-01-01&end=2000-01-02', f'start={tomorrow}&end={datetime.today().date()}',
+                  f'start={tomorrow}&end=9999-12-31', f'start={tomorrow}&end={tomorrow + timedelta(days=62)}'):
+        response = client.get(f'/api/earliest_slots/{barbershop.shop_id}?duration=30&{query}')
+        assert response.status_code == 400
+        assert 'error' in response.get_json()
+    response = client.get(f'/api/earliest_slots/{barbershop.shop_id}?duration=30&start={tomorrow}'
+                          f'&end={tomorrow + timedelta(days=61)}')
+    assert response.status_code == 200
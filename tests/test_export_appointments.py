@@ -0,0 +1,88 @@
+import csv
+import io
+import json
+from datetime import datetime, time, timedelta
+import pytest
+from werkzeug.security import generate_password_hash
+from app import create_app, db, Barber, Customer, Barbershop, Service, Appointment
+
+app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+
+
+# Fixture to configure the test client and in-memory database
+@pytest.fixture
+def client():
+    app.config['EXPORT_BATCH_SIZE'] = 2
+    client = app.test_client()
+
+    with app.app_context():
+        db.create_all()
+        yield client
+        db.drop_all()
+    app.config['EXPORT_BATCH_SIZE'] = 1000
+
+
+# Fixture to set up a barbershop with two barbers and five appointments over five days
+@pytest.fixture
+def setup_database():
+    with app.app_context():
+        today = datetime.today().date()
+        hashed_password = generate_password_hash("password", method='pbkdf2:sha256')
+        barber = Barber(first_name="Barber", last_name="User", email="barber@example.com", password=hashed_password)
+        colleague = Barber(first_name="Second", last_name="Barber", email="second@example.com",
+                           password=hashed_password)
+        customer = Customer(first_name="Customer", last_name="User", email="customer@example.com",
+                            password=hashed_password)
+        db.session.add_all([barber, colleague, customer])
+        db.session.commit()
+
+        barbershop = Barbershop(name="Test Barbershop", address="123 Barber St", phone_number="1234567890",
+                                creator_id=barber.id)
+        db.session.add(barbershop)
+        db.session.commit()
+
+        barber.shop_id = barbershop.shop_id
+        colleague.shop_id = barbershop.shop_id
+        services = [Service(barber_id=barber.id, name="Haircut", duration=30, price=25.0),
+                    Service(barber_id=colleague.id, name="Shave", duration=30, price=15.0)]
+        db.session.add_all(services)
+        db.session.commit()
+
+        for day in range(5):
+            service = services[day % 2]
+            db.session.add(Appointment(barber_id=service.barber_id, customer_id=customer.id, service_id=service.id,
+                                       customer_name="Customer User", date=today + timedelta(days=day),
+                                       start_time=time(10, 0), end_time=time(10, 30)))
+        db.session.commit()
+
+        yield db
+
+
+# Test case to export a shop's appointments as CSV and NDJSON
+def test_export_appointments(client, setup_database):
+    # Sign in as the barbershop creator
+    client.post('/signin', data=dict(email="barber@example.com", password="password"), follow_redirects=True)
+    today = datetime.today().date()
+
+    response = client.get('/export/appointments?format=csv')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/csv'
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [row['date'] for row in rows] == [str(today + timedelta(days=day)) for day in range(5)]
+    assert [row['service'] for row in rows] == ["Haircut", "Shave", "Haircut", "Shave", "Haircut"]
+    assert rows[1]['barber_name'] == "Second Barber"
+
+    # Filter by barber and date range, as NDJSON
+    colleague = Barber.query.filter_by(email="second@example.com").first()
+    response = client.get(f'/export/appointments?format=ndjson&barber_id={colleague.id}'
+                          f'&start={today + timedelta(days=2)}&end={today + timedelta(days=4)}')
+    assert response.mimetype == 'application/x-ndjson'
+    records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [(record['date'], record['price']) for record in records] == [(str(today + timedelta(days=3)), 15.0)]
+    client.post('/logout')
+
+    # A barber who did not create the shop only exports their own appointments
+    client.post('/signin', data=dict(email="second@example.com", password="password"), follow_redirects=True)
+    response = client.get('/export/appointments')
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [row['service'] for row in rows] == ["Shave", "Shave"]
@@ -0,0 +1,99 @@
+from datetime import datetime, time
+import pytest
+from werkzeug.security import generate_password_hash
+from app import create_app, db, Barber, Customer, Barbershop, Service, Availability, Appointment
+from slots import DaySchedule
+
+app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+
+
+# Fixture to configure the test client and in-memory database
+@pytest.fixture
+def client():
+    client = app.test_client()
+
+    with app.app_context():
+        db.create_all()
+        yield client
+        db.drop_all()
+
+
+# Fixture to set up a barber with a 9:00-12:00 availability and a 10:00-10:30 appointment
+@pytest.fixture
+def setup_database():
+    with app.app_context():
+        hashed_password = generate_password_hash("password", method='pbkdf2:sha256')
+        barber = Barber(first_name="Barber", last_name="User", email="barber@example.com", password=hashed_password)
+        db.session.add(barber)
+        db.session.commit()
+
+        barbershop = Barbershop(name="Test Barbershop", address="123 Barber St", phone_number="1234567890",
+                                creator_id=barber.id)
+        db.session.add(barbershop)
+        db.session.commit()
+
+        barber.shop_id = barbershop.shop_id
+        db.session.commit()
+
+        service = Service(barber_id=barber.id, name="Haircut", duration=30, price=25.0)
+        db.session.add(service)
+        db.session.commit()
+
+        availability = Availability(barber_id=barber.id, date=datetime.today().date(), start_time=time(9, 0),
+                                    end_time=time(12, 0))
+        db.session.add(availability)
+        db.session.commit()
+
+        hashed_password = generate_password_hash("password", method='pbkdf2:sha256')
+        customer = Customer(first_name="Customer", last_name="User", email="customer@example.com",
+                            password=hashed_password)
+        db.session.add(customer)
+        db.session.commit()
+
+        appointment = Appointment(
+            barber_id=barber.id,
+            customer_id=customer.id,
+            service_id=service.id,
+            customer_name=f"{customer.first_name} {customer.last_name}",
+            date=datetime.today().date(),
+            start_time=time(10, 0),
+            end_time=time(10, 30)
+        )
+        db.session.add(appointment)
+        db.session.commit()
+
+        yield db
+
+
+# Test case for the slot engine on its own
+def test_day_schedule():
+    # Two overlapping availability windows merge into 9:00-13:00, bookings at 10:00-10:30 and 11:00-12:00
+    schedule = DaySchedule(availability=[(540, 720), (660, 780)], booked=[(600, 630), (660, 720)])
+
+    assert schedule.within_availability(540, 780)
+    assert not schedule.within_availability(500, 560)
+    assert schedule.overlaps_booking(615, 645)
+    assert not schedule.overlaps_booking(630, 660)
+    assert schedule.is_free(630, 660)
+    assert not schedule.is_free(700, 730)
+    assert list(schedule.free_gaps()) == [(540, 600), (630, 660), (720, 780)]
+    assert list(schedule.free_starts(30, step=15)) == [540, 555, 570, 630, 720, 735, 750]
+
+
+# Test case to list the free slots for a service
+def test_free_slots(client, setup_database):
+    # Sign in as the customer
+    client.post('/signin', data=dict(email="customer@example.com", password="password"), follow_redirects=True)
+
+    service = Service.query.filter_by(name="Haircut").first()
+    available_day = datetime.today().date().isoformat()
+    response = client.get(f'/api/free_slots/{service.id}/{available_day}')
+    assert response.status_code == 200
+
+    starts = [slot['start'][11:16] for slot in response.get_json()]
+    assert starts == ["09:00", "09:15", "09:30", "10:30", "10:45", "11:00", "11:15", "11:30"]
+
+    # A booked time is rejected by choose_time
+    response = client.post(f'/choose_time/{service.id}/{available_day}', data=dict(start_time="09:45"),
+                           follow_redirects=True)
+    assert b"Selected time overlaps with an existing appointment" in response.data
@@ -0,0 +1,99 @@
+import io
+import json
+from datetime import datetime, time, timedelta
+import pytest
+from werkzeug.security import generate_password_hash
+from app import create_app, db, Barber, Barbershop, Availability
+
+app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+
+
+# Fixture to configure the test client and in-memory database
+@pytest.fixture
+def client():
+    client = app.test_client()
+
+    with app.app_context():
+        db.create_all()
+        yield client
+        db.drop_all()
+
+
+# Fixture to set up a barbershop with its creator, a second barber and one existing availability
+@pytest.fixture
+def setup_database():
+    with app.app_context():
+        hashed_password = generate_password_hash("password", method='pbkdf2:sha256')
+        barber = Barber(first_name="Barber", last_name="User", email="barber@example.com", password=hashed_password)
+        colleague = Barber(first_name="Second", last_name="Barber", email="second@example.com",
+                           password=hashed_password)
+        db.session.add_all([barber, colleague])
+        db.session.commit()
+
+        barbershop = Barbershop(name="Test Barbershop", address="123 Barber St", phone_number="1234567890",
+                                creator_id=barber.id)
+        db.session.add(barbershop)
+        db.session.commit()
+
+        barber.shop_id = barbershop.shop_id
+        colleague.shop_id = barbershop.shop_id
+        db.session.add(Availability(barber_id=barber.id, date=datetime.today().date(), start_time=time(9, 0),
+                                    end_time=time(12, 0)))
+        db.session.commit()
+
+        yield db
+
+
+# Test case to import availability for a whole shop over HTTP, and reject overlapping rows
+def test_import_availability(client, setup_database):
+    # Sign in as the barbershop creator
+    client.post('/signin', data=dict(email="barber@example.com", password="password"), follow_redirects=True)
+
+    today = datetime.today().date()
+    tomorrow = today + timedelta(days=1)
+    barber = Barber.query.filter_by(email="barber@example.com").first()
+    csv_data = ("barber_email,date,start_time,end_time\n"
+                f"barber@example.com,{today},13:00,17:00\n"
+                f"second@example.com,{today},09:00,17:00\n"
+                f"second@example.com,{tomorrow},09:00,12:00\n")
+    response = client.post('/api/import_availability', data=csv_data, content_type='text/csv')
+    assert response.status_code == 200
+    assert response.get_json() == {'imported': 3}
+    assert Availability.query.count() == 4
+
+    # Overlaps within the upload and with an existing availability are reported and nothing is written
+    json_data = [
+        {'barber_id': barber.id, 'date': str(tomorrow), 'start_time': '09:00', 'end_time': '11:00'},
+        {'barber_id': barber.id, 'date': str(tomorrow), 'start_time': '10:00', 'end_time': '12:00'},
+        {'barber_id': barber.id, 'date': str(today), 'start_time': '11:00', 'end_time': '13:00'},
+    ]
+    response = client.post('/api/import_availability', data=json.dumps(json_data), content_type='application/json')
+    assert response.status_code == 400
+    assert len(response.get_json()['errors']) == 2
+    assert Availability.query.count() == 4
+
+    # An uploaded file that is not UTF-8 is rejected the same way
+    latin1_data = f"barber_email,date,start_time,end_time\nbarbér@example.com,{tomorrow},09:00,12:00\n"
+    response = client.post('/api/import_availability',
+                           data={'file': (io.BytesIO(latin1_data.encode('latin-1')), 'schedule.csv')})
+    assert response.status_code == 400
+    assert response.get_json() == {'errors': ['The file must be UTF-8 encoded text.']}
+    assert Availability.query.count() == 4
+
+
+# Test case to import availability from a file with the CLI command
+def test_import_availability_command(client, setup_database, tmp_path):
+    path = tmp_path / "schedule.json"
+    tomorrow = datetime.today().date() + timedelta(days=1)
+    path.write_text(json.dumps([
+        {'barber_email': 'second@example.com', 'date': str(tomorrow), 'start_time': '09:00', 'end_time': '12:00'},
+        {'barber_email': 'second@example.com', 'date': str(tomorrow), 'start_time': '13:00', 'end_time': '17:00'},
+    ]))
+
+    result = app.test_cli_runner().invoke(args=['import-availability', str(path)])
+    assert result.exit_code == 0
+    assert "Imported 2 availabilities." in result.output
+
+    result = app.test_cli_runner().invoke(args=['import-availability', str(path)])
+    assert result.exit_code == 1
+    assert "overlaps an existing availability" in result.output
@@ -0,0 +1,90 @@
+import pytest
+from werkzeug.security import check_password_hash, generate_password_hash
+from app import create_app, db, User, Barber, Customer
+
+app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+
+
+# Fixture to configure the test client and in-memory database
+@pytest.fixture
+def client():
+    client = app.test_client()
+
+    with app.app_context():
+        db.create_all()
+        yield client
+        db.drop_all()
+
+
+# Fixture to set up one existing customer
+@pytest.fixture
+def setup_database():
+    with app.app_context():
+        hashed_password = generate_password_hash("password", method='pbkdf2:sha256')
+        db.session.add(Customer(first_name="Customer", last_name="User", email="customer@example.com",
+                                password=hashed_password))
+        db.session.commit()
+
+        yield db
+
+
+def write_users(path, emails):
+    lines = ["first_name,last_name,email,password,user_type"]
+    lines += [f"User,Number{number},{email},secret {number},{'barber' if number % 3 == 0 else 'customer'}"
+              for number, email in enumerate(emails)]
+    path.write_text("\n".join(lines) + "\n", encoding='utf-8')
+
+
+def import_users(path, *options):
+    # Cheap hashes keep the test fast; they are upgraded at sign-in like any older hash
+    method = app.config['PASSWORD_HASH_METHOD']
+    app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+    try:
+        return app.test_cli_runner().invoke(args=['import-users', str(path), '--workers', '2', *options])
+    finally:
+        app.config['PASSWORD_HASH_METHOD'] = method
+
+
+# Test case to create barbers and customers from a CSV file in batches
+def test_import_users(client, setup_database, tmp_path):
+    path = tmp_path / "users.csv"
+    write_users(path, [f"user{number}@example.com" for number in range(30)])
+
+    result = import_users(path, '--batch-size', '7')
+    assert result.exit_code == 0, result.output
+    assert "7/30 users" in result.output
+    assert "Imported 30 users" in result.output
+    assert Barber.query.filter(Barber.email.like("user%")).count() == 10
+    assert Customer.query.filter(Customer.email.like("user%")).count() == 20
+
+    barber = User.query.filter_by(email="user3@example.com").first()
+    assert barber.type == 'barber' and isinstance(barber, Barber) and barber.shop_id is None
+    assert check_password_hash(barber.password, "secret 3")
+
+    # Imported users can sign in
+    response = client.post('/signin', data=dict(email="user4@example.com", password="secret 4"),
+                           follow_redirects=True)
+    assert b"Welcome, User" in response.data
+
+
+# Test case to reject a file with bad or already registered rows, unless existing emails are skipped
+def test_import_users_errors(client, setup_database, tmp_path):
+    path = tmp_path / "users.csv"
+    path.write_text("first_name,last_name,email,password,user_type\n"
+                    "Ann,Lee,ann@example.com,pw,stylist\n"
+                    "Bob,Ray,,pw,barber\n", encoding='utf-8')
+    result = import_users(path)
+    assert result.exit_code == 1
+    assert "record 1: user_type must be one of barber, customer" in result.output
+    assert "record 2: missing email" in result.output
+
+    write_users(path, ["new@example.com", "customer@example.com"])
+    result = import_users(path)
+    assert result.exit_code == 1
+    assert "record 2: email customer@example.com is already registered" in result.output
+    assert User.query.filter_by(email="new@example.com").first() is None
+
+    result = import_users(path, '--skip-existing')
+    assert result.exit_code == 0, result.output
+    assert "Imported 1 users" in result.output
+    assert User.query.filter_by(email="new@example.com").first() is not None
@@ -0,0 +1,115 @@
+import pytest
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+from app import create_app, db, Barber, Customer, Barbershop
+from geo import LON_CELLS, cell_ranges, distance_km, grid_cell
+
+app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+
+
+# Fixture to configure the test client and in-memory database
+@pytest.fixture
+def client():
+    client = app.test_client()
+
+    with app.app_context():
+        db.create_all()
+        yield client
+        db.drop_all()
+
+
+# Fixture to set up barbershops around central London, one in Paris, one without a location, and a customer
+@pytest.fixture
+def setup_database():
+    with app.app_context():
+        hashed_password = generate_password_hash("password", method='pbkdf2:sha256')
+        barber = Barber(first_name="Barber", last_name="User", email="barber@example.com", password=hashed_password)
+        customer = Customer(first_name="Customer", last_name="User", email="customer@example.com",
+                            password=hashed_password)
+        db.session.add_all([barber, customer])
+        db.session.commit()
+
+        db.session.add_all([
+            Barbershop(name="Trafalgar Trims", address="Charing Cross", phone_number="1", creator_id=None,
+                       latitude=51.5080, longitude=-0.1281),
+            Barbershop(name="Camden Cuts", address="Camden High Street", phone_number="2", creator_id=None,
+                       latitude=51.5390, longitude=-0.1426),
+            Barbershop(name="Watford Fades", address="Watford", phone_number="3", creator_id=None,
+                       latitude=51.6565, longitude=-0.3903),
+            Barbershop(name="Salon Parisien", address="Paris", phone_number="4", creator_id=None,
+                       latitude=48.8566, longitude=2.3522),
+            Barbershop(name="Somewhere Shop", address="Unknown", phone_number="5", creator_id=None),
+        ])
+        db.session.commit()
+
+        yield db
+
+
+# Test case for the grid helpers
+def test_grid_cells():
+    assert 340 < distance_km(51.5080, -0.1281, 48.8566, 2.3522) < 347
+
+    ranges = cell_ranges(51.5, -0.12, 10)
+    assert any(first <= grid_cell(51.5, -0.12) <= last for first, last in ranges)
+    assert not any(first <= grid_cell(48.8566, 2.3522) <= last for first, last in ranges)
+
+    # A box across the antimeridian covers both ends of each row
+    row_ranges = cell_ranges(0, 179.99, 5)
+    assert any(last % LON_CELLS == LON_CELLS - 1 for _, last in row_ranges)
+    assert any(first % LON_CELLS == 0 for first, _ in row_ranges)
+    assert any(first <= grid_cell(0.01, -179.99) <= last for first, last in row_ranges)
+
+
+# Test case to find the nearest barbershops within a radius through the grid cell index
+def test_nearby_barbershops(client, setup_database):
+    client.post('/signin', data=dict(email="customer@example.com", password="password"), follow_redirects=True)
+    url = '/api/nearby_barbershops?lat=51.5074&lon=-0.1278'
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if 'FROM barbershop' in statement:
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        shops = client.get(url).get_json()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    assert [shop['name'] for shop in shops] == ["Trafalgar Trims", "Camden Cuts"]
+    assert shops[0]['distance_km'] < shops[1]['distance_km'] < 10
+
+    # Only the grid cells around the point are read
+    connection = db.engine.raw_connection()
+    try:
+        plan = connection.cursor().execute(f'EXPLAIN QUERY PLAN {statements[-1][0]}', statements[-1][1]).fetchall()
+    finally:
+        connection.close()
+    assert any('ix_barbershop_geo_cell' in row[-1] for row in plan)
+
+    assert [shop['name'] for shop in client.get(url + '&radius=50').get_json()] == [
+        "Trafalgar Trims", "Camden Cuts", "Watford Fades"]
+    assert [shop['name'] for shop in client.get(url + '&radius=50&limit=1').get_json()] == ["Trafalgar Trims"]
+    assert client.get(url + '&radius=5000').status_code == 400
+    assert client.get('/api/nearby_barbershops?lat=95&lon=0').status_code == 400
+    assert client.get('/api/nearby_barbershops?lat=51.5').status_code == 400
+
+
+# Test case to set a barbershop's location from the create and update forms
+def test_barbershop_location_forms(client, setup_database):
+    client.post('/signin', data=dict(email="barber@example.com", password="password"), follow_redirects=True)
+    client.post('/new_barbershop', data=dict(name="Soho Shears", address="Soho", phone_number="6",
+                                             latitude="51.5136", longitude="-0.1365"), follow_redirects=True)
+    shop = Barbershop.query.filter_by(name="Soho Shears").first()
+    assert shop.geo_cell == grid_cell(51.5136, -0.1365)
+
+    response = client.post(f'/update_barbershop/{shop.shop_id}',
+                           data=dict(name="Soho Shears", address="Soho", phone_number="6", latitude="51.5"),
+                           follow_redirects=True)
+    assert b"Latitude and longitude must be given together" in response.data
+
+    client.post(f'/update_barbershop/{shop.shop_id}',
+                data=dict(name="Soho Shears", address="Soho", phone_number="6", latitude="", longitude=""),
+                follow_redirects=True)
+    db.session.refresh(shop)
+    assert shop.latitude is None and shop.geo_cell is None
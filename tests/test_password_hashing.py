@@ -0,0 +1,103 @@
+import threading
+import time
+import pytest
+from werkzeug.security import generate_password_hash
+from app import create_app, db, Customer
+from passwords import HashingBusy, PasswordHasher, hash_prefix
+
+app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+password_hasher = app.extensions['password_hasher']
+
+
+# Fixture to configure the test client and in-memory database
+@pytest.fixture
+def client():
+    client = app.test_client()
+
+    with app.app_context():
+        db.create_all()
+        yield client
+        db.drop_all()
+
+
+# Fixture to set up a customer whose password was hashed with cheaper, older parameters
+@pytest.fixture
+def setup_database():
+    with app.app_context():
+        hashed_password = generate_password_hash("password", method='pbkdf2:sha256:1000')
+        customer = Customer(first_name="Customer", last_name="User", email="customer@example.com",
+                            password=hashed_password)
+        db.session.add(customer)
+        db.session.commit()
+
+        yield db
+
+
+# Test case for backpressure and queue metrics of the hashing pool
+def test_password_hasher_backpressure():
+    hasher = PasswordHasher(method='pbkdf2:sha256:1000', workers=2, max_pending=3)
+    release = threading.Event()
+    threads = [threading.Thread(target=hasher._run, args=(release.wait,)) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    while hasher.pending < 3:
+        time.sleep(0.01)
+
+    # A fourth caller is turned away instead of queueing
+    with pytest.raises(HashingBusy):
+        hasher.hash("password")
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert hasher.verify(hasher.hash("password"), "password")
+    stats = hasher.stats()
+    assert stats['pending'] == 0
+    assert stats['peak_pending'] == 3
+    assert stats['rejected'] == 1
+    assert stats['completed'] == 5
+    hasher.shutdown()
+
+
+# Test case to upgrade a stored hash at sign-in and to turn sign-ins away while the pool is full
+def test_rehash_on_login(client, setup_database):
+    customer = Customer.query.filter_by(email="customer@example.com").first()
+    assert password_hasher.needs_rehash(customer.password)
+
+    response = client.post('/signin', data=dict(email="customer@example.com", password="password"),
+                           follow_redirects=True)
+    assert b"Welcome, Customer" in response.data
+    db.session.refresh(customer)
+    assert customer.password.startswith(password_hasher.prefix + '$')
+    assert not password_hasher.needs_rehash(customer.password)
+    client.post('/logout')
+
+    max_pending = password_hasher.max_pending
+    password_hasher.max_pending = 0
+    try:
+        response = client.post('/signin', data=dict(email="customer@example.com", password="password"))
+    finally:
+        password_hasher.max_pending = max_pending
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '5'
+    assert b"The server is busy right now" in response.data
+
+
+# Test case to check a method given without its cost parameters does not rehash every password at every sign-in
+def test_needs_rehash_with_default_parameters():
+    hasher = PasswordHasher(method='pbkdf2:sha256')
+    assert not hasher.needs_rehash(generate_password_hash("password", method='pbkdf2:sha256'))
+    assert hasher.needs_rehash(generate_password_hash("password", method='pbkdf2:sha256:1000'))
+    assert hasher.needs_rehash(generate_password_hash("password", method='scrypt'))
+
+    # The prefix matches what werkzeug writes for every spelling of a method
+    for method in ('pbkdf2', 'pbkdf2:sha256', 'pbkdf2:sha512', 'pbkdf2:sha256:1000', 'scrypt', 'scrypt:16384:8:1'):
+        assert hash_prefix(method) == generate_password_hash("password", method=method).split('$', 1)[0]
+
+
+# Test case to check a hasher is built without hashing anything, so app start-up stays fast
+def test_password_hasher_is_cheap_to_build():
+    started = time.perf_counter()
+    for _ in range(100):
+        PasswordHasher(method='pbkdf2:sha256:600000')
+    assert time.perf_counter() - started < 0.1
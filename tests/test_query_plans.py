@@ -0,0 +1,128 @@
+import re
+from datetime import datetime, time, timedelta
+import pytest
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+from app import create_app, db, Barber, Customer, Barbershop, Service, Availability, AvailabilityRule, Appointment, \
+    ReminderScheduler
+
+app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:', 'REMINDERS_ENABLED': True})
+
+# Tables the hot routes read by barber, customer or date, which must never be scanned in full
+INDEXED_TABLES = ('appointment', 'availability', 'availability_rule', 'availability_exception', 'barber', 'service')
+FULL_SCAN = re.compile(r'^SCAN (%s)\b' % '|'.join(INDEXED_TABLES))
+
+
+# Fixture to configure the test client and in-memory database
+@pytest.fixture
+def client():
+    client = app.test_client()
+
+    with app.app_context():
+        db.create_all()
+        yield client
+        db.drop_all()
+
+
+# Fixture to set up a barber with a service, availability on a few days, a weekly rule and a customer
+@pytest.fixture
+def setup_database():
+    with app.app_context():
+        hashed_password = generate_password_hash("password", method='pbkdf2:sha256')
+        barber = Barber(first_name="Barber", last_name="User", email="barber@example.com", password=hashed_password)
+        customer = Customer(first_name="Customer", last_name="User", email="customer@example.com",
+                            password=hashed_password)
+        db.session.add_all([barber, customer])
+        db.session.commit()
+
+        barbershop = Barbershop(name="Test Barbershop", address="123 Barber St", phone_number="1234567890",
+                                creator_id=barber.id)
+        db.session.add(barbershop)
+        db.session.commit()
+
+        barber.shop_id = barbershop.shop_id
+        db.session.add(Service(barber_id=barber.id, name="Haircut", duration=30, price=25.0))
+        today = datetime.today().date()
+        for offset in range(1, 4):
+            db.session.add(Availability(barber_id=barber.id, date=today + timedelta(days=offset),
+                                        start_time=time(9, 0), end_time=time(12, 0)))
+        db.session.add(AvailabilityRule(barber_id=barber.id, weekday=today.weekday(), start_time=time(14, 0),
+                                        end_time=time(16, 0), valid_from=today))
+        db.session.commit()
+
+        yield db
+
+
+# Record every statement the app sends to the database while a block runs
+class StatementLog:
+    def __init__(self):
+        self.statements = []
+
+    def __enter__(self):
+        event.listen(db.engine, 'before_cursor_execute', self.record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(db.engine, 'before_cursor_execute', self.record)
+
+    def record(self, conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(('SELECT', 'INSERT', 'UPDATE', 'DELETE')):
+            self.statements.append((statement, parameters))
+
+
+# Query-plan steps that read one of the barber/date tables without an index
+def full_scans(statements):
+    scans = []
+    connection = db.engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        for statement, parameters in statements:
+            for row in cursor.execute(f'EXPLAIN QUERY PLAN {statement}', parameters).fetchall():
+                if FULL_SCAN.match(row[-1]):
+                    scans.append((row[-1], statement))
+    finally:
+        connection.close()
+    return scans
+
+
+# Test case to check that the booking and calendar routes look schedules up through the indexes
+def test_hot_routes_use_indexes(client, setup_database):
+    barber = Barber.query.filter_by(email="barber@example.com").first()
+    service = Service.query.filter_by(barber_id=barber.id).first()
+    day = datetime.today().date() + timedelta(days=1)
+
+    client.post('/signin', data=dict(email="customer@example.com", password="password"), follow_redirects=True)
+    with StatementLog() as log:
+        client.get(f'/book_appointment/{service.id}')
+        client.get(f'/choose_time/{service.id}/{day}')
+        client.get(f'/api/availability_and_appointments/{barber.id}/{day}')
+        client.get(f'/api/free_slots/{service.id}/{day}')
+        client.post(f'/choose_time/{service.id}/{day}', data=dict(start_time="09:00"), follow_redirects=True)
+        appointment = Appointment.query.filter_by(barber_id=barber.id).first()
+        client.get(f'/update_appointment/{appointment.id}')
+        client.post(f'/update_appointment/{appointment.id}', data=dict(start_time="10:00"), follow_redirects=True)
+
+    client.post('/logout')
+    client.post('/signin', data=dict(email="barber@example.com", password="password"), follow_redirects=True)
+    with StatementLog() as barber_log:
+        client.get(f'/api/barber_events?start={day}T00:00:00&end={day + timedelta(days=7)}T00:00:00')
+
+    assert log.statements and barber_log.statements
+    assert full_scans(log.statements + barber_log.statements) == []
+
+
+# Test case to check that the reminder scheduler loads upcoming appointments and booking changes through indexes
+def test_reminder_scheduler_uses_indexes(client, setup_database):
+    service = Service.query.first()
+    day = datetime.today().date() + timedelta(days=1)
+    client.post('/signin', data=dict(email="customer@example.com", password="password"), follow_redirects=True)
+    client.post(f'/choose_time/{service.id}/{day}', data=dict(start_time="09:00"), follow_redirects=True)
+    scheduler = ReminderScheduler(lambda reminder: None, lead=timedelta(hours=24), reload_interval=timedelta(hours=1),
+                                  retry_delay=timedelta(minutes=5))
+
+    with StatementLog() as log:
+        scheduler.run_pending()
+        client.post(f'/choose_time/{service.id}/{day}', data=dict(start_time="10:00"), follow_redirects=True)
+        assert scheduler.poll_changes() == 1
+
+    assert full_scans(log.statements) == []
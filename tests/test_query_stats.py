@@ -0,0 +1,98 @@
+import logging
+from datetime import datetime, time, timedelta
+import pytest
+from werkzeug.security import generate_password_hash
+from app import create_app, db, Barber, Customer, Barbershop, Service, Appointment
+from query_stats import capture_query_stats, statement_fingerprint
+
+app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+
+
+# Fixture to configure the test client and in-memory database
+@pytest.fixture
+def client():
+    client = app.test_client()
+
+    with app.app_context():
+        db.create_all()
+        yield client
+        db.drop_all()
+
+
+# Fixture to set up a barbershop with five barbers offering two services each, and a customer with an appointment
+@pytest.fixture
+def setup_database():
+    with app.app_context():
+        hashed_password = generate_password_hash("password", method='pbkdf2:sha256')
+        barber = Barber(first_name="Barber", last_name="User", email="barber@example.com", password=hashed_password)
+        customer = Customer(first_name="Customer", last_name="User", email="customer@example.com",
+                            password=hashed_password)
+        db.session.add_all([barber, customer])
+        db.session.commit()
+
+        barbershop = Barbershop(name="Test Barbershop", address="123 Barber St", phone_number="1234567890",
+                                creator_id=barber.id)
+        db.session.add(barbershop)
+        db.session.commit()
+
+        barber.shop_id = barbershop.shop_id
+        barbers = [barber] + [Barber(first_name="Barber", last_name=f"Number{number}",
+                                     email=f"barber{number}@example.com", password=hashed_password,
+                                     shopid=barbershop.shop_id) for number in range(4)]
+        db.session.add_all(barbers)
+        db.session.flush()
+        for shop_barber in barbers:
+            db.session.add_all([Service(barber_id=shop_barber.id, name="Haircut", duration=30, price=25.0),
+                                Service(barber_id=shop_barber.id, name="Shave", duration=15, price=10.0)])
+        db.session.flush()
+
+        service = Service.query.filter_by(barber_id=barber.id).first()
+        db.session.add(Appointment(barber_id=barber.id, customer_id=customer.id, service_id=service.id,
+                                   customer_name="Customer User", date=datetime.today().date() + timedelta(days=1),
+                                   start_time=time(9, 0), end_time=time(9, 30)))
+        db.session.commit()
+
+        yield db
+
+
+# Test case for statement fingerprints
+def test_statement_fingerprint():
+    assert statement_fingerprint("SELECT * FROM service\n WHERE service.barber_id IN (?, ?, ?)") == \
+        statement_fingerprint("SELECT * FROM service WHERE service.barber_id IN (?, ?)")
+    assert statement_fingerprint("SELECT * FROM user WHERE id = 4 AND name = 'O''Neil'") == \
+        "SELECT * FROM user WHERE id = ? AND name = ?"
+
+
+# Test case to keep the customer pages within the query budget and free of statements run in a loop
+def test_customer_pages_query_stats(client, setup_database):
+    # Sign in as the customer
+    client.post('/signin', data=dict(email="customer@example.com", password="password"), follow_redirects=True)
+    barbershop = Barbershop.query.filter_by(name="Test Barbershop").first()
+    db.session.expunge_all()
+
+    with capture_query_stats(app) as recorded:
+        assert client.get('/customer_home').status_code == 200
+        assert client.get(f'/view_barbers/{barbershop.shop_id}').status_code == 200
+
+    assert [stats.endpoint for stats in recorded] == ['main.customer_home', 'main.view_barbers']
+    for stats in recorded:
+        assert 0 < stats.count <= app.config['QUERY_BUDGET']
+        assert stats.duration > 0
+        assert stats.repeated(2) == []
+
+
+# Test case to log a warning when a request goes over its query budget
+def test_query_budget_warning(client, setup_database, caplog):
+    client.post('/signin', data=dict(email="customer@example.com", password="password"), follow_redirects=True)
+    barbershop = Barbershop.query.filter_by(name="Test Barbershop").first()
+
+    budget = app.config['QUERY_BUDGET']
+    app.config['QUERY_BUDGET'] = 1
+    try:
+        with caplog.at_level(logging.WARNING):
+            client.get(f'/view_barbers/{barbershop.shop_id}')
+    finally:
+        app.config['QUERY_BUDGET'] = budget
+
+    assert any('view_barbers ran' in record.getMessage() and '(budget 1)' in record.getMessage()
+               for record in caplog.records)
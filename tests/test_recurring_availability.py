@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+import pytest
+from werkzeug.security import generate_password_hash
+from app import create_app, db, Barber, Customer, Barbershop, Service, AvailabilityRule, Availability
+
+app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+
+
+# Fixture to configure the test client and in-memory database
+@pytest.fixture
+def client():
+    client = app.test_client()
+
+    with app.app_context():
+        db.create_all()
+        yield client
+        db.drop_all()
+
+
+# Fixture to set up initial database state with a barber, barbershop, service and customer
+@pytest.fixture
+def setup_database():
+    with app.app_context():
+        hashed_password = generate_password_hash("password", method='pbkdf2:sha256')
+        barber = Barber(first_name="Barber", last_name="User", email="barber@example.com", password=hashed_password)
+        customer = Customer(first_name="Customer", last_name="User", email="customer@example.com",
+                            password=hashed_password)
+        db.session.add_all([barber, customer])
+        db.session.commit()
+
+        barbershop = Barbershop(name="Test Barbershop", address="123 Barber St", phone_number="1234567890",
+                                creator_id=barber.id)
+        db.session.add(barbershop)
+        db.session.commit()
+
+        barber.shop_id = barbershop.shop_id
+        db.session.add(Service(barber_id=barber.id, name="Haircut", duration=30, price=25.0))
+        db.session.commit()
+
+        yield db
+
+
+# Test case to add a weekly availability, skip one week and book another
+def test_recurring_availability(client, setup_database):
+    today = datetime.today().date()
+    next_week = today + timedelta(days=7)
+    in_two_weeks = today + timedelta(days=14)
+
+    # Sign in as the barber and add a weekly availability for the next three weeks
+    client.post('/signin', data=dict(email="barber@example.com", password="password"), follow_redirects=True)
+    response = client.post('/save_availability', data=dict(date=today.isoformat(), start_time="09:00",
+                                                           end_time="12:00", repeat="weekly",
+                                                           until=in_two_weeks.isoformat()), follow_redirects=True)
+    assert b"Availability added successfully" in response.data
+    assert b"Every " + today.strftime('%A').encode() + b" from 09:00 to" in response.data
+
+    # A single rule is stored instead of one row per date
+    barber = Barber.query.filter_by(email="barber@example.com").first()
+    assert AvailabilityRule.query.filter_by(barber_id=barber.id).count() == 1
+    assert Availability.query.filter_by(barber_id=barber.id).count() == 0
+
+    # The calendar shows every week the rule applies
+    response = client.get('/api/barber_events')
+    assert sorted(event['start'][:10] for event in response.get_json()) == [
+        today.isoformat(), next_week.isoformat(), in_two_weeks.isoformat()]
+
+    # Skip next week
+    rule = AvailabilityRule.query.filter_by(barber_id=barber.id).first()
+    response = client.post(f'/skip_availability_rule/{rule.id}', data=dict(date=next_week.isoformat()),
+                           follow_redirects=True)
+    assert b"Date removed from weekly availability" in response.data
+    client.post('/logout')
+
+    # The customer sees the remaining weeks as available days
+    client.post('/signin', data=dict(email="customer@example.com", password="password"), follow_redirects=True)
+    service = Service.query.filter_by(barber_id=barber.id).first()
+    response = client.get(f'/book_appointment/{service.id}', follow_redirects=True)
+    assert f"/choose_time/{service.id}/{today}".encode() in response.data
+    assert f"/choose_time/{service.id}/{next_week}".encode() not in response.data
+    assert f"/choose_time/{service.id}/{in_two_weeks}".encode() in response.data
+
+    # Booking inside the rule's hours works, outside them or on the skipped date does not
+    response = client.post(f'/choose_time/{service.id}/{in_two_weeks}', data=dict(start_time="10:00"),
+                           follow_redirects=True)
+    assert b"Appointment confirmed" in response.data
+    response = client.post(f'/choose_time/{service.id}/{in_two_weeks}', data=dict(start_time="11:45"),
+                           follow_redirects=True)
+    assert b"Selected time is not within the barber" in response.data
+    response = client.post(f'/choose_time/{service.id}/{next_week}', data=dict(start_time="10:00"),
+                           follow_redirects=True)
+    assert b"Selected time is not within the barber" in response.data
@@ -0,0 +1,88 @@
+import pytest
+from flask import g
+from werkzeug.security import generate_password_hash
+from app import create_app, db, Barber, Customer, Barbershop, user_cache
+from query_stats import capture_query_stats
+
+app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+
+
+# Fixture to configure the test client and in-memory database
+@pytest.fixture
+def client():
+    client = app.test_client()
+
+    with app.app_context():
+        db.create_all()
+        yield client
+        db.drop_all()
+
+
+# Fixture to set up a barbershop created by one barber, a second barber without a shop, and a customer
+@pytest.fixture
+def setup_database():
+    with app.app_context():
+        hashed_password = generate_password_hash("password", method='pbkdf2:sha256')
+        creator = Barber(first_name="Creator", last_name="User", email="creator@example.com",
+                         password=hashed_password)
+        barber = Barber(first_name="Barber", last_name="User", email="barber@example.com", password=hashed_password)
+        customer = Customer(first_name="Customer", last_name="User", email="customer@example.com",
+                            password=hashed_password)
+        db.session.add_all([creator, barber, customer])
+        db.session.commit()
+
+        barbershop = Barbershop(name="Test Barbershop", address="123 Barber St", phone_number="1234567890",
+                                creator_id=creator.id)
+        db.session.add(barbershop)
+        db.session.commit()
+        creator.shop_id = barbershop.shop_id
+        db.session.commit()
+
+        yield db
+
+
+# GET a page as a new request would. The fixture's app context outlives requests, so Flask-Login would otherwise
+# reuse the user it remembered in g instead of calling load_user
+def get(client, url):
+    g.pop('_login_user', None)
+    return client.get(url)
+
+
+# Test case to load a signed-in user from the cache without a query
+def test_user_cache_hit(client, setup_database):
+    client.post('/signin', data=dict(email="customer@example.com", password="password"), follow_redirects=True)
+    customer = Customer.query.filter_by(email="customer@example.com").first()
+    get(client, '/calendar')
+    assert customer.id in user_cache
+    db.session.expunge_all()
+
+    with capture_query_stats(app) as recorded:
+        response = get(client, '/calendar')
+    assert response.status_code == 200
+    assert recorded[0].count == 0
+
+
+# Test case to drop a cached barber when joining, leaving or losing a barbershop changes their row
+def test_user_cache_invalidation(client, setup_database):
+    barbershop = Barbershop.query.filter_by(name="Test Barbershop").first()
+    barber = Barber.query.filter_by(email="barber@example.com").first()
+    barber_id, shop_id = barber.id, barbershop.shop_id
+
+    client.post('/signin', data=dict(email="barber@example.com", password="password"), follow_redirects=True)
+    assert b"You are not associated with any Barbershop" in get(client, '/barber_home').data
+
+    client.post(f'/join_barbershop/{shop_id}', follow_redirects=True)
+    assert barber_id not in user_cache
+    assert b"Name: Test Barbershop" in get(client, '/barber_home').data
+    assert user_cache.get(barber_id).shop_id == shop_id
+
+    client.post(f'/leave_barbershop/{shop_id}', follow_redirects=True)
+    assert b"You are not associated with any Barbershop" in get(client, '/barber_home').data
+
+    # Deleting the shop clears the shop of every barber in it, without loading them
+    client.post(f'/join_barbershop/{shop_id}', follow_redirects=True)
+    get(client, '/barber_home')
+    client.post('/logout')
+    client.post('/signin', data=dict(email="creator@example.com", password="password"), follow_redirects=True)
+    client.post(f'/delete_barbershop/{shop_id}', follow_redirects=True)
+    assert barber_id not in user_cache
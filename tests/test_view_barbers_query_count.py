@@ -0,0 +1,84 @@
+import pytest
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+from app import create_app, db, Barber, Customer, Barbershop, Service
+
+app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+
+
+# Fixture to configure the test client and in-memory database
+@pytest.fixture
+def client():
+    client = app.test_client()
+
+    with app.app_context():
+        db.create_all()
+        yield client
+        db.drop_all()
+
+
+# Fixture to set up a barbershop whose creator offers one service, and a customer
+@pytest.fixture
+def setup_database():
+    with app.app_context():
+        hashed_password = generate_password_hash("password", method='pbkdf2:sha256')
+        barber = Barber(first_name="Barber", last_name="User", email="barber@example.com", password=hashed_password)
+        customer = Customer(first_name="Customer", last_name="User", email="customer@example.com",
+                            password=hashed_password)
+        db.session.add_all([barber, customer])
+        db.session.commit()
+
+        barbershop = Barbershop(name="Test Barbershop", address="123 Barber St", phone_number="1234567890",
+                                creator_id=barber.id)
+        db.session.add(barbershop)
+        db.session.commit()
+
+        barber.shop_id = barbershop.shop_id
+        db.session.add(Service(barber_id=barber.id, name="Haircut", duration=30, price=25.0))
+        db.session.commit()
+
+        yield db
+
+
+# Number of statements sent to the database while fetching a page
+def count_queries(client, url):
+    statements = []
+    # Start from an empty identity map so nothing is served from objects loaded earlier in the test
+    db.session.expunge_all()
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    assert response.status_code == 200
+    return len(statements), response
+
+
+# Test case to load a barbershop's barbers and services in the same number of queries however many barbers it has
+def test_view_barbers_query_count(client, setup_database):
+    # Sign in as the customer
+    client.post('/signin', data=dict(email="customer@example.com", password="password"), follow_redirects=True)
+
+    barbershop = Barbershop.query.filter_by(name="Test Barbershop").first()
+    url = f'/view_barbers/{barbershop.shop_id}'
+    one_barber, _ = count_queries(client, url)
+
+    hashed_password = generate_password_hash("password", method='pbkdf2:sha256')
+    for number in range(10):
+        barber = Barber(first_name="Barber", last_name=f"Number{number}", email=f"barber{number}@example.com",
+                        password=hashed_password, shopid=barbershop.shop_id)
+        db.session.add(barber)
+        db.session.flush()
+        db.session.add_all([Service(barber_id=barber.id, name=f"Cut {number}", duration=30, price=20.0),
+                            Service(barber_id=barber.id, name=f"Shave {number}", duration=15, price=10.0)])
+    db.session.commit()
+
+    many_barbers, response = count_queries(client, url)
+    assert many_barbers == one_barber
+    assert b"Barber Number9" in response.data
+    assert b"Shave 9" in response.data
+    assert b"Haircut" in response.data
@@ -0,0 +1,57 @@
+import csv
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from werkzeug.security import generate_password_hash
+
+USER_TYPES = ('barber', 'customer')
+
+
+# Raised with every problem found in a user file, so it can be fixed in one go
+class UserImportError(ValueError):
+    def __init__(self, errors):
+        super().__init__('; '.join(errors))
+        self.errors = errors
+
+
+# Parse CSV text with first_name, last_name, email, password and user_type (barber or customer) columns
+def parse_users(text):
+    rows = []
+    errors = []
+    emails = {}
+    for number, record in enumerate(csv.DictReader(io.StringIO(text)), start=1):
+        try:
+            row = {field: (record.get(field) or '').strip() for field in
+                   ('first_name', 'last_name', 'email', 'user_type')}
+            # Passwords are taken as they are, spaces included
+            row['password'] = record.get('password') or ''
+            missing = [field for field, value in row.items() if not value]
+            if missing:
+                raise ValueError(f"missing {', '.join(missing)}")
+            row['user_type'] = row['user_type'].lower()
+            if row['user_type'] not in USER_TYPES:
+                raise ValueError(f"user_type must be one of {', '.join(USER_TYPES)}")
+            email = row['email'].lower()
+            if email in emails:
+                raise ValueError(f"email {row['email']} already used by record {emails[email]}")
+            emails[email] = number
+            rows.append(row)
+        except (AttributeError, ValueError) as e:
+            errors.append(f'record {number}: {e}')
+
+    if errors:
+        raise UserImportError(errors)
+    return rows
+
+
+# Hash passwords on a pool of worker processes, yielding the hashes in input order. The pool keeps hashing ahead
+# while the caller consumes earlier results, so inserting one batch overlaps with hashing the next
+def hash_passwords(passwords, method, workers=None, chunksize=16):
+    pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count())
+    try:
+        yield from pool.map(partial(generate_password_hash, method=method), passwords, chunksize=chunksize)
+    finally:
+        # Stop hashing ahead if the caller gives up early
+        pool.shutdown(cancel_futures=True)